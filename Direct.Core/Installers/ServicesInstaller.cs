@@ -9,6 +9,7 @@ using Direct.Core.Services.NumberingService.EdgesNumberingService;
 using Direct.Core.Services.NumberingService.NodesNumberingService;
 using Direct.Core.Services.PlotService;
 using Direct.Core.Services.ProblemService;
+using Direct.Core.Services.RenderServerService;
 using Direct.Core.Services.SensorEvaluator;
 using Direct.Core.Services.SolutionExportService;
 using Direct.Core.Services.SourceProvider;
@@ -29,6 +30,7 @@ public static class ServicesInstaller
         builder.RegisterType<SensorEvaluator>().As<ISensorEvaluator>();
         builder.RegisterType<TestSessionService>().As<ITestSessionService>();
         builder.RegisterType<FirstBoundaryConditionService>().As<IBoundaryConditionService>();
+        builder.RegisterType<RenderServerService>().As<IRenderServerService>().SingleInstance();
         builder.RegisterType<PlotService>().As<IPlotService>();
         builder.RegisterType<VisualizerService>().As<IVisualizerService>();
         builder.RegisterType<SolutionExportService>().As<ISolutionExportService>();
@@ -1,36 +1,117 @@
+import argparse
 import json
 
+import numpy as np
+
+from plot_backend import configure_backend
+
+configure_backend(interactive=False)
+
 import matplotlib.pyplot as plt
 
+# Наибольшее количество сенсоров, которые рисуются отдельными точками; при большем строится карта средних
+MAX_RAW_POINTS = 20000
+
+# Размер ячейки карты средних в пикселях изображения
+BIN_PIXELS = 4
+
 
 # 📂 Загрузка сенсоров из JSON-файла
 def load_sensors(filepath):
     with open(filepath, 'r') as f:
         return json.load(f)
 
-# 📊 Построение 3D scatter-графика
-def plot_sensors(sensors):
-    x = [s["X"] for s in sensors]
-    y = [s["Y"] for s in sensors]
-    z = [s["Value"] for s in sensors]
 
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
+# 🔢 Координаты и значения сенсоров одним массивом
+def sensor_arrays(sensors):
+    """(N,) массивы X, Y и Value"""
+    data = np.array([(s["X"], s["Y"], s["Value"]) for s in sensors], dtype=float).reshape(-1, 3)
+    return data[:, 0], data[:, 1], data[:, 2]
+
+
+# 🧮 Среднее значение сенсоров по ячейкам регулярной сетки
+def bin_sensors(x, y, values, shape):
+    """Границы ячеек по X и Y и (ny, nx) средние значения, NaN в пустых ячейках.
+
+    Номер ячейки каждого сенсора вычисляется арифметически, суммы и
+    количества накапливаются одним bincount, поэтому работа линейна по
+    числу сенсоров без циклов Python, а размер результата задаётся только
+    разрешением изображения.
+    """
+    nx, ny = shape
+    x_edges = np.linspace(x.min(), x.max(), nx + 1)
+    y_edges = np.linspace(y.min(), y.max(), ny + 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = np.nan_to_num((x - x_edges[0]) / (x_edges[-1] - x_edges[0]) * nx).astype(np.int64)
+        rows = np.nan_to_num((y - y_edges[0]) / (y_edges[-1] - y_edges[0]) * ny).astype(np.int64)
+    cells = np.minimum(rows, ny - 1) * nx + np.minimum(columns, nx - 1)
+
+    counts = np.bincount(cells, minlength=nx * ny)
+    sums = np.bincount(cells, weights=values, minlength=nx * ny)
+    means = np.full(nx * ny, np.nan)
+    np.divide(sums, counts, out=means, where=counts > 0)
+    return x_edges, y_edges, means.reshape(ny, nx)
 
-    sc = ax.scatter(x, y, z, c=z, cmap='viridis')
 
-    ax.set_xlabel("X")
-    ax.set_ylabel("Y")
-    ax.set_zlabel("Value")
+# 📊 Построение 3D scatter-графика или карты средних для больших облаков сенсоров
+def plot_sensors(sensors, output_file='anomaly_chart.png', max_points=MAX_RAW_POINTS,
+                 bin_pixels=BIN_PIXELS, dpi=300):
+    x, y, z = sensor_arrays(sensors)
+
+    if len(z) <= max_points:
+        fig = plt.figure()
+        ax = fig.add_subplot(111, projection='3d')
+
+        sc = ax.scatter(x, y, z, c=z, cmap='viridis')
+
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+        ax.set_zlabel("Value")
+    else:
+        if bin_pixels < 1:
+            raise ValueError("Размер ячейки карты должен быть не меньше 1 пикселя")
+        fig, ax = plt.subplots()
+
+        # Сетка по размеру области осей в пикселях итогового изображения
+        width, height = ax.get_position().size * fig.get_size_inches() * dpi
+        shape = (max(int(width // bin_pixels), 1), max(int(height // bin_pixels), 1))
+        x_edges, y_edges, means = bin_sensors(x, y, z, shape)
+
+        sc = ax.imshow(means, origin='lower', cmap='viridis', interpolation='nearest', aspect='auto',
+                       extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
+
+        ax.set_xlabel("X")
+        ax.set_ylabel("Y")
+
     plt.colorbar(sc, label=u'Δg')
     plt.title("Карта аномалий")
 
-    plt.savefig('anomaly_chart.png', dpi=300, bbox_inches='tight')
-    print(f"Сохранено изображение: {'anomaly_chart.png'}")
+    plt.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    print(f"Сохранено изображение: {output_file}")
     #plt.show()
 
+
 # 🚀 Точка входа
 if __name__ == '__main__':
-    sensor_file = 'anomaly_data.json'  # Путь к JSON-файлу
-    sensors = load_sensors(sensor_file)
-    plot_sensors(sensors)
+    parser = argparse.ArgumentParser(
+        description='Карта аномалий по anomaly_data.json',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--file', default='anomaly_data.json', help='Путь к JSON-файлу сенсоров')
+    parser.add_argument('-o', '--output', default='anomaly_chart.png', help='Файл изображения')
+    parser.add_argument('--max-points', type=int, default=MAX_RAW_POINTS,
+                        help='Наибольшее количество сенсоров, рисуемых отдельными точками')
+    parser.add_argument('--bin-pixels', type=int, default=BIN_PIXELS,
+                        help='Размер ячейки карты средних в пикселях')
+    parser.add_argument('--dpi', type=int, default=300, help='Разрешение изображения')
+    args = parser.parse_args()
+
+    try:
+        sensors = load_sensors(args.file)
+        if not sensors:
+            raise ValueError(f"Файл {args.file} не содержит сенсоров")
+        plot_sensors(sensors, args.output, args.max_points, args.bin_pixels, args.dpi)
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Каталог проверяемых скриптов
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from bfield_evaluator import FieldEvaluator, load_solution
+from box_index import CONTAINS_EPSILON
+from mesh_stream import read_mesh_stream
+from synthetic import ensure_input
+
+# Шаг конечных разностей BasicFunctionProvider.GetCurl
+CURL_STEP = 1e-2
+
+# Допустимое расхождение с эталоном относительно наибольшего |B|
+RELATIVE_TOLERANCE = 1e-9
+
+
+def reference_basis(low: np.ndarray, high: np.ndarray, number: int, point: np.ndarray) -> np.ndarray:
+    """BasicFunctionProvider.GetBasicFunctions: базисная функция ребра number в точке"""
+    minus = (high - point) / (high - low)
+    plus = (point - low) / (high - low)
+    direction = number // 4
+    u, v = (axis for axis in range(3) if axis != direction)
+    # Рёбра направления идут в порядке (Minus, Minus), (Plus, Minus), (Minus, Plus), (Plus, Plus)
+    value_u = plus[u] if number % 2 else minus[u]
+    value_v = plus[v] if number // 2 % 2 else minus[v]
+    result = np.zeros(3)
+    result[direction] = value_u * value_v
+    return result
+
+
+def reference_curl(low: np.ndarray, high: np.ndarray, number: int, point: np.ndarray) -> np.ndarray:
+    """BasicFunctionProvider.GetCurl: ротор конечными разностями с шагом CURL_STEP"""
+    f = reference_basis(low, high, number, point)
+    f_dx, f_dy, f_dz = (reference_basis(low, high, number, point + CURL_STEP * shift) for shift in np.eye(3))
+    return np.array([
+        (f_dz[1] - f[1]) / CURL_STEP - (f_dy[2] - f[2]) / CURL_STEP,
+        (f_dx[2] - f[2]) / CURL_STEP - (f_dz[0] - f[0]) / CURL_STEP,
+        (f_dy[0] - f[0]) / CURL_STEP - (f_dx[1] - f[1]) / CURL_STEP
+    ])
+
+
+def reference_field(mesh, solution: np.ndarray, point: np.ndarray) -> np.ndarray:
+    """SensorEvaluator.EvaluateBVectorAt: первый содержащий точку элемент, сумма A_i * rot(phi_i) / Mu"""
+    low, high = mesh.element_bounds[:, 0], mesh.element_bounds[:, 1]
+    contains = ((point >= low - CONTAINS_EPSILON) & (point <= high + CONTAINS_EPSILON)).all(axis=1)
+    if not contains.any():
+        return np.zeros(3)
+
+    element = int(np.argmax(contains))
+    b = np.zeros(3)
+    for number in range(12):
+        coefficient = solution[mesh.edge_index[mesh.element_edges[element, number]]]
+        b += coefficient * reference_curl(low[element], high[element], number, point)
+    mu = mesh.mu[element] if mesh.mu[element] > 0 else 1.0
+    return b / mu
+
+
+def export_solution(file_path: str, mesh, solution: np.ndarray, rng: np.random.Generator) -> list:
+    """Запись решения в формате SolutionExportService.ExportToJson в случайном порядке рёбер"""
+    start, end = mesh.nodes[mesh.edge_nodes[:, 0]], mesh.nodes[mesh.edge_nodes[:, 1]]
+    directions = (end - start) / np.linalg.norm(end - start, axis=1)[:, None]
+    centers = (start + end) / 2
+    entries = [
+        {'x': c[0], 'y': c[1], 'z': c[2], 'dx': d[0], 'dy': d[1], 'dz': d[2], 'value': v}
+        for c, d, v in zip(centers.tolist(), directions.tolist(), solution[mesh.edge_index].tolist())
+    ]
+    entries = [entries[i] for i in rng.permutation(len(entries))]
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+    return entries
+
+
+def check_solution_loading(directory: str, mesh, solution: np.ndarray, rng: np.random.Generator) -> list[str]:
+    """Сопоставление экспорта рёбрам сетки: значения, повторные записи и направление в ключе"""
+    failures = []
+    path = os.path.join(directory, 'solution_export.json')
+    entries = export_solution(path, mesh, solution, rng)
+    if not np.array_equal(load_solution(path, mesh), solution[mesh.edge_index]):
+        failures.append("значения экспорта не совпадают с коэффициентами рёбер")
+
+    # Повторная запись ребра и запись с другой осью направления при том же центре должны отклоняться
+    variants = {
+        'повторная запись ребра': entries + [dict(entries[0], value=entries[0]['value'] + 1)],
+        'запись с другой осью направления': [
+            dict(entry, dx=entry['dy'], dy=entry['dz'], dz=entry['dx']) if index == 0 else entry
+            for index, entry in enumerate(entries)
+        ]
+    }
+    for name, variant in variants.items():
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(variant, f)
+        try:
+            load_solution(path, mesh)
+            failures.append(f"{name} не отклонена")
+        except ValueError:
+            pass
+    return failures
+
+
+def check_field(mesh, solution: np.ndarray, count: int, rng: np.random.Generator) -> tuple[float, list[str]]:
+    """Наибольшее относительное расхождение FieldEvaluator с эталоном в точках внутри, на гранях и вне сетки"""
+    low, high = mesh.bounds()
+    margin = 0.1 * (high - low)
+    points = np.concatenate((
+        rng.uniform(low, high, (count, 3)),
+        mesh.nodes[rng.integers(0, len(mesh.nodes), count // 4)],
+        rng.uniform(low - margin, high + margin, (count // 4, 3))
+    ))
+
+    field = FieldEvaluator(mesh, solution[mesh.edge_index]).evaluate(points)
+    expected = np.array([reference_field(mesh, solution, point) for point in points])
+    scale = max(float(np.abs(expected).max()), 1e-300)
+    error = float(np.abs(field - expected).max()) / scale
+    failures = [] if error <= RELATIVE_TOLERANCE else [f"расхождение поля {error:.2e} больше {RELATIVE_TOLERANCE:.0e}"]
+    return error, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Проверка bfield_evaluator по построчному переносу SensorEvaluator и BasicFunctionProvider',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-n', '--elements', type=int, default=1000, help='Количество элементов синтетической сетки')
+    parser.add_argument('-p', '--points', type=int, default=2000, help='Количество точек внутри сетки')
+    parser.add_argument('--seed', type=int, default=0, help='Начальное значение генератора')
+    args = parser.parse_args()
+
+    try:
+        rng = np.random.default_rng(args.seed)
+        with tempfile.TemporaryDirectory() as directory:
+            mesh, _, _ = read_mesh_stream(ensure_input(directory, 'mesh_data.json', args.elements))
+            solution = rng.normal(size=int(mesh.edge_index.max()) + 1)
+
+            failures = check_solution_loading(directory, mesh, solution, rng)
+            error, field_failures = check_field(mesh, solution, args.points, rng)
+            failures += field_failures
+
+        print(f"Элементов: {mesh.elements_count}, относительное расхождение поля: {error:.2e}")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
+
+    if failures:
+        print("\nПроверка не пройдена:\n  " + "\n  ".join(failures))
+        exit(1)
+    print("Проверка пройдена")
@@ -0,0 +1,126 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Каталог проверяемых скриптов и файл с бюджетами времени импорта
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).with_name('import_budget.json')
+
+# Запас, с которым записываются новые бюджеты относительно измеренного времени
+BUDGET_HEADROOM = 1.5
+
+# Код, печатающий время выполнения заголовка скрипта внутри дочернего процесса
+_TIMER_TEMPLATE = """import time as _budget_time
+_budget_started = _budget_time.perf_counter()
+{header}
+print(_budget_time.perf_counter() - _budget_started)
+"""
+
+
+def _is_backend_call(node: ast.stmt) -> bool:
+    """Вызов выбора backend, который должен выполняться вместе с импортами"""
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    func = node.value.func
+    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+    return name in ('configure_backend', 'use')
+
+
+def import_header(script: Path) -> str:
+    """Импорты и выбор backend верхнего уровня скрипта.
+
+    Импорты внутри функций не попадают в заголовок: они выполняются только на
+    тех путях, которым действительно нужны, и не входят в стоимость запуска.
+    """
+    source = script.read_text(encoding='utf-8-sig')
+    tree = ast.parse(source)
+    statements = [
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom)) or _is_backend_call(node)
+    ]
+    return '\n'.join(statements)
+
+
+def measure_import(script: Path, repeats: int) -> tuple[float, float]:
+    """Медианы времени импорта и полного запуска интерпретатора в секундах"""
+    code = _TIMER_TEMPLATE.format(header=import_header(script))
+    env = dict(os.environ, EM_PLOTS_HEADLESS='1')
+
+    imports, totals = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=SCRIPTS_DIR, env=env,
+            capture_output=True, text=True
+        )
+        totals.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise ValueError(f"Ошибка импорта {script.name}:\n{result.stderr.strip()}")
+        imports.append(float(result.stdout.strip().splitlines()[-1]))
+
+    return statistics.median(imports), statistics.median(totals)
+
+
+def load_budget(file_path: Path) -> dict:
+    """Бюджеты времени импорта в миллисекундах по имени скрипта"""
+    if not file_path.exists():
+        return {}
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Замер времени импорта скриптов визуализации и проверка бюджета',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('scripts', nargs='*', help='Имена скриптов; по умолчанию все *.py в каталоге скриптов')
+    parser.add_argument('-n', '--repeats', type=int, default=5, help='Количество замеров каждого скрипта')
+    parser.add_argument('--budget', type=Path, default=BUDGET_FILE, help='JSON файл с бюджетами в мс')
+    parser.add_argument('--write-budget', action='store_true',
+                        help=f'Записать измеренное время с запасом x{BUDGET_HEADROOM} как новый бюджет')
+    args = parser.parse_args()
+
+    budget = load_budget(args.budget)
+    names = args.scripts or sorted(p.name for p in SCRIPTS_DIR.glob('*.py') if p.name != '__init__.py')
+
+    exceeded, unbudgeted = [], []
+    print(f"{'Скрипт':<28}{'импорт, мс':>12}{'запуск, мс':>12}{'бюджет, мс':>12}")
+    try:
+        for name in names:
+            import_time, total_time = measure_import(SCRIPTS_DIR / name, args.repeats)
+            import_ms, total_ms = import_time * 1000, total_time * 1000
+            limit = budget.get(name)
+            mark = ''
+            if args.write_budget:
+                budget[name] = int(round(import_ms * BUDGET_HEADROOM, -1))
+            elif limit is None:
+                unbudgeted.append(name)
+                mark = '  нет бюджета'
+            elif import_ms > limit:
+                exceeded.append(name)
+                mark = '  превышен'
+            print(f"{name:<28}{import_ms:>12.0f}{total_ms:>12.0f}{limit if limit is not None else '-':>12}{mark}")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
+
+    if args.write_budget:
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(budget.items())), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\nБюджет записан в {args.budget}")
+    else:
+        if exceeded:
+            print(f"\nБюджет времени импорта превышен: {', '.join(exceeded)}")
+        if unbudgeted:
+            print(f"\nНет бюджета для {', '.join(unbudgeted)}; запишите его с --write-budget")
+        if exceeded or unbudgeted:
+            exit(1)
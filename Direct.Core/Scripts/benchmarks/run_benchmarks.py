@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+# Каталог скриптов визуализации, которые измеряются
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+# Интерактивные скрипты в замерах только сохраняют изображения
+os.environ['EM_PLOTS_HEADLESS'] = '1'
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+import contour_plot
+import draw_mesh_script
+import inverse_chart
+import show_plots_script
+import visualize_sensors
+from mesh_model import AXIS_INDEX, PLANE_AXES
+from mesh_slicer import MeshSlicer, project_boxes
+from synthetic import ensure_input
+
+# Файл базовых замеров рядом со скриптом. Абсолютные времена зависят от машины, поэтому
+# базовые замеры перезаписываются (--write-baseline) на каждой машине, где проверяются
+# регрессии; калибровка лишь сглаживает колебания загрузки и частоты процессора
+BASELINE_FILE = Path(__file__).with_name('baseline.json')
+
+# Каталог для сгенерированных входных файлов, переиспользуемых между запусками
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'em_benchmarks')
+
+# Размеры по умолчанию; 10^5 и 10^6 передаются через --sizes
+DEFAULT_SIZES = (1000, 10000)
+
+# Допустимое относительное замедление этапа
+DEFAULT_TOLERANCE = 0.3
+
+# Порог шума: разница ниже разброса повторов, умноженного на NOISE_SPREADS, или ниже
+# MIN_REGRESSION (разрешение таймера для коротких этапов) регрессией не считается
+NOISE_SPREADS = 2.0
+MIN_REGRESSION = 0.002
+
+# Количество повторов эталонной нагрузки, по медиане которых масштабируются базовые замеры
+CALIBRATION_REPEATS = 5
+
+# Позиции сечений, с которыми PlotService запрашивает отрисовку сетки
+MESH_SLICES = {'X': 0.0, 'Y': 0.0, 'Z': -9.0}
+
+
+class StageTimer:
+    """Накопление времени выполнения именованных этапов"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+
+def bench_show_plots(timer: StageTimer, input_file: str, output_dir: str):
+    with timer.stage('load'):
+        mesh, sensors = show_plots_script.load_from_json(input_file)
+    with timer.stage('compute'):
+        slicer = MeshSlicer(mesh)
+        for axis, position in MESH_SLICES.items():
+            slicer.slice(AXIS_INDEX[axis], position)
+        for plane_axes in PLANE_AXES.values():
+            project_boxes(mesh, plane_axes)
+    with timer.stage('render'):
+        fig = show_plots_script.plot_finite_element_mesh(
+            mesh, sensors,
+            x_slice=MESH_SLICES['X'], y_slice=MESH_SLICES['Y'], z_slice=MESH_SLICES['Z'],
+            output_file=None, show=False
+        )
+    with timer.stage('save'):
+        fig.savefig(os.path.join(output_dir, 'graph.png'), dpi=300, bbox_inches='tight')
+
+
+def bench_contour(timer: StageTimer, input_file: str, output_dir: str):
+    with timer.stage('load'):
+        field = contour_plot.load_field_data(input_file)
+    with timer.stage('compute'):
+        grid = contour_plot.interpolate_field(field)
+    with timer.stage('render'):
+        fig = contour_plot.plot_field(field, grid)
+    with timer.stage('save'):
+        fig.savefig(os.path.join(output_dir, 'contour_plot.png'), dpi=300, bbox_inches='tight')
+
+
+def bench_sensors(timer: StageTimer, input_file: str, output_dir: str):
+    with timer.stage('load'):
+        field = visualize_sensors.load_bfield(input_file)
+    with timer.stage('render'):
+        fig = visualize_sensors.plot_bfield(field)
+    with timer.stage('save'):
+        fig.savefig(os.path.join(output_dir, 'sensors_plot.png'), dpi=300, bbox_inches='tight')
+
+
+def bench_inverse(timer: StageTimer, input_file: str, output_dir: str):
+    with timer.stage('load'):
+        cells = inverse_chart.load_mesh(input_file)
+    with timer.stage('render'):
+        viewer = inverse_chart.InteractiveSliceViewer(cells, show=False)
+    with timer.stage('save'):
+        viewer.fig.savefig(os.path.join(output_dir, 'inverse_chart.png'), dpi=300, bbox_inches='tight')
+
+
+def bench_mesh_views(timer: StageTimer, input_file: str, output_dir: str):
+    with timer.stage('load'):
+        units = draw_mesh_script.load_units(input_file)
+    # Виды строятся и сохраняются в рабочих процессах, поэтому замеряются одним этапом
+    with timer.stage('render'):
+        draw_mesh_script.render_views(units, os.path.join(output_dir, 'OutputPlots'))
+
+
+def _run_script(args: list, cwd: str):
+    result = subprocess.run([sys.executable, *args], cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise ValueError(f"Скрипт {args[0]} завершился с ошибкой:\n{result.stderr.strip()}")
+
+
+def bench_mesh_chart(timer: StageTimer, input_file: str, output_dir: str):
+    # Скрипт выполняется на уровне модуля, поэтому измеряется целиком вместе с запуском интерпретатора
+    with timer.stage('total'):
+        _run_script([str(SCRIPTS_DIR / 'mesh_chart.py'), input_file, 'mesh_chart.png'], output_dir)
+
+
+def bench_potential_2d(timer: StageTimer, input_file: str, output_dir: str):
+    shutil.copy(input_file, os.path.join(output_dir, 'solution.json'))
+    with timer.stage('total'):
+        _run_script([str(SCRIPTS_DIR / 'visualize_potential_2d.py')], output_dir)
+
+
+# Имя замера -> (функция, входной файл в форме C# сервисов)
+BENCHMARKS = {
+    'show_plots': (bench_show_plots, 'mesh_data.json'),
+    'contour': (bench_contour, 'field_data.json'),
+    'sensors': (bench_sensors, 'bfield_3d.json'),
+    'inverse': (bench_inverse, 'inverse.json'),
+    'mesh_views': (bench_mesh_views, 'output.txt'),
+    'mesh_chart': (bench_mesh_chart, 'strata.json'),
+    'potential_2d': (bench_potential_2d, 'solution.json')
+}
+
+
+def run_benchmark(name: str, size: int, repeats: int, data_dir: str) -> tuple[dict, dict]:
+    """Медианы и разброс (максимум минус минимум) времени этапов замера name на входных данных размера size"""
+    function, input_name = BENCHMARKS[name]
+    input_file = ensure_input(data_dir, input_name, size)
+
+    samples = []
+    for _ in range(repeats):
+        timer = StageTimer()
+        with tempfile.TemporaryDirectory() as output_dir, open(os.devnull, 'w') as devnull:
+            try:
+                with redirect_stdout(devnull):
+                    function(timer, input_file, output_dir)
+            finally:
+                plt.close('all')
+        samples.append(timer.stages)
+
+    medians = {stage: statistics.median(sample[stage] for sample in samples) for stage in samples[0]}
+    spreads = {stage: max(s[stage] for s in samples) - min(s[stage] for s in samples) for stage in samples[0]}
+    return medians, spreads
+
+
+def calibrate(repeats: int = CALIBRATION_REPEATS) -> float:
+    """Медиана времени эталонной нагрузки в секундах: сортировка numpy, цикл Python и отрисовка Agg.
+
+    Отношение калибровок текущего запуска и базовых замеров переносит базовые
+    времена на текущую скорость машины.
+    """
+    data = np.random.default_rng(0).random(1_000_000)
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        np.sort(data)
+        sum(i * i for i in range(300_000))
+        fig, ax = plt.subplots()
+        ax.scatter(data[:20000], data[20000:40000], s=1)
+        fig.canvas.draw()
+        plt.close(fig)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def environment() -> dict:
+    """Сведения об окружении, от которого зависят абсолютные значения замеров"""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine()
+    }
+
+
+def noise_floor(spread: float, baseline_spread: Optional[float], scale: float) -> float:
+    """Разница времени этапа, которую ещё можно объяснить разбросом повторов текущего и базового запусков"""
+    spreads = [spread] if baseline_spread is None else [spread, baseline_spread * scale]
+    return max(NOISE_SPREADS * max(spreads), MIN_REGRESSION)
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float, scale: float = 1.0) -> list[str]:
+    """Этапы, замедлившиеся больше допустимого и больше порога шума относительно базовых замеров, умноженных на scale"""
+    regressions = []
+    for name, sizes in report['results'].items():
+        for size, stages in sizes.items():
+            for stage, elapsed in stages.items():
+                reference = baseline['results'].get(name, {}).get(size, {}).get(stage)
+                if reference is None:
+                    continue
+                reference *= scale
+                floor = noise_floor(
+                    report['spread'][name][size][stage],
+                    baseline.get('spread', {}).get(name, {}).get(size, {}).get(stage),
+                    scale
+                )
+                if elapsed > reference * (1 + tolerance) and elapsed - reference > floor:
+                    regressions.append(f"{name}[{size}].{stage}: {reference:.4f} с -> {elapsed:.4f} с (порог шума {floor:.4f} с)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Замеры скриптов визуализации на синтетических данных в форме C# сервисов',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('benchmarks', nargs='*', help=f'Имена замеров из {", ".join(BENCHMARKS)}; по умолчанию все')
+    parser.add_argument('-s', '--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='Количество элементов или точек во входных данных')
+    parser.add_argument('-n', '--repeats', type=int, default=5, help='Количество повторов каждого замера (берётся медиана)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Каталог сгенерированных входных файлов')
+    parser.add_argument('-o', '--output', help='JSON файл для результатов замеров')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE,
+                        help='JSON файл базовых замеров; записывается отдельно на каждой машине')
+    parser.add_argument('--write-baseline', action='store_true',
+                        help='Записать результаты как базовые замеры этой машины')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Допустимое относительное замедление этапа')
+    args = parser.parse_args()
+
+    results, spread = {}, {}
+    try:
+        calibration = calibrate()
+        print(f"Калибровка: {calibration:.3f} с")
+        unknown = set(args.benchmarks) - set(BENCHMARKS)
+        if unknown:
+            raise ValueError(f"Неизвестные замеры: {', '.join(sorted(unknown))}")
+
+        for name in args.benchmarks or BENCHMARKS:
+            for size in args.sizes:
+                stages, spreads = run_benchmark(name, size, args.repeats, args.data_dir)
+                results.setdefault(name, {})[str(size)] = stages
+                spread.setdefault(name, {})[str(size)] = spreads
+                print(f"{name:<14}{size:>9}  " + '  '.join(f"{stage} {elapsed:.3f} с" for stage, elapsed in stages.items()))
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
+
+    report = {
+        'environment': environment(), 'calibration': calibration, 'repeats': args.repeats,
+        'results': results, 'spread': spread
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.write_baseline:
+        # Замеры, не входившие в запуск, сохраняются из прежнего файла
+        if args.baseline.exists():
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+            for key in ('results', 'spread'):
+                merged = previous.get(key, {})
+                for name, sizes in report[key].items():
+                    merged.setdefault(name, {}).update(sizes)
+                report[key] = merged
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\nБазовые замеры записаны в {args.baseline}")
+    elif args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != report['environment']:
+            print("\nБазовые замеры записаны в другом окружении; перезапишите их на этой машине (--write-baseline)")
+
+        # Базовые времена переносятся на текущую скорость машины по отношению калибровок
+        scale = calibration / baseline['calibration'] if baseline.get('calibration') else 1.0
+        regressions = find_regressions(report, baseline, args.tolerance, scale)
+        if regressions:
+            print(f"\nЗамедление относительно базовых замеров (масштаб калибровки {scale:.2f}):\n" + '\n'.join(regressions))
+            exit(1)
+        print("\nРегрессий относительно базовых замеров нет")
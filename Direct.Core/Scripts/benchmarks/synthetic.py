@@ -0,0 +1,265 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# Расчётная область синтетических данных
+DOMAIN = ((-5.0, 5.0), (-5.0, 5.0), (-10.0, 0.0))
+
+# Высота плоскости сенсоров над областью
+SENSORS_Z = 1.0
+
+# Пары локальных узлов рёбер КЭ в порядке C#: 4 ребра вдоль X, 4 вдоль Y, 4 вдоль Z.
+# Локальный узел c имеет смещения (c & 1, (c >> 1) & 1, (c >> 2) & 1)
+LOCAL_EDGES = ((0, 1), (2, 3), (4, 5), (6, 7),
+               (0, 2), (1, 3), (4, 6), (5, 7),
+               (0, 4), (1, 5), (2, 6), (3, 7))
+
+# Количество элементов, записываемых за один вызов write при генерации mesh_data.json
+_WRITE_BATCH = 256
+
+
+def grid_shape(count: int) -> tuple[int, int, int]:
+    """Размеры прямоугольной сетки nx x ny x nz с количеством ячеек не меньше count"""
+    n = max(1, round(count ** (1 / 3)))
+    return n, n, max(1, math.ceil(count / (n * n)))
+
+
+def plane_shape(count: int) -> tuple[int, int]:
+    """Размеры плоской сетки точек с количеством точек не меньше count"""
+    n = max(2, math.isqrt(max(count - 1, 0)) + 1)
+    return n, max(2, math.ceil(count / n))
+
+
+def _axes(shape) -> list[np.ndarray]:
+    return [np.linspace(low, high, n + 1) for (low, high), n in zip(DOMAIN, shape)]
+
+
+def box_bounds(count: int) -> np.ndarray:
+    """(M, 2, 3) границы ячеек равномерной сетки из не менее чем count элементов"""
+    xs, ys, zs = _axes(grid_shape(count))
+    k, j, i = np.meshgrid(np.arange(len(zs) - 1), np.arange(len(ys) - 1), np.arange(len(xs) - 1), indexing='ij')
+    low = np.column_stack((xs[i.ravel()], ys[j.ravel()], zs[k.ravel()]))
+    high = np.column_stack((xs[i.ravel() + 1], ys[j.ravel() + 1], zs[k.ravel() + 1]))
+    return np.stack((low, high), axis=1)
+
+
+def dipole_field(points: np.ndarray) -> np.ndarray:
+    """(N, 3) поле точечного диполя в центре области, имитирующее аномалию"""
+    center = np.array([np.mean(bounds) for bounds in DOMAIN])
+    r = points - center
+    distance = np.linalg.norm(r, axis=1, keepdims=True) + 1e-9
+    moment = np.array([0.0, 0.0, 1.0])
+    return (3 * r * (r @ moment)[:, None] / distance ** 2 - moment) / distance ** 3
+
+
+def _net_number(value: float) -> str:
+    """Запись double так, как её выводит Newtonsoft.Json"""
+    text = repr(float(value))
+    return text.replace('e', 'E') if 'e' in text else text
+
+
+def _system_number(value: float) -> str:
+    """Запись double так, как её выводит System.Text.Json: целые значения без дробной части"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value).replace('e', 'E')
+
+
+def _culture_number(value: float) -> str:
+    """Запись double через ToString() в русской культуре: запятая и без '.0' у целых"""
+    return _system_number(value).replace('.', ',')
+
+
+def write_mesh_data(file_path: str, count: int, rng: np.random.Generator):
+    """mesh_data.json в форме PlotService: Formatting.Indented, элементы и сенсоры.
+
+    Документ пишется потоково, поэтому генерация крупных сеток не держит
+    весь текст в памяти.
+    """
+    nx, ny, nz = grid_shape(count)
+    bounds = box_bounds(count)
+    offsets = np.array([(c & 1, (c >> 1) & 1, (c >> 2) & 1) for c in range(8)])
+
+    # Глобальные номера узлов и рёбер по индексам ячеек сетки
+    cells = np.indices((nz, ny, nx)).reshape(3, -1).T[:, ::-1]
+    corner = cells[:, None, :] + offsets[None, :, :]
+    node_ids = (corner[..., 2] * (ny + 1) + corner[..., 1]) * (nx + 1) + corner[..., 0]
+    pairs = np.sort(node_ids[:, LOCAL_EDGES], axis=2).reshape(-1, 2)
+    _, edge_ids = np.unique(pairs, axis=0, return_inverse=True)
+    edge_ids = edge_ids.reshape(len(bounds), len(LOCAL_EDGES))
+    mu = rng.uniform(1.0, 5.0, len(bounds))
+
+    def node_text(node_id, x, y, z):
+        return ('            {\n'
+                f'              "NodeIndex": {node_id},\n'
+                '              "Coordinate": {\n'
+                f'                "X": {x},\n'
+                f'                "Y": {y},\n'
+                f'                "Z": {z}\n'
+                '              }\n'
+                '            }')
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('{\n  "Elements": [\n')
+        batch = []
+        for element in range(len(bounds)):
+            low, high = bounds[element]
+            volume = float(np.prod(high - low))
+            coords = [[_net_number((low, high)[o][axis]) for axis, o in enumerate(offset)] for offset in offsets]
+            edges = []
+            for local, (a, b) in enumerate(LOCAL_EDGES):
+                nodes = ',\n'.join(node_text(node_ids[element, n], *coords[n]) for n in (a, b))
+                edges.append('        {\n'
+                             f'          "EdgeIndex": {edge_ids[element, local]},\n'
+                             f'          "Nodes": [\n{nodes}\n          ]\n'
+                             '        }')
+            batch.append('    {\n'
+                         f'      "Edges": [\n' + ',\n'.join(edges) + '\n      ],\n'
+                         f'      "Mu": {_net_number(mu[element])},\n'
+                         f'      "Volume": {_net_number(volume)}\n'
+                         '    }')
+            if len(batch) == _WRITE_BATCH or element == len(bounds) - 1:
+                f.write(('' if element < _WRITE_BATCH else ',\n') + ',\n'.join(batch))
+                batch = []
+
+        f.write('\n  ],\n  "sensors": [\n')
+        xs, ys, _ = _axes((nx, ny, nz))
+        sensors = [('    {\n'
+                    '      "Position": {\n'
+                    f'        "X": {_net_number(x)},\n'
+                    f'        "Y": {_net_number(y)},\n'
+                    f'        "Z": {_net_number(SENSORS_Z)}\n'
+                    '      },\n'
+                    f'      "ComponentDirection": "{("Bx", "By", "Bz")[index % 3]}"\n'
+                    '    }')
+                   for index, (x, y) in enumerate((x, y) for x in xs for y in ys)]
+        f.write(',\n'.join(sensors))
+        f.write('\n  ]\n}')
+
+
+def write_field_data(file_path: str, count: int, rng: np.random.Generator):
+    """field_data.json в форме Startup/GaussNewton: список FieldSample с отступами System.Text.Json"""
+    nx, ny = plane_shape(count)
+    (x0, x1), (y0, y1), _ = DOMAIN
+    x, y = np.meshgrid(np.linspace(x0, x1, nx), np.linspace(y0, y1, ny))
+    points = np.column_stack((x.ravel(), y.ravel(), np.full(x.size, SENSORS_Z)))
+    field = dipole_field(points) * (1 + 0.01 * rng.standard_normal((len(points), 1)))
+    magnitude = np.linalg.norm(field, axis=1)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        f.write(',\n'.join(
+            '  {\n'
+            f'    "X": {_system_number(p[0])},\n'
+            f'    "Y": {_system_number(p[1])},\n'
+            f'    "Z": {_system_number(p[2])},\n'
+            f'    "Bx": {_system_number(b[0])},\n'
+            f'    "By": {_system_number(b[1])},\n'
+            f'    "Bz": {_system_number(b[2])},\n'
+            f'    "Magnitude": {_system_number(m)}\n'
+            '  }'
+            for p, b, m in zip(points, field, magnitude)
+        ))
+        f.write('\n]')
+
+
+def write_bfield(file_path: str, count: int, rng: np.random.Generator):
+    """bfield_3d.json: точки объёма со значениями индукции"""
+    points = np.column_stack([rng.uniform(low, high, count) for low, high in DOMAIN])
+    field = dipole_field(points)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump([
+            {'x': p[0], 'y': p[1], 'z': p[2], 'bx': b[0], 'by': b[1], 'bz': b[2]}
+            for p, b in zip(points.tolist(), field.tolist())
+        ], f, indent=2)
+
+
+def write_solution(file_path: str, count: int, rng: np.random.Generator):
+    """solution.json: значения решения в центрах рёбер с направлением ребра"""
+    nx, ny, nz = grid_shape(max(1, count // 3))
+    xs, ys, zs = _axes((nx, ny, nz))
+    entries = []
+    for axis, direction in enumerate(np.eye(3)):
+        # Центры рёбер вдоль оси axis: по этой оси берутся середины отрезков
+        axes = [xs, ys, zs]
+        axes[axis] = (axes[axis][:-1] + axes[axis][1:]) / 2
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        values = dipole_field(grid)[:, axis]
+        entries.extend(
+            {'x': p[0], 'y': p[1], 'z': p[2], 'dx': direction[0], 'dy': direction[1], 'dz': direction[2], 'value': v}
+            for p, v in zip(grid.tolist(), values.tolist())
+        )
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(entries[:count], f, indent=2)
+
+
+def write_inverse(file_path: str, count: int, rng: np.random.Generator):
+    """inverse.json: ячейки обратной задачи в виде центров, полуразмеров и плотности"""
+    bounds = box_bounds(count)
+    centers = bounds.mean(axis=1)
+    halves = (bounds[:, 1] - bounds[:, 0]) / 2
+    density = np.exp(-np.sum((centers - centers.mean(axis=0)) ** 2, axis=1) / 8) + 0.05 * rng.random(len(bounds))
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump({'Elements': [
+            {'CenterX': c[0], 'CenterY': c[1], 'CenterZ': c[2],
+             'BoundX': h[0], 'BoundY': h[1], 'BoundZ': h[2], 'Density': d}
+            for c, h, d in zip(centers.tolist(), halves.tolist(), density.tolist())
+        ]}, f, indent=2)
+
+
+def write_units(file_path: str, count: int, rng: np.random.Generator):
+    """output.txt в форме VisualizerService: количество и строки 'x0 x1 y0 y1 z0 z1 ' с запятой"""
+    bounds = box_bounds(count)
+    with open(file_path, 'w', encoding='utf-8', newline='\r\n') as f:
+        f.write(f'{len(bounds)}\n')
+        for low, high in bounds:
+            f.write(''.join(f'{_culture_number(v)} ' for pair in zip(low, high) for v in pair) + '\n')
+
+
+def write_strata(file_path: str, count: int, rng: np.random.Generator):
+    """Документ mesh_chart.py: область, слои с плотностью и плоскость проекции"""
+    (x0, x1), (y0, y1), (z0, z1) = DOMAIN
+    nx, ny = plane_shape(count)
+    xs, ys = np.linspace(x0, x1, nx + 1), np.linspace(y0, y1, ny + 1)
+    strata = [
+        {'StartX': xs[i], 'EndX': xs[i + 1], 'StartY': ys[j], 'EndY': ys[j + 1], 'StartZ': z0, 'EndZ': z1,
+         'Density': float(rng.uniform(1, 5)), 'IsActive': bool(rng.random() > 0.2)}
+        for j in range(ny) for i in range(nx)
+    ][:count]
+    document = {
+        'domain': {'StartX': x0, 'EndX': x1, 'StartY': y0, 'EndY': y1, 'StartZ': z0, 'EndZ': z1,
+                   'SplitsXCount': 10, 'SplitsYCount': 10},
+        'strata': strata,
+        'projection': 'XY'
+    }
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+
+
+# Имя входного файла -> генератор
+GENERATORS = {
+    'mesh_data.json': write_mesh_data,
+    'field_data.json': write_field_data,
+    'bfield_3d.json': write_bfield,
+    'solution.json': write_solution,
+    'inverse.json': write_inverse,
+    'output.txt': write_units,
+    'strata.json': write_strata
+}
+
+
+def ensure_input(directory: str, file_name: str, count: int, seed: int = 0) -> str:
+    """Путь к синтетическому входному файлу размера count, созданному при необходимости.
+
+    Файлы складываются в подкаталог по размеру и переиспользуются между
+    запусками, так как генерация крупных mesh_data.json занимает минуты.
+    """
+    target_dir = os.path.join(directory, str(count))
+    file_path = os.path.join(target_dir, file_name)
+    if not os.path.exists(file_path):
+        os.makedirs(target_dir, exist_ok=True)
+        partial = file_path + '.partial'
+        GENERATORS[file_name](partial, count, np.random.default_rng(seed))
+        os.replace(partial, file_path)
+    return file_path
@@ -0,0 +1,208 @@
+import argparse
+import json
+
+import numpy as np
+
+from box_index import BoxIndex
+from mesh_model import AXIS_INDEX, MeshModel
+
+# Количество точек, для которых поле считается за один проход
+EVALUATE_CHUNK = 1 << 18
+
+# Относительный допуск совпадения центров рёбер solution.json и сетки
+CENTER_TOLERANCE = 1e-6
+
+# Знаки производных иерархических функций (Minus: -1, Plus: +1) для четырёх рёбер
+# каждого направления в локальном порядке C#: (первая поперечная ось, вторая поперечная ось)
+_EDGE_SIGNS = np.array([[-1, -1], [1, -1], [-1, 1], [1, 1]], dtype=np.float64)
+
+
+def load_solution(file_path: str, mesh: MeshModel) -> np.ndarray:
+    """(E,) коэффициенты решения для уникальных рёбер сетки.
+
+    Принимает массив чисел, индексируемый EdgeIndex, или экспорт
+    SolutionExportService.ExportToJson (центр, направление и значение ребра),
+    записи которого сопоставляются рёбрам сетки по центру и оси направления.
+    """
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        data = json.load(f)
+    if not data:
+        raise ValueError(f"Файл {file_path} не содержит решения")
+
+    if not isinstance(data[0], dict):
+        values = np.asarray(data, dtype=np.float64)
+        if mesh.edge_index.max() >= len(values):
+            raise ValueError(f"Решение содержит {len(values)} значений, а сетка -- ребро {mesh.edge_index.max()}")
+        return values[mesh.edge_index]
+
+    centers = np.array([[d["x"], d["y"], d["z"]] for d in data], dtype=np.float64).reshape(-1, 3)
+    directions = np.array([[d["dx"], d["dy"], d["dz"]] for d in data], dtype=np.float64).reshape(-1, 3)
+    values = np.array([d["value"] for d in data], dtype=np.float64)
+    start, end = mesh.nodes[mesh.edge_nodes[:, 0]], mesh.nodes[mesh.edge_nodes[:, 1]]
+
+    # Ключ ребра -- центр, округлённый до допуска, и ось преобладающего направления
+    low, high = mesh.bounds()
+    step = CENTER_TOLERANCE * max(float(np.max(high - low)), 1.0)
+    keys = np.column_stack((
+        np.round(np.concatenate(((start + end) / 2, centers)) / step).astype(np.int64),
+        np.concatenate((np.abs(end - start).argmax(axis=1), np.abs(directions).argmax(axis=1)))
+    ))
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    edge_keys, entry_keys = inverse[:mesh.edges_count], inverse[mesh.edges_count:]
+
+    repeated = len(entry_keys) - len(np.unique(entry_keys))
+    if repeated:
+        raise ValueError(f"Файл {file_path} содержит {repeated} повторных записей одних и тех же рёбер")
+
+    coefficients = np.full(inverse.max() + 1, np.nan)
+    coefficients[entry_keys] = values
+    result = coefficients[edge_keys]
+    missing = np.count_nonzero(np.isnan(result))
+    if missing:
+        raise ValueError(f"Для {missing} рёбер сетки нет значений в {file_path}")
+    return result
+
+
+class FieldEvaluator:
+    """Вычисление B = rot(A) / Mu в произвольных точках по решению на рёбрах.
+
+    Повторяет SensorEvaluator.EvaluateFullBAtPoint: точка относится к первому
+    содержащему её элементу, вне сетки поле равно нулю, Mu <= 0 заменяется
+    единицей. Базисные функции ребра -- произведения линейных иерархических
+    функций, поэтому ротор вычисляется аналитически и совпадает с конечными
+    разностями BasisFunctionProvider.GetCurl, включая знак его формулы
+    (rot_x = dFy/dz - dFz/dy и далее циклически).
+    """
+
+    def __init__(self, mesh: MeshModel, coefficients: np.ndarray):
+        if mesh.element_edges.shape[1] != 12:
+            raise ValueError("Вычисление поля поддерживает только параллелепипеды с 12 рёбрами")
+        self.mesh = mesh
+        self.low, self.high = mesh.element_bounds[:, 0], mesh.element_bounds[:, 1]
+        self.index = BoxIndex(self.low, self.high)
+        self.element_coefficients = np.asarray(coefficients, dtype=np.float64)[mesh.element_edges]
+        self.mu = np.where(mesh.mu > 0, mesh.mu, 1.0)
+
+    def evaluate(self, points: np.ndarray) -> np.ndarray:
+        """(P, 3) точки -> (P, 3) вектор B"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        result = np.zeros_like(points)
+        for start in range(0, len(points), EVALUATE_CHUNK):
+            chunk = points[start:start + EVALUATE_CHUNK]
+            result[start:start + len(chunk)] = self._evaluate_chunk(chunk)
+        return result
+
+    def _evaluate_chunk(self, points: np.ndarray) -> np.ndarray:
+        result = np.zeros_like(points)
+        elements = self.index.locate(points)
+        inside = np.flatnonzero(elements >= 0)
+        if not len(inside):
+            return result
+
+        elements = elements[inside]
+        low, high = self.low[elements], self.high[elements]
+        size = high - low
+        # Иерархические функции Minus и Plus по каждой оси и их производные
+        plus = (points[inside] - low) / size
+        minus = 1.0 - plus
+        inverse_size = 1.0 / size
+        coefficients = self.element_coefficients[elements]
+
+        def directional(direction: int) -> tuple[np.ndarray, np.ndarray]:
+            """Производные базисных функций рёбер направления direction по двум поперечным осям, взвешенные A"""
+            u, v = (axis for axis in range(3) if axis != direction)
+            weights = coefficients[:, direction * 4:direction * 4 + 4]
+            value_u = np.where(_EDGE_SIGNS[:, 0] > 0, plus[:, u, None], minus[:, u, None])
+            value_v = np.where(_EDGE_SIGNS[:, 1] > 0, plus[:, v, None], minus[:, v, None])
+            d_u = (weights * _EDGE_SIGNS[:, 0] * value_v).sum(axis=1) * inverse_size[:, u]
+            d_v = (weights * value_u * _EDGE_SIGNS[:, 1]).sum(axis=1) * inverse_size[:, v]
+            return d_u, d_v
+
+        # Рёбра вдоль X: Fx(y, z) -> rot_y = -dFx/dz, rot_z = dFx/dy
+        d_y, d_z = directional(0)
+        b = np.column_stack((np.zeros(len(inside)), -d_z, d_y))
+        # Рёбра вдоль Y: Fy(x, z) -> rot_x = dFy/dz, rot_z = -dFy/dx
+        d_x, d_z = directional(1)
+        b[:, 0] += d_z
+        b[:, 2] -= d_x
+        # Рёбра вдоль Z: Fz(x, y) -> rot_x = -dFz/dy, rot_y = dFz/dx
+        d_x, d_y = directional(2)
+        b[:, 0] -= d_y
+        b[:, 1] += d_x
+
+        result[inside] = b / self.mu[elements, None]
+        return result
+
+
+def slice_points(mesh: MeshModel, axis: str, position: float, resolution: int) -> np.ndarray:
+    """(resolution^2, 3) узлы регулярной сетки в плоскости axis = position по границам сетки"""
+    low, high = mesh.bounds()
+    u, v = (index for index in range(3) if index != AXIS_INDEX[axis])
+    grid_u, grid_v = np.meshgrid(np.linspace(low[u], high[u], resolution), np.linspace(low[v], high[v], resolution))
+    points = np.empty((grid_u.size, 3))
+    points[:, AXIS_INDEX[axis]] = position
+    points[:, u], points[:, v] = grid_u.ravel(), grid_v.ravel()
+    return points
+
+
+def profile_points(start: np.ndarray, end: np.ndarray, count: int) -> np.ndarray:
+    """(count, 3) равномерно расположенные точки отрезка от start до end"""
+    return np.linspace(np.asarray(start, dtype=float), np.asarray(end, dtype=float), count)
+
+
+def save_field(file_path: str, points: np.ndarray, field: np.ndarray):
+    """Запись в формате bfield_3d.json или в .vtu для ParaView"""
+    if file_path.lower().endswith('.vtu'):
+        from vtk_export import write_vtu
+
+        write_vtu(file_path, points, point_data={'B': field, '|B|': np.linalg.norm(field, axis=1)})
+        return
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump([
+            {'x': p[0], 'y': p[1], 'z': p[2], 'bx': b[0], 'by': b[1], 'bz': b[2]}
+            for p, b in zip(points.tolist(), field.tolist())
+        ], f)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Поле B в произвольных точках по сетке mesh_data.json и решению на рёбрах',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-m', '--mesh', default='mesh_data.json', help='Сетка КЭ')
+    parser.add_argument('-s', '--solution', default='solution.json', help='Решение на рёбрах')
+    parser.add_argument('--slice', nargs=2, metavar=('AXIS', 'POSITION'), help='Плоское сечение, например Z -9')
+    parser.add_argument('--profile', nargs=6, type=float, metavar=('X0', 'Y0', 'Z0', 'X1', 'Y1', 'Z1'),
+                        help='Профиль по отрезку')
+    parser.add_argument('--points', help='JSON файл точек в формате bfield_3d.json (используются x, y, z)')
+    parser.add_argument('-n', '--resolution', type=int, default=200,
+                        help='Узлов сечения по каждой оси или точек профиля')
+    parser.add_argument('-o', '--output', default='bfield_3d.json', help='Результат: .json (bfield_3d) или .vtu')
+    args = parser.parse_args()
+
+    try:
+        from mesh_stream import read_mesh_stream
+
+        if sum(option is not None for option in (args.slice, args.profile, args.points)) != 1:
+            raise ValueError("Нужно задать ровно одно из --slice, --profile, --points")
+
+        mesh, _, _ = read_mesh_stream(args.mesh)
+        if args.slice:
+            axis = args.slice[0].upper()
+            if axis not in AXIS_INDEX:
+                raise ValueError(f"Неизвестная ось {args.slice[0]}")
+            points = slice_points(mesh, axis, float(args.slice[1]), args.resolution)
+        elif args.profile:
+            points = profile_points(args.profile[:3], args.profile[3:], args.resolution)
+        else:
+            with open(args.points, 'r') as f:
+                points = np.array([[d["x"], d["y"], d["z"]] for d in json.load(f)], dtype=float).reshape(-1, 3)
+
+        evaluator = FieldEvaluator(mesh, load_solution(args.solution, mesh))
+        save_field(args.output, points, evaluator.evaluate(points))
+        print(f"Поле в {len(points)} точках сохранено в {args.output}")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -0,0 +1,153 @@
+import numpy as np
+
+# Допуск принадлежности точки элементу, как в FiniteElement.Contains
+CONTAINS_EPSILON = 1e-8
+
+# Предельное среднее число ячеек индекса на один параллелепипед
+MAX_BINS_PER_BOX = 4
+
+# Количество точек, обрабатываемых за один проход, ограничивает размер временных массивов
+QUERY_CHUNK = 1 << 18
+
+
+def _expand(starts: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Номер отрезка и значение для каждого целого из отрезков [start, start + count)"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    values = starts[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, values
+
+
+def _axis_edges(low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """Границы корзин вдоль оси -- все различные границы параллелепипедов"""
+    edges = np.unique(np.concatenate((low, high)))
+    return edges if len(edges) > 1 else np.repeat(edges, 2)
+
+
+class BoxIndex:
+    """Прямоугольная сетка корзин над параллелепипедами, выровненными по осям.
+
+    Линии сетки проходят по границам параллелепипедов, поэтому сетка сгущается
+    там, где сгущены ячейки (например, после дробления MeshRefinerService), а
+    для тензорной сетки каждая корзина совпадает ровно с одним элементом.
+    Если корзин больше MAX_BINS_PER_BOX на параллелепипед, через одну
+    удаляются линии вдоль оси с наибольшим числом корзин.
+
+    Параллелепипед записывается во все корзины, которые пересекает его
+    внутренность; допуск epsilon учитывается при запросе расширением
+    запрашиваемой области. Корзина запроса находится двоичным поиском по
+    границам, а содержимое корзин хранится в сжатом виде (CSR): номера
+    параллелепипедов отсортированы по корзине, а внутри корзины -- по
+    возрастанию номера, поэтому первый найденный параллелепипед совпадает с
+    первым в исходном порядке, как у FirstOrDefault в C#.
+
+    low, high -- (M, 3) нижние и верхние углы параллелепипедов
+    """
+
+    def __init__(self, low: np.ndarray, high: np.ndarray, epsilon: float = CONTAINS_EPSILON):
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.epsilon = epsilon
+        if not len(self.low):
+            raise ValueError("Индекс строится по пустому набору параллелепипедов")
+
+        edges = [_axis_edges(self.low[:, axis], self.high[:, axis]) for axis in range(3)]
+        limit = MAX_BINS_PER_BOX * len(self.low)
+        while np.prod([len(axis_edges) - 1 for axis_edges in edges], dtype=np.float64) > limit:
+            axis = int(np.argmax([len(axis_edges) for axis_edges in edges]))
+            edges[axis] = np.append(edges[axis][:-1:2], edges[axis][-1])
+        self.edges = edges
+        self.shape = np.array([len(axis_edges) - 1 for axis_edges in edges], dtype=np.int64)
+
+        # Корзины, пересекающие внутренность параллелепипеда; вырожденный занимает одну корзину
+        first = np.column_stack([
+            np.searchsorted(edges[axis], self.low[:, axis], side='right') - 1 for axis in range(3)
+        ])
+        last = np.column_stack([
+            np.searchsorted(edges[axis], self.high[:, axis], side='left') - 1 for axis in range(3)
+        ])
+        first = np.clip(first, 0, self.shape - 1)
+        last = np.maximum(np.clip(last, 0, self.shape - 1), first)
+
+        owner, cells = self._cells(first, last)
+        order = np.argsort(cells, kind='stable')
+        self.boxes = owner[order]
+        self.offsets = np.searchsorted(cells[order], np.arange(np.prod(self.shape) + 1))
+
+    def __len__(self) -> int:
+        return len(self.low)
+
+    def _cells(self, first: np.ndarray, last: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Номер блока и плоский номер корзины для каждой корзины блоков [first, last]"""
+        spans = last - first + 1
+        owner, local = _expand(np.zeros(len(spans), dtype=np.int64), np.prod(spans, axis=1))
+
+        # Локальный номер корзины внутри блока раскладывается по осям
+        spans = spans[owner]
+        k = local % spans[:, 2]
+        j = local // spans[:, 2] % spans[:, 1]
+        i = local // (spans[:, 1] * spans[:, 2])
+        cells = first[owner] + np.column_stack((i, j, k))
+        return owner, (cells[:, 0] * self.shape[1] + cells[:, 1]) * self.shape[2] + cells[:, 2]
+
+    def _candidates(self, low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Пары (номер запроса, номер параллелепипеда) из корзин, задевающих области [low - eps, high + eps].
+
+        Каждая корзина находится двоичным поиском, поэтому стоимость запроса
+        пропорциональна числу корзин и записей в них, а не размеру сетки.
+        """
+        low, high = low - self.epsilon, high + self.epsilon
+        # Первая корзина -- та, чья верхняя граница не меньше low; последняя -- чья нижняя не больше high
+        first = np.column_stack([
+            np.searchsorted(self.edges[axis], low[:, axis], side='left') - 1 for axis in range(3)
+        ])
+        last = np.column_stack([
+            np.searchsorted(self.edges[axis], high[:, axis], side='right') - 1 for axis in range(3)
+        ])
+        lower = np.array([axis_edges[0] for axis_edges in self.edges])
+        upper = np.array([axis_edges[-1] for axis_edges in self.edges])
+        inside = np.flatnonzero(((high >= lower) & (low <= upper)).all(axis=1))
+        if not len(inside):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        first = np.clip(first[inside], 0, self.shape - 1)
+        last = np.clip(last[inside], 0, self.shape - 1)
+        block, cells = self._cells(first, last)
+        starts, counts = self.offsets[cells], self.offsets[cells + 1] - self.offsets[cells]
+        owner, slots = _expand(starts, counts)
+        return inside[block[owner]], self.boxes[slots]
+
+    def locate(self, points: np.ndarray) -> np.ndarray:
+        """(P,) номер первого параллелепипеда, содержащего каждую точку, -1 вне всех"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        result = np.full(len(points), -1, dtype=np.int64)
+        for start in range(0, len(points), QUERY_CHUNK):
+            chunk = points[start:start + QUERY_CHUNK]
+            result[start:start + len(chunk)] = self._locate_chunk(chunk)
+        return result
+
+    def _locate_chunk(self, points: np.ndarray) -> np.ndarray:
+        result = np.full(len(points), -1, dtype=np.int64)
+        owner, candidates = self._candidates(points, points)
+        query = points[owner]
+        hit = ((query >= self.low[candidates] - self.epsilon) & (query <= self.high[candidates] + self.epsilon)).all(axis=1)
+
+        # Точка у границы корзин проверяется в нескольких корзинах, поэтому берётся наименьший номер
+        owner, candidates = owner[hit], candidates[hit]
+        order = np.lexsort((candidates, owner))
+        owners, first = np.unique(owner[order], return_index=True)
+        result[owners] = candidates[order][first]
+        return result
+
+    def query_box(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Возрастающие номера параллелепипедов, пересекающих область [low, high] с допуском epsilon"""
+        low = np.asarray(low, dtype=np.float64).reshape(1, 3)
+        high = np.asarray(high, dtype=np.float64).reshape(1, 3)
+        _, candidates = self._candidates(low, high)
+        hit = ((self.low[candidates] <= high + self.epsilon) & (self.high[candidates] >= low - self.epsilon)).all(axis=1)
+        return np.unique(candidates[hit])
+
+    def query_plane(self, axis: int, position: float) -> np.ndarray:
+        """Возрастающие номера параллелепипедов, пересекающих плоскость coord[axis] = position"""
+        low, high = np.full(3, -np.inf), np.full(3, np.inf)
+        low[axis] = high[axis] = position
+        return self.query_box(low, high)
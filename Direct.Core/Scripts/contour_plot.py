@@ -1,104 +1,188 @@
-﻿import json
+﻿import argparse
+import json
+import math
+
+import plot_profiler
+from field_interpolation import DEFAULT_RESOLUTION, WeightsCache
+from plot_backend import configure_backend, show_or_save
+
+configure_backend()
 
 import matplotlib.pyplot as plt
-import matplotlib.tri as tri
 import numpy as np
 
+# Относительная точность, с которой координаты сенсоров считаются одной линией решётки
+GRID_TOLERANCE = 1e-9
+
+# Компоненты поля, переносимые на сетку
+FIELD_COMPONENTS = ('mag', 'bx', 'by')
+
+# Количество стрелок векторного поля вдоль большей стороны сетки (шаг 6 на сетке 100x100)
+QUIVER_ARROWS = 17
+
+
 # Загрузка данных
-with open("field_data.json", "r") as f:
-    data = json.load(f)
-
-# Извлекаем данные
-x = np.array([p["X"] for p in data])
-y = np.array([p["Y"] for p in data])
-bx = np.array([p["Bx"] for p in data])
-by = np.array([p["By"] for p in data])
-b_magnitude = np.array([p["Magnitude"] for p in data])
-
-# Триангуляция и интерполяция
-triang = tri.Triangulation(x, y)
-interpolators = {
-    'mag': tri.LinearTriInterpolator(triang, b_magnitude),
-    'bx': tri.LinearTriInterpolator(triang, bx),
-    'by': tri.LinearTriInterpolator(triang, by)
-}
-
-# Сетка
-xi = np.linspace(x.min(), x.max(), 100)
-yi = np.linspace(y.min(), y.max(), 100)
-Xi, Yi = np.meshgrid(xi, yi)
-
-# Интерполяция данных
-Zi = {key: interp(Xi, Yi) for key, interp in interpolators.items()}
-
-# Визуализация
-fig, axs = plt.subplots(2, 2, figsize=(14, 10), dpi=100)
-fig.suptitle("Анализ магнитного поля", fontsize=14, y=1.02)
-
-# Общие настройки для всех графиков
-plot_config = {
-    'mag': {'title': "Модуль поля (|B|)", 'cmap': 'viridis'},
-    'bx': {'title': "X-компонента (Bx)", 'cmap': 'coolwarm'},
-    'by': {'title': "Y-компонента (By)", 'cmap': 'coolwarm'}
-}
-
-# Графики плотности
-for idx, (key, ax) in enumerate(zip(plot_config, axs.flatten()[:3])):
-    cf = ax.contourf(Xi, Yi, Zi[key], levels=25,
-                     cmap=plot_config[key]['cmap'], alpha=1)
-    fig.colorbar(cf, ax=ax, label='', shrink=1)
-    ax.set_title(plot_config[key]['title'], fontsize=10)
-    ax.set(xlabel='X [м]', ylabel='Y [м]', aspect='equal')
-
-# Настройки только для векторного поля
-ax = axs[1, 1]
-step = 6  # Уменьшаем шаг для большего количества стрелок
-
-# Выборка данных
-skip = (slice(None, None, step), slice(None, None, step))
-U = Zi['bx'][skip]
-V = Zi['by'][skip]
-X_quiv = Xi[skip]
-Y_quiv = Yi[skip]
-M = np.hypot(U, V)
-
-# Явное задание размеров (важно!)
-min_arrow_size = 0.2  # Минимальный размер стрелки в метрах
-max_arrow_size = 1   # Максимальный размер стрелки
-arrow_scale = max_arrow_size / np.max(M)  # Масштабирующий коэффициент
-
-# Нормализация и масштабирование
-U_norm = U * arrow_scale
-V_norm = V * arrow_scale
-
-# Рисуем стрелки с фиксированным размером
-quiv = ax.quiver(
-    X_quiv, Y_quiv,
-    U_norm, V_norm, M,
-    angles='xy',
-    scale_units='xy',
-    scale=1.0,          # Отключаем авто-масштабирование
-    width=0.008,        # Толщина в 2 раза больше
-    headwidth=6,        # Гигантские головки
-    headlength=7,
-    headaxislength=5,
-    cmap='turbo',         # Яркая цветовая схема
-    edgecolor='black',  # Четкая обводка
-    linewidth=0.5,
-    alpha=0.95,
-    zorder=10           # Выводим поверх других элементов
-)
-
-# Настройка цветовой шкалы
-cbar = fig.colorbar(quiv, ax=ax, label='|B|')
-cbar.ax.tick_params(labelsize=8)
-
-# Фиксируем границы
-ax.set_xlim(x.min(), x.max())
-ax.set_ylim(y.min(), y.max())
-ax.set_aspect('equal')
-ax.set_title("Векторное поле: Bx и By")
-
-plt.tight_layout()
-plt.subplots_adjust(hspace=0.3, wspace=0.25)
-plt.show()
\ No newline at end of file
+def load_field_data(file_path):
+    with open(file_path, "r") as f:
+        data = json.load(f)
+
+    # Извлекаем данные
+    return {
+        'x': np.array([p["X"] for p in data]),
+        'y': np.array([p["Y"] for p in data]),
+        'bx': np.array([p["Bx"] for p in data]),
+        'by': np.array([p["By"] for p in data]),
+        'mag': np.array([p["Magnitude"] for p in data])
+    }
+
+
+# Номера линий решётки, к которым относятся координаты, и количество линий
+def _grid_levels(values):
+    order = np.argsort(values, kind='stable')
+    extent = np.ptp(values) or 1.0
+    breaks = np.diff(values[order]) > GRID_TOLERANCE * extent
+    sorted_levels = np.concatenate(([0], np.cumsum(breaks)))
+    levels = np.empty_like(sorted_levels)
+    levels[order] = sorted_levels
+    return levels, sorted_levels[-1] + 1
+
+
+# Индексы точек в виде (ny, nx) массива, если сенсоры образуют прямоугольную решётку,
+# иначе None. Шаг решётки может быть неравномерным, но каждый узел должен встречаться один раз
+def grid_layout(x, y):
+    if len(x) < 4:
+        return None
+
+    ix, nx = _grid_levels(x)
+    iy, ny = _grid_levels(y)
+    if nx < 2 or ny < 2 or nx * ny != len(x):
+        return None
+
+    cells = iy * nx + ix
+    order = np.argsort(cells, kind='stable')
+    if np.any(cells[order] != np.arange(len(x))):
+        return None
+    return order.reshape(ny, nx)
+
+
+# Интерполяция на регулярную сетку resolution x resolution
+def interpolate_field(field, resolution=DEFAULT_RESOLUTION):
+    x, y = field['x'], field['y']
+
+    # Сенсоры на решётке переносятся в двумерные массивы без триангуляции
+    layout = grid_layout(x, y)
+    plot_profiler.count('points', len(x))
+    if layout is not None:
+        with plot_profiler.stage('grid'):
+            Xi, Yi = x[layout], y[layout]
+            Zi = {key: field[key][layout] for key in FIELD_COMPONENTS}
+        return Xi, Yi, Zi
+
+    # Положение узлов сетки ищется один раз, веса применяются сразу ко всем компонентам.
+    # Для уже встречавшейся расстановки сенсоров веса берутся из дискового кэша
+    with plot_profiler.stage('triangulation'):
+        weights, cached = WeightsCache().get(x, y, resolution)
+    plot_profiler.count('grid_points', weights.weights.shape[1])
+    plot_profiler.count('weights_cached', cached)
+
+    with plot_profiler.stage('interpolation'):
+        values = weights.apply(np.column_stack([field[key] for key in FIELD_COMPONENTS]))
+    Xi, Yi = np.meshgrid(weights.xi, weights.yi)
+    Zi = {key: np.ma.masked_invalid(values[..., i]) for i, key in enumerate(FIELD_COMPONENTS)}
+    return Xi, Yi, Zi
+
+
+def plot_field(field, grid=None):
+    x, y = field['x'], field['y']
+    Xi, Yi, Zi = grid if grid is not None else interpolate_field(field)
+
+    # Визуализация
+    fig, axs = plt.subplots(2, 2, figsize=(14, 10), dpi=100)
+    fig.suptitle("Анализ магнитного поля", fontsize=14, y=1.02)
+
+    # Общие настройки для всех графиков
+    plot_config = {
+        'mag': {'title': "Модуль поля (|B|)", 'cmap': 'viridis'},
+        'bx': {'title': "X-компонента (Bx)", 'cmap': 'coolwarm'},
+        'by': {'title': "Y-компонента (By)", 'cmap': 'coolwarm'}
+    }
+
+    # Графики плотности
+    for idx, (key, ax) in enumerate(zip(plot_config, axs.flatten()[:3])):
+        cf = ax.contourf(Xi, Yi, Zi[key], levels=25,
+                         cmap=plot_config[key]['cmap'], alpha=1)
+        fig.colorbar(cf, ax=ax, label='', shrink=1)
+        ax.set_title(plot_config[key]['title'], fontsize=10)
+        ax.set(xlabel='X [м]', ylabel='Y [м]', aspect='equal')
+
+    # Настройки только для векторного поля
+    ax = axs[1, 1]
+    step = max(1, math.ceil(max(Xi.shape) / QUIVER_ARROWS))  # Шаг подбирается под размер сетки
+
+    # Выборка данных
+    skip = (slice(None, None, step), slice(None, None, step))
+    U = Zi['bx'][skip]
+    V = Zi['by'][skip]
+    X_quiv = Xi[skip]
+    Y_quiv = Yi[skip]
+    M = np.hypot(U, V)
+
+    # Явное задание размеров (важно!)
+    min_arrow_size = 0.2  # Минимальный размер стрелки в метрах
+    max_arrow_size = 1   # Максимальный размер стрелки
+    arrow_scale = max_arrow_size / np.max(M)  # Масштабирующий коэффициент
+
+    # Нормализация и масштабирование
+    U_norm = U * arrow_scale
+    V_norm = V * arrow_scale
+
+    # Рисуем стрелки с фиксированным размером
+    quiv = ax.quiver(
+        X_quiv, Y_quiv,
+        U_norm, V_norm, M,
+        angles='xy',
+        scale_units='xy',
+        scale=1.0,          # Отключаем авто-масштабирование
+        width=0.008,        # Толщина в 2 раза больше
+        headwidth=6,        # Гигантские головки
+        headlength=7,
+        headaxislength=5,
+        cmap='turbo',         # Яркая цветовая схема
+        edgecolor='black',  # Четкая обводка
+        linewidth=0.5,
+        alpha=0.95,
+        zorder=10           # Выводим поверх других элементов
+    )
+
+    # Настройка цветовой шкалы
+    cbar = fig.colorbar(quiv, ax=ax, label='|B|')
+    cbar.ax.tick_params(labelsize=8)
+
+    # Фиксируем границы
+    ax.set_xlim(x.min(), x.max())
+    ax.set_ylim(y.min(), y.max())
+    ax.set_aspect('equal')
+    ax.set_title("Векторное поле: Bx и By")
+
+    plt.tight_layout()
+    plt.subplots_adjust(hspace=0.3, wspace=0.25)
+    return fig
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Карты компонент магнитного поля по field_data.json',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-r', '--resolution', type=int, default=DEFAULT_RESOLUTION,
+                        help='Количество узлов сетки интерполяции по каждой оси для разрозненных сенсоров')
+    args = parser.parse_args()
+
+    plot_profiler.start()
+    with plot_profiler.stage('load'):
+        field = load_field_data("field_data.json")
+    grid = interpolate_field(field, args.resolution)
+    with plot_profiler.stage('render'):
+        fig = plot_field(field, grid)
+    show_or_save(fig, "contour_plot.png")
+    plot_profiler.finish("contour_plot.png")
@@ -1,59 +1,131 @@
-﻿import os
+﻿import argparse
+import os
 import os.path
+from concurrent.futures import ProcessPoolExecutor
+
+import plot_profiler
+from plot_backend import configure_backend
+
+configure_backend(interactive=False)
+
 import matplotlib.pyplot as plt
 import numpy as np
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
-units = []
+# Виды камеры (elev, azim, roll), которые сохраняются как plot0.png, plot1.png, ...
+VIEWS = ((90, -90, 0), (0, -90, 0), (0, 0, 0))
+
+# Углы параллелепипеда: 0 -- нижняя, 1 -- верхняя граница по каждой оси
+CORNERS = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                    [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]])
+
+# Грани параллелепипеда как четвёрки углов
+FACES = np.array([[0, 1, 2, 3], [4, 5, 6, 7], [0, 1, 5, 4],
+                  [2, 3, 7, 6], [1, 2, 6, 5], [4, 7, 3, 0]])
+
+
+def load_units(file_path):
+    """(N, 6) границы элементов x0 x1 y0 y1 z0 z1 из output.txt VisualizerService.
+
+    Числа записываются в культуре C#, поэтому запятая заменяется точкой,
+    а весь файл разбирается одним вызовом вместо построчного чтения.
+    """
+    with open(file_path, "r") as f:
+        count = int(f.readline())
+        values = np.array(f.read().replace(',', '.').split(), dtype=float)
+
+    if len(values) < count * 6:
+        raise ValueError(f"Файл {file_path} содержит {len(values) // 6} элементов вместо {count}")
+    return values[:count * 6].reshape(count, 6)
+
+
+def element_corners(units):
+    """(N, 8, 3) углы элементов"""
+    units = np.asarray(units, dtype=float).reshape(-1, 6)
+    low, high = units[:, 0::2], units[:, 1::2]
+    return np.where(CORNERS[None, :, :] == 1, high[:, None, :], low[:, None, :])
+
+
+def draw_mesh(units):
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+
+    corners = element_corners(units)
+
+    # plot vertices: общие вершины соседних элементов выводятся один раз
+    vertices = np.unique(corners.reshape(-1, 3), axis=0)
+    ax.scatter(vertices[:, 0], vertices[:, 1], vertices[:, 2], c='k', s=1)
 
-with open("output.txt", "r") as f:
-    nums = f.readline()[:-1]
-    for i in range(int(nums)):
-        units.append([float(j) for j in f.readline()[:-2].replace(',', '.').split(' ')])
+    # plot sides: грани всех элементов одной коллекцией
+    verts = corners[:, FACES].reshape(-1, 4, 3)
+    ax.add_collection3d(Poly3DCollection(verts, linewidths=.3, edgecolors='b', alpha=.1))
+
+    ax.set_xlabel('X')
+    ax.set_ylabel('Y')
+    ax.set_zlabel('Z')
+    return fig, ax
+
+
+def view_path(directory, index):
+    return os.path.join(directory, "plot" + str(index) + ".png")
+
+
+def save_views(fig, ax, directory="OutputPlots", views=VIEWS, first=0):
+    # Повторный запуск перезаписывает изображения в существующем каталоге
+    os.makedirs(directory, exist_ok=True)
+
+    for i, img in enumerate(views, start=first):
+        ax.view_init(elev=img[0], azim=img[1], roll=img[2])
+        fig.savefig(view_path(directory, i))
+
+
+def _render_view(units, directory, view, index):
+    """Построение и сохранение одного вида в рабочем процессе"""
+    fig, ax = draw_mesh(units)
+    save_views(fig, ax, directory, [view], first=index)
+    plt.close(fig)
+
+
+def render_views(units, directory="OutputPlots", views=VIEWS, workers=None):
+    """Построение сетки и сохранение видов, по возможности в параллельных процессах.
+
+    Каждый рабочий процесс строит свою фигуру по массиву границ, поэтому виды
+    отрисовываются одновременно; при одном процессе фигура строится один раз.
+    """
+    os.makedirs(directory, exist_ok=True)
+    workers = min(len(views), workers or os.cpu_count() or 1)
+
+    if workers <= 1:
+        fig, ax = draw_mesh(units)
+        save_views(fig, ax, directory, views)
+        plt.close(fig)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_render_view, units, directory, view, i) for i, view in enumerate(views)]
+        for future in futures:
+            future.result()
 
-fig = plt.figure()
-ax = fig.add_subplot(111, projection='3d')
 
 if __name__ == '__main__':
-    for i in range(int(nums)):
-        points = np.array([[units[i][0], units[i][2], units[i][4]],
-                           [units[i][1], units[i][2], units[i][4]],
-                           [units[i][1], units[i][3], units[i][4]],
-                           [units[i][0], units[i][3], units[i][4]],
-                           [units[i][0], units[i][2], units[i][5]],
-                           [units[i][1], units[i][2], units[i][5]],
-                           [units[i][1], units[i][3], units[i][5]],
-                           [units[i][0], units[i][3], units[i][5]]])
-
-        Z = np.zeros((8, 3))
-        for i in range(8):
-            Z[i, :] = np.dot(points[i, :], 1)
-
-        # plot vertices
-        ax.scatter(Z[:, 0], Z[:, 1], Z[:, 2], c='k', s=1)
-
-        # list of sides' polygons of figure
-        verts = [[Z[0], Z[1], Z[2], Z[3]],
-                 [Z[4], Z[5], Z[6], Z[7]],
-                 [Z[0], Z[1], Z[5], Z[4]],
-                 [Z[2], Z[3], Z[7], Z[6]],
-                 [Z[1], Z[2], Z[6], Z[5]],
-                 [Z[4], Z[7], Z[3], Z[0]]]
-
-        # plot sides
-        ax.add_collection3d(Poly3DCollection(verts, linewidths=.3, edgecolors='b', alpha=.1))
-
-ax.set_xlabel('X')
-ax.set_ylabel('Y')
-ax.set_zlabel('Z')
-
-directory = "OutputPlots"
-os.mkdir(directory)
-
-imgs = [(90, -90, 0), (0, -90, 0), (0, 0, 0)]
-
-for i, img in enumerate(imgs):
-    file_name = "plot" + str(i) + ".png"
-    path = os.path.join(directory, file_name)
-    ax.view_init(elev=img[0], azim=img[1], roll=img[2])
-    plt.savefig(path)
\ No newline at end of file
+    parser = argparse.ArgumentParser(
+        description='Виды сетки КЭ по файлу границ элементов VisualizerService',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-i', '--input', default='output.txt', help='Файл границ элементов')
+    parser.add_argument('-o', '--output', default='OutputPlots', help='Каталог изображений')
+    parser.add_argument('--view', type=float, nargs=3, action='append', metavar=('ELEV', 'AZIM', 'ROLL'),
+                        help='Дополнительный вид камеры после трёх стандартных')
+    parser.add_argument('-j', '--workers', type=int, help='Количество процессов отрисовки; по умолчанию по числу ядер')
+    args = parser.parse_args()
+
+    try:
+        plot_profiler.start()
+        with plot_profiler.stage('load'):
+            units = load_units(args.input)
+        with plot_profiler.stage('render'):
+            render_views(units, args.output, VIEWS + tuple(map(tuple, args.view or ())), args.workers)
+        plot_profiler.finish(args.output)
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# Количество узлов регулярной сетки по каждой оси по умолчанию
+DEFAULT_RESOLUTION = 100
+
+# Допуск барицентрических координат, с которым узел на ребре считается внутри треугольника
+BARYCENTRIC_TOLERANCE = 1e-10
+
+# Переменные окружения с каталогом и размером кэша весов в МБ
+CACHE_DIR_ENV = 'EM_PLOTS_WEIGHTS_CACHE'
+CACHE_SIZE_ENV = 'EM_PLOTS_WEIGHTS_CACHE_MB'
+
+# Каталог и ограничение размера кэша весов по умолчанию
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'em_plots_weights')
+DEFAULT_CACHE_MB = 256
+
+# Версия формата записей кэша, входит в ключ
+CACHE_VERSION = 1
+
+
+@dataclass(frozen=True)
+class InterpolationWeights:
+    """Линейная интерполяция с разрозненных точек на регулярную сетку.
+
+    Положение каждого узла сетки в триангуляции ищется один раз, после чего
+    все компоненты поля переносятся на сетку одной взвешенной суммой значений
+    в вершинах треугольников.
+
+    xi, yi   -- оси регулярной сетки
+    vertices -- (3, P) индексы вершин треугольника, содержащего каждый узел сетки
+    weights  -- (3, P) барицентрические координаты узлов, NaN вне выпуклой оболочки
+    """
+    xi: np.ndarray
+    yi: np.ndarray
+    vertices: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.yi), len(self.xi)
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """(N, K) значения в исходных точках -> (ny, nx, K) значения на сетке"""
+        values = np.asarray(values, dtype=np.float64).reshape(len(values), -1)
+        result = self.weights[0][:, None] * values[self.vertices[0]]
+        for vertex in (1, 2):
+            result += self.weights[vertex][:, None] * values[self.vertices[vertex]]
+        return result.reshape(*self.shape, values.shape[1])
+
+
+def regular_axes(x: np.ndarray, y: np.ndarray, resolution: int = DEFAULT_RESOLUTION) -> tuple[np.ndarray, np.ndarray]:
+    """Оси регулярной сетки resolution x resolution по границам точек"""
+    if resolution < 2:
+        raise ValueError("Разрешение сетки должно быть не меньше 2")
+    return np.linspace(x.min(), x.max(), resolution), np.linspace(y.min(), y.max(), resolution)
+
+
+def _barycentric_planes(tx: np.ndarray, ty: np.ndarray) -> np.ndarray:
+    """(T, 3, 3) коэффициенты (a, b, c) барицентрических координат вида a*x + b*y + c.
+
+    Для вырожденных треугольников коэффициенты равны NaN, и ни одна точка в них не попадает.
+    """
+    (ax, bx, cx), (ay, by, cy) = tx.T, ty.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        det = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+        planes = np.stack((
+            np.column_stack((by - cy, cx - bx, -(by - cy) * cx - (cx - bx) * cy)),
+            np.column_stack((cy - ay, ax - cx, -(cy - ay) * cx - (ax - cx) * cy))
+        ), axis=1) / det[:, None, None]
+    planes[~np.isfinite(planes).all(axis=(1, 2))] = np.nan
+
+    # Третья координата равна 1 - wa - wb
+    third = np.array([0.0, 0.0, 1.0]) - planes.sum(axis=1)
+    return np.concatenate((planes, third[:, None]), axis=1)
+
+
+def _grid_range(low: np.ndarray, high: np.ndarray, axis: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Первый индекс и количество узлов оси, попадающих в отрезки [low, high]"""
+    step = axis[1] - axis[0]
+    first = np.maximum(np.ceil((low - axis[0]) / step - BARYCENTRIC_TOLERANCE), 0).astype(np.int64)
+    last = np.minimum(np.floor((high - axis[0]) / step + BARYCENTRIC_TOLERANCE), len(axis) - 1).astype(np.int64)
+    return first, np.maximum(last - first + 1, 0)
+
+
+def _expand(starts: np.ndarray, counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Номер отрезка и значение для каждого целого из отрезков [start, start + count)"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    values = starts[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, values
+
+
+def locate_on_grid(x: np.ndarray, y: np.ndarray, triangles: np.ndarray,
+                   xi: np.ndarray, yi: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Треугольник, содержащий каждый узел регулярной сетки, и барицентрические координаты узла.
+
+    Возвращает (P,) индексы треугольников (-1 вне выпуклой оболочки) и (3, P)
+    координаты (NaN вне оболочки). Вместо поиска каждого узла в триангуляции
+    каждый треугольник растеризуется по строкам сетки: на строке y = yi[j]
+    барицентрические координаты линейны по x, поэтому отрезок узлов внутри
+    треугольника вычисляется сразу, и работа пропорциональна числу узлов сетки.
+    """
+    tx, ty = x[triangles], y[triangles]
+    planes = _barycentric_planes(tx, ty)
+
+    # Пары (треугольник, строка сетки), пересекающие треугольник по y
+    j0, rows_count = _grid_range(ty.min(axis=1), ty.max(axis=1), yi)
+    owner, rows = _expand(j0, rows_count)
+
+    # На строке w_k = slope_k * x + offset_k, ограничение w_k >= -tol задаёт полупрямую по x.
+    # Массивы хранятся как (3, R), чтобы выборки по парам шли по непрерывной памяти
+    slope = np.take(planes[:, :, 0].T, owner, axis=1)
+    offset = np.take(planes[:, :, 1].T, owner, axis=1) * yi[rows] + np.take(planes[:, :, 2].T, owner, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bound = (-BARYCENTRIC_TOLERANCE - offset) / slope
+    low = np.where(slope > 0, bound, -np.inf)
+    high = np.where(slope < 0, bound, np.inf)
+    empty = np.isnan(slope) | ((slope == 0) & (offset < -BARYCENTRIC_TOLERANCE))
+
+    i0, columns_count = _grid_range(
+        np.maximum(np.maximum(low[0], low[1]), low[2]),
+        np.minimum(np.minimum(high[0], high[1]), high[2]),
+        xi
+    )
+    columns_count[empty[0] | empty[1] | empty[2]] = 0
+    span, columns = _expand(i0, columns_count)
+
+    # Узлы на общих рёбрах попадают в несколько треугольников, остаётся любой из них
+    points = rows[span] * len(xi) + columns
+    located = np.full(len(xi) * len(yi), -1, dtype=np.int64)
+    located[points] = owner[span]
+
+    weights = np.full((3, len(located)), np.nan)
+    values = np.take(slope, span, axis=1)
+    values *= xi[columns]
+    values += np.take(offset, span, axis=1)
+    weights[:, points] = values
+
+    return located, weights
+
+
+def build_weights(x: np.ndarray, y: np.ndarray, resolution: int = DEFAULT_RESOLUTION) -> InterpolationWeights:
+    """Триангуляция Делоне точек и барицентрические веса узлов регулярной сетки"""
+    import matplotlib.tri as tri
+
+    xi, yi = regular_axes(x, y, resolution)
+    triangulation = tri.Triangulation(x, y)
+    located, weights = locate_on_grid(x, y, triangulation.triangles, xi, yi)
+
+    vertices = np.zeros((3, len(located)), dtype=np.int64)
+    inside = located >= 0
+    vertices[:, inside] = triangulation.triangles[located[inside]].T
+
+    return InterpolationWeights(xi=xi, yi=yi, vertices=vertices, weights=weights)
+
+
+class WeightsCache:
+    """Дисковый кэш весов интерполяции, ключ -- хэш координат сенсоров и разрешения сетки.
+
+    Инверсии строят карту поля много раз для одной и той же расстановки
+    сенсоров, поэтому после первого запуска остаётся только взвешенная сумма.
+    Файлы, к которым дольше всего не обращались, удаляются, когда общий
+    размер кэша превышает max_bytes; max_bytes = 0 отключает кэш.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = directory or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(CACHE_SIZE_ENV, DEFAULT_CACHE_MB)) * 2 ** 20)
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(x: np.ndarray, y: np.ndarray, resolution: int) -> str:
+        digest = hashlib.sha256()
+        digest.update(f'{CACHE_VERSION}:{len(x)}:{resolution}'.encode())
+        digest.update(np.ascontiguousarray(x, dtype=np.float64).tobytes())
+        digest.update(np.ascontiguousarray(y, dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key: str) -> Optional[InterpolationWeights]:
+        """Веса из кэша или None, если записи нет или она повреждена"""
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                weights = InterpolationWeights(
+                    xi=data['xi'], yi=data['yi'],
+                    vertices=data['vertices'].astype(np.int64), weights=data['weights']
+                )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError):
+            self._remove(path)
+            return None
+
+        # Время доступа хранится во времени модификации, по нему выбираются вытесняемые записи
+        os.utime(path)
+        return weights
+
+    def store(self, key: str, weights: InterpolationWeights):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        partial = f'{path}.{os.getpid()}.partial'
+        vertices = weights.vertices
+        if vertices.size and vertices.max() < np.iinfo(np.int32).max:
+            vertices = vertices.astype(np.int32)
+        with open(partial, 'wb') as f:
+            np.savez(f, xi=weights.xi, yi=weights.yi, vertices=vertices, weights=weights.weights)
+        os.replace(partial, path)
+        self.evict()
+
+    def evict(self):
+        """Удаление давно не использованных записей сверх ограничения размера"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.directory, name))
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, x: np.ndarray, y: np.ndarray, resolution: int = DEFAULT_RESOLUTION) -> tuple[InterpolationWeights, bool]:
+        """Веса для расстановки сенсоров и признак того, что они взяты из кэша"""
+        if not self.enabled:
+            return build_weights(x, y, resolution), False
+
+        key = self.key(x, y, resolution)
+        weights = self.load(key)
+        if weights is not None:
+            return weights, True
+
+        weights = build_weights(x, y, resolution)
+        try:
+            self.store(key, weights)
+        except OSError:
+            # Недоступный для записи каталог не должен мешать построению графика
+            pass
+        return weights, False
@@ -0,0 +1,226 @@
+import argparse
+import os
+import re
+import time
+from typing import Optional
+
+from plot_backend import configure_backend
+
+headless = configure_backend()
+
+import matplotlib.pyplot as plt
+
+# Строка истории функционала: "<итерация>: <значение>", -1 -- начальный функционал.
+# Значение записывается в формате E8 текущей культуры, поэтому разделитель может быть запятой
+FUNCTIONAL_LINE = re.compile(r'^\s*(-?\d+)\s*:\s*([-+]?\d+(?:[.,]\d+)?(?:[eE][-+]?\d+)?)\s*$')
+
+# Запас по оси итераций при расширении границ: новая граница = последняя итерация * X_HEADROOM
+X_HEADROOM = 2.0
+
+# Запас по оси функционала (логарифмическая шкала) при расширении границ, множитель
+Y_HEADROOM = 10.0
+
+
+class LogTail:
+    """Чтение только дописанной части файла.
+
+    Позиция прочитанного хранится между вызовами, поэтому каждый опрос
+    читает лишь новые байты; неполная последняя строка откладывается до
+    следующего опроса. Если файл стал короче, он считается перезаписанным.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.offset = 0
+        self._partial = b''
+
+    def read_lines(self) -> tuple[list[str], bool]:
+        """Новые полные строки и признак того, что файл был перезаписан"""
+        try:
+            size = os.path.getsize(self.file_path)
+        except FileNotFoundError:
+            return [], False
+
+        reset = size < self.offset
+        if reset:
+            self.offset, self._partial = 0, b''
+        if size == self.offset:
+            return [], reset
+
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        self.offset += len(data)
+
+        *lines, self._partial = (self._partial + data).split(b'\n')
+        return [line.decode('utf-8-sig', errors='replace') for line in lines], reset
+
+
+def parse_functional(lines: list[str]) -> list[tuple[int, float]]:
+    """Пары (итерация, функционал) из строк журнала, остальные строки пропускаются"""
+    points = []
+    for line in lines:
+        match = FUNCTIONAL_LINE.match(line)
+        if match:
+            points.append((int(match.group(1)), float(match.group(2).replace(',', '.'))))
+    return points
+
+
+class RunTrace:
+    """История функционала одного запуска и её линия на графике"""
+
+    def __init__(self, ax, file_path: str):
+        self.tail = LogTail(file_path)
+        self.iterations, self.values = [], []
+        self.line, = ax.plot([], [], marker='o', markersize=3, label=os.path.basename(file_path))
+        # Отрезок от последней нарисованной точки до новых, рисуется поверх сохранённого фона
+        self.segment, = ax.plot([], [], marker='o', markersize=3, color=self.line.get_color(), animated=True)
+
+    def poll(self) -> tuple[list[tuple[int, float]], bool]:
+        lines, reset = self.tail.read_lines()
+        if reset:
+            self.iterations, self.values = [], []
+        points = [(iteration, value) for iteration, value in parse_functional(lines) if value > 0]
+        return points, reset
+
+
+class ConvergenceMonitor:
+    """График сходимости нескольких запусков, обновляемый по мере роста журналов.
+
+    Новые точки дорисовываются блиттингом: фон с уже нарисованной историей
+    восстанавливается из буфера, поверх рисуется только отрезок до новых
+    точек, и результат сохраняется как новый фон. Поэтому стоимость
+    обновления не зависит от длины истории. Полная перерисовка нужна, лишь
+    когда точка выходит за границы осей; границы расширяются с запасом,
+    так что такие перерисовки редки.
+    """
+
+    def __init__(self, file_paths: list[str]):
+        self.fig, self.ax = plt.subplots(figsize=(10, 6))
+        self.ax.set_yscale('log')
+        self.ax.set_xlabel('Итерация')
+        self.ax.set_ylabel('Функционал')
+        self.ax.set_title('Сходимость инверсии')
+        self.ax.grid(True, which='both', alpha=0.3)
+        self.ax.set_xlim(-1, 10)
+        self.ax.set_ylim(1e-3, 1)
+
+        self.runs = [RunTrace(self.ax, file_path) for file_path in file_paths]
+        self.ax.legend(loc='upper right')
+        self._limits_set = False
+        self._background = None
+        self.fig.canvas.mpl_connect('draw_event', self._cache_background)
+
+    def _cache_background(self, event=None):
+        canvas = self.fig.canvas
+        self._background = canvas.copy_from_bbox(self.ax.bbox) if getattr(canvas, 'supports_blit', False) else None
+
+    def _fits(self, points: list[tuple[int, float]]) -> bool:
+        (x0, x1), (y0, y1) = self.ax.get_xlim(), self.ax.get_ylim()
+        return self._limits_set and all(x0 <= x <= x1 and y0 <= y <= y1 for x, y in points)
+
+    def _expand_limits(self):
+        iterations = [iteration for run in self.runs for iteration in run.iterations]
+        values = [value for run in self.runs for value in run.values]
+        if not values:
+            return
+        self.ax.set_xlim(min(iterations) - 1, max(max(iterations) * X_HEADROOM, 10))
+        self.ax.set_ylim(min(values) / Y_HEADROOM, max(values) * Y_HEADROOM)
+        self._limits_set = True
+
+    def redraw(self):
+        """Полная перерисовка: линии получают всю историю, фон сохраняется заново"""
+        for run in self.runs:
+            run.line.set_data(run.iterations, run.values)
+        self._expand_limits()
+        self.fig.canvas.draw()
+
+    def update(self) -> int:
+        """Опрос журналов, возвращает число новых точек"""
+        updates, full_redraw = [], False
+        for run in self.runs:
+            points, reset = run.poll()
+            full_redraw |= reset
+            if points:
+                updates.append((run, points))
+
+        if not updates and not full_redraw:
+            return 0
+
+        full_redraw |= self._background is None or not all(self._fits(points) for _, points in updates)
+        if not full_redraw:
+            canvas = self.fig.canvas
+            canvas.restore_region(self._background)
+            for run, points in updates:
+                start = [(run.iterations[-1], run.values[-1])] if run.iterations else []
+                x, y = zip(*(start + points))
+                run.segment.set_data(x, y)
+                self.ax.draw_artist(run.segment)
+            canvas.blit(self.ax.bbox)
+            self._cache_background()
+
+        for run, points in updates:
+            for iteration, value in points:
+                run.iterations.append(iteration)
+                run.values.append(value)
+            # Линия получает точки и без отрисовки, чтобы их не потеряла полная перерисовка окна
+            run.line.set_data(run.iterations, run.values)
+
+        if full_redraw:
+            self.redraw()
+        return sum(len(points) for _, points in updates)
+
+
+def monitor(file_paths: list[str], interval: float = 1.0, idle_timeout: Optional[float] = None,
+            output_file: Optional[str] = None) -> ConvergenceMonitor:
+    """Наблюдение за журналами функционала.
+
+    С окном обновления идут по таймеру до закрытия окна; без окна журналы
+    опрашиваются до idle_timeout секунд без новых точек или Ctrl+C, после
+    чего график сохраняется в output_file.
+    """
+    viewer = ConvergenceMonitor(file_paths)
+
+    if not headless:
+        timer = viewer.fig.canvas.new_timer(interval=int(interval * 1000))
+        timer.add_callback(viewer.update)
+        viewer.fig.canvas.draw()
+        viewer.update()
+        timer.start()
+        plt.show()
+        return viewer
+
+    viewer.fig.canvas.draw()
+    last_point = time.monotonic()
+    try:
+        while idle_timeout is None or time.monotonic() - last_point < idle_timeout:
+            if viewer.update():
+                last_point = time.monotonic()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+    if output_file:
+        viewer.redraw()
+        viewer.fig.savefig(output_file, dpi=150, bbox_inches='tight')
+        print(f"Сохранено изображение: {output_file}")
+    return viewer
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Наблюдение за сходимостью инверсий по журналам функционала GaussNewton_*.txt',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('files', nargs='+', help='Журналы функционала; несколько файлов -- несколько запусков')
+    parser.add_argument('--interval', type=float, default=1.0, help='Период опроса журналов, с')
+    parser.add_argument('--idle-timeout', type=float,
+                        help='Без окна: завершить после стольких секунд без новых итераций')
+    parser.add_argument('-o', '--output', default='convergence.png', help='Без окна: файл итогового графика')
+    args = parser.parse_args()
+
+    try:
+        monitor(args.files, interval=args.interval, idle_timeout=args.idle_timeout, output_file=args.output)
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -1,9 +1,26 @@
 import json
 
+import plot_profiler
+from plot_backend import configure_backend, show_or_save
+
+configure_backend()
+
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.patches import Rectangle
+from matplotlib.collections import PolyCollection
+from matplotlib.image import PcolorImage
+from matplotlib.transforms import Bbox
 from matplotlib.widgets import Button
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
+from box_index import BoxIndex
+from voxel_grid import AXES, AXIS_INDEX, box_faces, boundary_faces, build_voxel_grid, cell_arrays, face_shading
+
+# Проекции: (оси, ось сечения)
+PROJECTIONS = (('X', 'Y', 'Z'), ('Y', 'Z', 'X'), ('X', 'Z', 'Y'))
+
+# Предельное число граней 3D вида; при большем сетка укрупняется
+MAX_3D_FACES = 60000
 
 
 def load_mesh(filepath):
@@ -16,7 +33,7 @@ def load_mesh(filepath):
         return []
 
 class InteractiveSliceViewer:
-    def __init__(self, cells):
+    def __init__(self, cells, show=True, raster=True):
         if not cells:
             print("Нет данных для визуализации!")
             return
@@ -24,6 +41,15 @@ class InteractiveSliceViewer:
         self.cells = cells
         self.fig = plt.figure(figsize=(18, 8))
 
+        # Ячейки хранятся столбцами, чтобы сечения и вершины строились без обхода словарей
+        self.low, self.high, self.densities = cell_arrays(cells)
+        # Габариты ячеек индексируются без допуска: сечение содержит ячейки с low <= value <= high
+        self.index = BoxIndex(self.low, self.high, epsilon=0.0)
+
+        # Ячейки, образующие сетку, рисуются растром: сечение -- срез массива плотности.
+        # Иначе каждая ячейка сечения выводится отдельным прямоугольником
+        self.voxels = build_voxel_grid(self.low, self.high, self.densities) if raster else None
+
         # Рассчет границ
         self.x_bounds = self._calculate_bounds('X')
         self.y_bounds = self._calculate_bounds('Y')
@@ -43,21 +69,24 @@ class InteractiveSliceViewer:
         self.ax_xz = self.fig.add_subplot(143)
 
         self._create_controls()
-        self.update_all_plots()
-        plt.show()
+        with plot_profiler.stage('render'):
+            # Оформление осей и 3D вид не зависят от положения сечений и строятся один раз
+            self.projections = {
+                fixed_axis: self._create_projection(ax, x_axis, y_axis)
+                for ax, (x_axis, y_axis, fixed_axis) in zip((self.ax_xy, self.ax_yz, self.ax_xz), PROJECTIONS)
+            }
+            self._plot_3d()
+            self.update_all_plots()
+
+        # Снимок 3D вида обновляется после каждой полной отрисовки фигуры
+        self._view_3d = None
+        self.fig.canvas.mpl_connect('draw_event', self._cache_3d_view)
+        if show:
+            show_or_save(self.fig, 'inverse_chart.png')
 
     def _calculate_bounds(self, axis):
-        min_val = max_val = None
-        for cell in self.cells:
-            center = cell[f"Center{axis}"]
-            bound = cell[f"Bound{axis}"]
-            low = center - bound
-            high = center + bound
-            if min_val is None or low < min_val:
-                min_val = low
-            if max_val is None or high > max_val:
-                max_val = high
-        return (min_val, max_val) if min_val is not None else (0, 1)
+        column = AXIS_INDEX[axis]
+        return self.low[:, column].min(), self.high[:, column].max()
 
     def _create_controls(self):
         plt.subplots_adjust(left=0.1, right=0.9, bottom=0.25, top=0.95)
@@ -85,12 +114,34 @@ class InteractiveSliceViewer:
                 self.__getattribute__(f'{axis}_bounds')[0]) / 20
         new_val = self.current_slice[axis] + direction * step
         self.current_slice[axis] = np.clip(new_val, *self.__getattribute__(f'{axis}_bounds'))
-        self.update_all_plots()
+
+        # Сечение по оси axis меняет только проекцию, перпендикулярную этой оси
+        self._plot_projection(axis.upper())
+        self._redraw_projections()
+
+    def _cache_3d_view(self, event):
+        if not self.ax_3d.get_visible():
+            return
+        bbox = Bbox.intersection(self.ax_3d.get_tightbbox(event.renderer), self.fig.bbox)
+        self._view_3d = self.fig.canvas.copy_from_bbox(bbox) if bbox is not None else None
+
+    def _redraw_projections(self):
+        """Перерисовка фигуры без 3D вида, который восстанавливается из снимка"""
+        canvas = self.fig.canvas
+        if self._view_3d is None or not getattr(canvas, 'supports_blit', False):
+            canvas.draw_idle()
+            return
+
+        self.ax_3d.set_visible(False)
+        try:
+            canvas.draw()
+        finally:
+            self.ax_3d.set_visible(True)
+        canvas.restore_region(self._view_3d)
+        canvas.blit(self.fig.bbox)
 
     def _filter_cells(self, axis, value):
-        return [cell for cell in self.cells
-                if (cell[f"Center{axis}"] - cell[f"Bound{axis}"] <= value <=
-                    cell[f"Center{axis}"] + cell[f"Bound{axis}"])]
+        return self.index.query_plane(AXIS_INDEX[axis], value)
 
     def _set_square_aspect(self, ax, x_range, y_range):
         """Устанавливает квадратное соотношение осей с разными диапазонами"""
@@ -98,13 +149,8 @@ class InteractiveSliceViewer:
         # Или для более старых версий:
         # ax.set_aspect(y_range / x_range, adjustable='datalim')
 
-    def _plot_projection(self, ax, cells, x_axis, y_axis, fixed_axis):
-        ax.clear()
-
-        if not cells:
-            ax.text(0.5, 0.5, 'Нет данных', ha='center', va='center')
-            return
-
+    def _create_projection(self, ax, x_axis, y_axis):
+        """Постоянные примитивы проекции: коллекция прямоугольников или границы вокселей и надпись об отсутствии данных"""
         # Рассчет диапазонов для осей
         x_min, x_max = self.__getattribute__(f"{x_axis.lower()}_bounds")
         y_min, y_max = self.__getattribute__(f"{y_axis.lower()}_bounds")
@@ -114,46 +160,117 @@ class InteractiveSliceViewer:
         # Установка квадратного соотношения
         self._set_square_aspect(ax, x_range, y_range)
 
-        densities = [c["Density"] for c in cells]
-        min_d, max_d = min(densities), max(densities)
-        range_d = max_d - min_d if max_d != min_d else 1.0
-
-        for cell in cells:
-            x = cell[f"Center{x_axis}"] - cell[f"Bound{x_axis}"]
-            y = cell[f"Center{y_axis}"] - cell[f"Bound{y_axis}"]
-            width = 2 * cell[f"Bound{x_axis}"]
-            height = 2 * cell[f"Bound{y_axis}"]
-
-            color_value = 1 - (cell["Density"] - min_d) / range_d
-            rect = Rectangle((x, y), width, height,
-                             edgecolor='k', facecolor=plt.cm.gray(color_value), alpha=0.7)
-            ax.add_patch(rect)
+        projection = {
+            'ax': ax,
+            'columns': (AXIS_INDEX[x_axis], AXIS_INDEX[y_axis]),
+            'empty': ax.text(0.5, 0.5, 'Нет данных', ha='center', va='center', transform=ax.transAxes, visible=False),
+            'image': None,
+            'image_shape': None,
+            'borders': []
+        }
+        if self.voxels is None:
+            projection['collection'] = PolyCollection([], edgecolor='k', alpha=0.7)
+            ax.add_collection(projection['collection'])
+        elif self.voxels.exact:
+            # Границы ячеек регулярной сетки -- линии сетки вокселей, одинаковые для всех сечений
+            x_edges, y_edges = (self.voxels.edges[column] for column in projection['columns'])
+            projection['borders'] = [
+                ax.vlines(x_edges, y_edges[0], y_edges[-1], colors='k', linewidth=1.0, alpha=0.7),
+                ax.hlines(y_edges, x_edges[0], x_edges[-1], colors='k', linewidth=1.0, alpha=0.7)
+            ]
 
         ax.set_xlabel(x_axis)
         ax.set_ylabel(y_axis)
-        ax.set_title(f"{x_axis}{y_axis} Срез ({fixed_axis} = {self.current_slice[fixed_axis.lower()]:.2f})")
         ax.set_xlim(x_min, x_max)
         ax.set_ylim(y_min, y_max)
         ax.grid(True)
+        return projection
 
-    def _plot_3d(self):
-        self.ax_3d.clear()
-        densities = [c["Density"] for c in self.cells]
-        min_d, max_d = min(densities), max(densities)
+    def _plot_projection(self, fixed_axis):
+        projection = self.projections[fixed_axis]
+        ax, columns, empty = projection['ax'], projection['columns'], projection['empty']
+        x_axis, y_axis = (AXES[column] for column in columns)
+        ax.set_title(f"{x_axis}{y_axis} Срез ({fixed_axis} = {self.current_slice[fixed_axis.lower()]:.2f})")
 
-        for cell in self.cells:
-            x = cell["CenterX"]
-            y = cell["CenterY"]
-            z = cell["CenterZ"]
-            dx = cell["BoundX"] * 2
-            dy = cell["BoundY"] * 2
-            dz = cell["BoundZ"] * 2
+        if self.voxels is not None:
+            self._plot_raster(projection, fixed_axis)
+            return
 
-            color_value = 1 - (cell["Density"] - min_d) / (max_d - min_d)
-            color = plt.cm.gray(color_value)
+        collection = projection['collection']
+        cells = self._filter_cells(fixed_axis, self.current_slice[fixed_axis.lower()])
+        empty.set_visible(len(cells) == 0)
+        if not len(cells):
+            collection.set_verts([])
+            return
 
-            self.ax_3d.bar3d(x - cell["BoundX"], y - cell["BoundY"], z - cell["BoundZ"],
-                             dx, dy, dz, color=color, alpha=0.3, edgecolor='k')
+        # Углы прямоугольников (k, 4, 2) в порядке обхода
+        low = self.low[np.ix_(cells, columns)]
+        high = self.high[np.ix_(cells, columns)]
+        corners = np.stack((
+            low,
+            np.column_stack((high[:, 0], low[:, 1])),
+            high,
+            np.column_stack((low[:, 0], high[:, 1]))
+        ), axis=1)
+
+        densities = self.densities[cells]
+        min_d, max_d = densities.min(), densities.max()
+        range_d = max_d - min_d if max_d != min_d else 1.0
+
+        collection.set_verts(corners)
+        collection.set_facecolor(plt.cm.gray(1 - (densities - min_d) / range_d))
+
+    def _plot_raster(self, projection, fixed_axis):
+        """Сечение сетки вокселей одним изображением, стоимость отрисовки зависит от числа пикселей.
+
+        Изображение создаётся один раз и при смене сечения обновляется на месте;
+        заново оно строится только при изменении размера сечения.
+        """
+        image = projection['image']
+        slab = self.voxels.slice(fixed_axis, self.current_slice[fixed_axis.lower()])
+        has_data = slab is not None and not np.isnan(slab).all()
+        projection['empty'].set_visible(not has_data)
+        for borders in projection['borders']:
+            borders.set_visible(has_data)
+        if image is not None:
+            image.set_visible(has_data)
+        if not has_data:
+            return
+
+        # gray_r с нормировкой по сечению совпадает с цветами прямоугольников: gray(1 - d)
+        x_edges, y_edges = (self.voxels.edges[column] for column in projection['columns'])
+        data = slab.T
+        min_d, max_d = np.nanmin(slab), np.nanmax(slab)
+        if image is None or projection['image_shape'] != data.shape:
+            if image is not None:
+                image.remove()
+            projection['image'] = projection['ax'].pcolorfast(
+                x_edges, y_edges, data, cmap='gray_r', vmin=min_d, vmax=max_d, alpha=0.7
+            )
+            projection['image_shape'] = data.shape
+            return
+
+        # pcolorfast возвращает AxesImage, PcolorImage или QuadMesh в зависимости от границ
+        if isinstance(image, PcolorImage):
+            image.set_data(x_edges, y_edges, data)
+        else:
+            image.set_array(data)
+        image.set_clim(min_d, max_d)
+
+    def _plot_3d(self):
+        self.ax_3d.clear()
+        min_d, max_d = self.densities.min(), self.densities.max()
+        range_d = max_d - min_d if max_d != min_d else 1.0
+
+        # Все ячейки выводятся одной коллекцией граней; у сетки вокселей остаются
+        # только внешние грани и границы между областями разной плотности
+        if self.voxels is not None:
+            faces = boundary_faces(self.voxels, max_faces=MAX_3D_FACES)
+        else:
+            faces = box_faces(self.low, self.high, self.densities)
+        colors = plt.cm.gray(1 - (faces.values - min_d) / range_d)
+        colors[:, :3] *= face_shading(faces.normals)[:, None]
+        self.ax_3d.add_collection3d(Poly3DCollection(faces.vertices, facecolors=colors, edgecolors='k', alpha=0.3))
 
         self.ax_3d.set_xlim(*self.x_bounds)
         self.ax_3d.set_ylim(*self.y_bounds)
@@ -164,19 +281,18 @@ class InteractiveSliceViewer:
         self.ax_3d.set_title('3D View')
 
     def update_all_plots(self):
-        # Обновление 2D проекций
-        self._plot_projection(self.ax_xy, self._filter_cells('Z', self.current_slice['z']), 'X', 'Y', 'Z')
-        self._plot_projection(self.ax_yz, self._filter_cells('X', self.current_slice['x']), 'Y', 'Z', 'X')
-        self._plot_projection(self.ax_xz, self._filter_cells('Y', self.current_slice['y']), 'X', 'Z', 'Y')
-
-        # Обновление 3D вида
-        self._plot_3d()
+        # Обновление 2D проекций; 3D вид от сечений не зависит и не перестраивается
+        for _, _, fixed_axis in PROJECTIONS:
+            self._plot_projection(fixed_axis)
 
         self.fig.canvas.draw_idle()
 
 if __name__ == '__main__':
-    cells = load_mesh('inverse.json')
+    plot_profiler.start()
+    with plot_profiler.stage('load'):
+        cells = load_mesh('inverse.json')
     if cells:
         InteractiveSliceViewer(cells)
+        plot_profiler.finish('inverse_chart.png')
     else:
         print("Ошибка: Не удалось загрузить данные")
\ No newline at end of file
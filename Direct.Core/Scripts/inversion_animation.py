@@ -0,0 +1,263 @@
+import argparse
+import os
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Optional
+
+import numpy as np
+
+from plot_backend import configure_backend
+
+configure_backend(interactive=False)
+
+import matplotlib.pyplot as plt
+from matplotlib.collections import PolyCollection
+
+from mesh_stream import read_mesh_stream, read_values_stream
+from voxel_grid import AXES, AXIS_INDEX, build_voxel_grid, cell_arrays
+
+# Проекции: (оси, ось сечения)
+PROJECTIONS = (('X', 'Y', 'Z'), ('Y', 'Z', 'X'), ('X', 'Z', 'Y'))
+
+# Расширения, для которых кадры записываются в видео через ffmpeg; иначе -- каталог PNG
+VIDEO_FORMATS = ('.mp4', '.avi', '.mkv', '.mov')
+
+# Объём начала файла, по которому определяется формат снимка
+FORMAT_PROBE_BYTES = 64 * 1024
+
+# Ключ значений ячеек снимка: Density в inverse.json, Mu в mesh_data.json. Числа
+# извлекаются потоково без разбора документа, так как геометрия между итерациями не меняется
+VALUE_KEYS = {'inverse': 'Density', 'mesh': 'Mu'}
+
+# Подпись цветовой шкалы для каждого формата
+VALUE_LABELS = {'inverse': 'Плотность', 'mesh': 'Mu'}
+
+# Номер итерации в имени файла снимка
+_ITERATION_PATTERN = re.compile(r'(\d+)(?!.*\d)')
+
+
+def iteration_number(file_path: str) -> Optional[int]:
+    """Номер итерации -- последнее число в имени файла"""
+    match = _ITERATION_PATTERN.search(os.path.basename(file_path))
+    return int(match.group(1)) if match else None
+
+
+def snapshot_files(directory: str) -> list[str]:
+    """JSON снимки каталога в порядке итераций"""
+    names = [name for name in os.listdir(directory) if name.endswith('.json')]
+    paths = [os.path.join(directory, name) for name in names]
+    return sorted(paths, key=lambda path: (iteration_number(path) is None, iteration_number(path) or 0, path))
+
+
+def snapshot_format(file_path: str) -> str:
+    """'mesh' для mesh_data.json или 'inverse' для inverse.json"""
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        head = f.read(FORMAT_PROBE_BYTES)
+    if '"Edges"' in head:
+        return 'mesh'
+    if '"Density"' in head:
+        return 'inverse'
+    raise ValueError(f"Файл {file_path} не похож ни на mesh_data.json, ни на inverse.json")
+
+
+class SnapshotGeometry:
+    """Геометрия ячеек, общая для всех итераций.
+
+    Строится один раз по первому снимку; для остальных снимков читаются только
+    значения ячеек, порядок которых совпадает с порядком элементов.
+    """
+
+    def __init__(self, file_path: str):
+        self.format = snapshot_format(file_path)
+        if self.format == 'mesh':
+            mesh, _, _ = read_mesh_stream(file_path)
+            self.low, self.high = mesh.element_bounds[:, 0], mesh.element_bounds[:, 1]
+        else:
+            import json
+
+            with open(file_path, 'r') as f:
+                self.low, self.high, _ = cell_arrays(json.load(f).get('Elements', []))
+        if not len(self.low):
+            raise ValueError(f"Файл {file_path} не содержит ячеек")
+
+        self.voxels = build_voxel_grid(self.low, self.high, np.zeros(len(self.low)))
+
+    def __len__(self) -> int:
+        return len(self.low)
+
+    def read_values(self, file_path: str) -> np.ndarray:
+        """(M,) значения ячеек снимка"""
+        values = read_values_stream(file_path, VALUE_KEYS[self.format])
+        if len(values) != len(self):
+            raise ValueError(f"Файл {file_path} содержит {len(values)} значений вместо {len(self)}")
+        return values
+
+
+class FrameRenderer:
+    """Три ортогональных сечения, которые перекрашиваются для каждой итерации.
+
+    Примитивы создаются один раз: для сетки вокселей -- QuadMesh сечения,
+    иначе -- коллекция прямоугольников ячеек, пересекающих плоскость. Кадр
+    меняет только массив значений и границы цветовой шкалы.
+    """
+
+    def __init__(self, geometry: SnapshotGeometry, slices: Optional[dict] = None):
+        self.geometry = geometry
+        self.fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+        self.title = self.fig.suptitle('')
+
+        positions = {
+            axis: (geometry.low[:, column].min() + geometry.high[:, column].max()) / 2
+            for axis, column in AXIS_INDEX.items()
+        }
+        positions.update({axis: value for axis, value in (slices or {}).items() if value is not None})
+
+        self.projections = []
+        for ax, (x_axis, y_axis, fixed_axis) in zip(axes, PROJECTIONS):
+            artist, cells = self._create_projection(ax, x_axis, y_axis, fixed_axis, positions[fixed_axis])
+            ax.set_xlabel(x_axis)
+            ax.set_ylabel(y_axis)
+            ax.set_title(f"{x_axis}{y_axis} Срез ({fixed_axis} = {positions[fixed_axis]:.2f})")
+            ax.set_xlim(geometry.low[:, AXIS_INDEX[x_axis]].min(), geometry.high[:, AXIS_INDEX[x_axis]].max())
+            ax.set_ylim(geometry.low[:, AXIS_INDEX[y_axis]].min(), geometry.high[:, AXIS_INDEX[y_axis]].max())
+            self.projections.append((artist, cells))
+
+        self.colorbar = self.fig.colorbar(self.projections[0][0], ax=axes, shrink=0.8,
+                                     label=VALUE_LABELS[geometry.format])
+
+    def _create_projection(self, ax, x_axis, y_axis, fixed_axis, position):
+        """Примитив сечения и номера ячеек, значения которых он отображает"""
+        columns = (AXIS_INDEX[x_axis], AXIS_INDEX[y_axis])
+        voxels = self.geometry.voxels
+        if voxels is not None:
+            cells = voxels.cell_slice(fixed_axis, position)
+            if cells is not None:
+                x_edges, y_edges = (voxels.edges[column] for column in columns)
+                # Массив сечения идёт по осям (x, y), QuadMesh ожидает (y, x)
+                artist = ax.pcolormesh(x_edges, y_edges, np.zeros(cells.T.shape), cmap='gray_r', shading='flat')
+                return artist, cells.T
+
+        column = AXIS_INDEX[fixed_axis]
+        cells = np.flatnonzero((self.geometry.low[:, column] <= position) & (self.geometry.high[:, column] >= position))
+        low = self.geometry.low[np.ix_(cells, columns)]
+        high = self.geometry.high[np.ix_(cells, columns)]
+        corners = np.stack((low, np.column_stack((high[:, 0], low[:, 1])),
+                            high, np.column_stack((low[:, 0], high[:, 1]))), axis=1)
+        artist = PolyCollection(corners, cmap='gray_r', edgecolor='k', linewidths=0.3)
+        artist.set_array(np.zeros(len(cells)))
+        ax.add_collection(artist)
+        return artist, cells
+
+    def update(self, values: np.ndarray, iteration: Optional[int]):
+        finite = values[np.isfinite(values)]
+        low, high = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+        for artist, cells in self.projections:
+            frame = np.where(cells >= 0, values[cells], np.nan)
+            artist.set_array(np.ma.masked_invalid(frame))
+            artist.set_clim(low, high)
+        self.title.set_text(f"Итерация {iteration}" if iteration is not None else '')
+
+
+@contextmanager
+def frame_writer(fig, output: str, fps: float, dpi: int):
+    """Потоковая запись кадров: видео через ffmpeg или последовательность PNG.
+
+    Возвращает функцию записи текущего состояния фигуры; кадры не копятся в памяти.
+    """
+    if os.path.splitext(output)[1].lower() in VIDEO_FORMATS:
+        from matplotlib import animation
+
+        if not animation.writers.is_available('ffmpeg'):
+            raise ValueError("Для записи видео нужен ffmpeg; для последовательности PNG укажите каталог")
+        writer = animation.FFMpegWriter(fps=fps)
+        with writer.saving(fig, output, dpi):
+            yield lambda name: writer.grab_frame()
+        return
+
+    os.makedirs(output, exist_ok=True)
+    yield lambda name: fig.savefig(os.path.join(output, f"{name}.png"), dpi=dpi)
+
+
+def render_snapshots(directory: str, output: str, slices: Optional[dict] = None,
+                     watch: bool = False, interval: float = 2.0, idle_timeout: Optional[float] = None,
+                     fps: float = 2.0, dpi: int = 100) -> int:
+    """Кадры по снимкам итераций, возвращает число записанных кадров.
+
+    В режиме наблюдения каталог опрашивается каждые interval секунд, и новые
+    снимки дописываются по мере появления. C# записывает снимок целиком через
+    временный файл, поэтому нечитаемый снимок сообщается и пропускается, а
+    снимок с другим числом ячеек завершает отрисовку ошибкой. Наблюдение
+    завершается через idle_timeout секунд без новых снимков или по Ctrl+C.
+    """
+    rendered = set()
+    skipped = set()
+    renderer = None
+    last_frame = time.monotonic()
+
+    with ExitStack() as stack:
+        try:
+            while True:
+                for path in snapshot_files(directory):
+                    if path in rendered or path in skipped:
+                        continue
+                    try:
+                        if renderer is None:
+                            renderer = FrameRenderer(SnapshotGeometry(path), slices)
+                            grab = stack.enter_context(frame_writer(renderer.fig, output, fps, dpi))
+                        values = renderer.geometry.read_values(path)
+                    except OSError as e:
+                        if not watch:
+                            raise
+                        skipped.add(path)
+                        print(f"Снимок {os.path.basename(path)} пропущен: {e}")
+                        continue
+
+                    iteration = iteration_number(path)
+                    renderer.update(values, iteration)
+                    grab(f"frame_{iteration if iteration is not None else len(rendered):04d}")
+                    rendered.add(path)
+                    last_frame = time.monotonic()
+                    print(f"Кадр {len(rendered)}: {os.path.basename(path)}")
+
+                if not watch or (idle_timeout is not None and time.monotonic() - last_frame >= idle_timeout):
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
+
+    if renderer is not None:
+        plt.close(renderer.fig)
+    return len(rendered)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Анимация хода инверсии по снимкам итераций в формате mesh_data.json или inverse.json',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('directory', help='Каталог снимков итераций')
+    parser.add_argument('-o', '--output', default='InversionFrames',
+                        help=f'Каталог PNG кадров или видео ({", ".join(VIDEO_FORMATS)})')
+    for axis in AXES:
+        parser.add_argument(f'--{axis.lower()}-slice', type=float, help=f'Положение сечения по {axis}; по умолчанию центр')
+    parser.add_argument('-w', '--watch', action='store_true', help='Дописывать кадры по мере появления снимков')
+    parser.add_argument('--interval', type=float, default=2.0, help='Период опроса каталога в режиме наблюдения, с')
+    parser.add_argument('--idle-timeout', type=float, help='Завершить наблюдение после стольких секунд без снимков')
+    parser.add_argument('--fps', type=float, default=2.0, help='Кадров в секунду для видео')
+    parser.add_argument('--dpi', type=int, default=100, help='Разрешение кадров')
+    args = parser.parse_args()
+
+    try:
+        count = render_snapshots(
+            args.directory, args.output,
+            slices={axis: getattr(args, f'{axis.lower()}_slice') for axis in AXES},
+            watch=args.watch, interval=args.interval, idle_timeout=args.idle_timeout,
+            fps=args.fps, dpi=args.dpi
+        )
+        if not count:
+            raise ValueError(f"В каталоге {args.directory} нет снимков итераций")
+        print(f"Сохранено кадров: {count} в {args.output}")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
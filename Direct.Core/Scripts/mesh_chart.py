@@ -1,6 +1,10 @@
 ﻿import json
 import sys
 
+from plot_backend import configure_backend
+
+configure_backend(interactive=False)
+
 import matplotlib.pyplot as plt
 
 json_file = sys.argv[1]
@@ -0,0 +1,168 @@
+import json
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+# Параллелепипедальный КЭ векторного МКЭ всегда содержит 12 рёбер
+EDGES_PER_ELEMENT = 12
+
+# Соответствие плоскостей и осей индексам столбцов массива координат
+PLANE_AXES = {'xy': (0, 1), 'xz': (0, 2), 'yz': (1, 2)}
+AXIS_INDEX = {'X': 0, 'Y': 1, 'Z': 2}
+
+
+@dataclass(frozen=True)
+class MeshModel:
+    """Колоночное представление сетки КЭ.
+
+    nodes         -- (N, 3) координаты уникальных узлов
+    edge_nodes    -- (E, 2) индексы узлов каждого уникального ребра
+    edge_index    -- (E,) глобальные номера рёбер из C# (EdgeIndex)
+    element_edges -- (M, 12) индексы рёбер каждого элемента в локальном порядке C#
+    mu            -- (M,) значение Mu каждого элемента
+    """
+    nodes: np.ndarray
+    edge_nodes: np.ndarray
+    edge_index: np.ndarray
+    element_edges: np.ndarray
+    mu: np.ndarray
+
+    @property
+    def elements_count(self) -> int:
+        return len(self.element_edges)
+
+    @property
+    def edges_count(self) -> int:
+        return len(self.edge_nodes)
+
+    @cached_property
+    def element_nodes(self) -> np.ndarray:
+        """(M, K) индексы уникальных узлов каждого элемента, K = 8 для параллелепипеда"""
+        ids = np.sort(self.edge_nodes[self.element_edges].reshape(self.elements_count, -1), axis=1)
+        keep = np.ones_like(ids, dtype=bool)
+        keep[:, 1:] = ids[:, 1:] != ids[:, :-1]
+        counts = keep.sum(axis=1)
+        if np.any(counts != counts[0]):
+            raise ValueError("Элементы сетки содержат разное количество узлов")
+        return ids[keep].reshape(self.elements_count, counts[0])
+
+    @cached_property
+    def element_bounds(self) -> np.ndarray:
+        """(M, 2, 3) минимальные и максимальные координаты каждого элемента"""
+        coords = self.nodes[self.element_nodes]
+        return np.stack((coords.min(axis=1), coords.max(axis=1)), axis=1)
+
+    @cached_property
+    def box_elements(self) -> np.ndarray:
+        """(M,) признак того, что элемент является параллелепипедом, выровненным по осям"""
+        if self.element_nodes.shape[1] != 8:
+            return np.zeros(self.elements_count, dtype=bool)
+        coords = self.nodes[self.element_nodes]
+        low, high = self.element_bounds[:, 0, None], self.element_bounds[:, 1, None]
+        on_corner = np.isclose(coords, low) | np.isclose(coords, high)
+        return on_corner.all(axis=(1, 2))
+
+    def edge_values(self, values: np.ndarray) -> np.ndarray:
+        """Перенос значений элементов на уникальные рёбра.
+
+        Для рёбер, общих для нескольких элементов, берётся максимальное значение.
+        """
+        result = np.full(self.edges_count, -np.inf)
+        np.maximum.at(result, self.element_edges.ravel(), np.repeat(values, self.element_edges.shape[1]))
+        return result
+
+    def bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """Границы всей расчётной области"""
+        return self.nodes.min(axis=0), self.nodes.max(axis=0)
+
+
+@dataclass(frozen=True)
+class SensorArray:
+    """Колоночное представление сенсоров: (S, 3) координаты и (S,) компоненты поля"""
+    positions: np.ndarray
+    components: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+def build_mesh_model(edge_index: np.ndarray, edge_coords: np.ndarray, mu: np.ndarray) -> MeshModel:
+    """Сборка колоночной сетки из плоских массивов рёбер.
+
+    edge_index  -- (M * 12,) глобальные номера рёбер в порядке обхода элементов
+    edge_coords -- (M * 12, 2, 3) координаты концов каждого ребра
+    mu          -- (M,) значения Mu элементов
+    """
+    mu = np.asarray(mu, dtype=np.float64)
+    if len(mu) == 0:
+        raise ValueError("Файл не содержит элементов для визуализации")
+    if len(edge_index) != len(mu) * EDGES_PER_ELEMENT:
+        raise ValueError(f"Каждый элемент должен содержать {EDGES_PER_ELEMENT} рёбер")
+
+    # Узлы дедуплицируются по координатам, поэтому не зависят от нумерации в C#
+    nodes, node_ids = np.unique(edge_coords.reshape(-1, 3), axis=0, return_inverse=True)
+    node_ids = node_ids.reshape(-1, 2)
+
+    # Ребро однозначно задаётся парой узлов, общие рёбра соседних элементов сливаются
+    pairs = np.sort(node_ids, axis=1)
+    _, first, edge_ids = np.unique(pairs, axis=0, return_index=True, return_inverse=True)
+
+    return MeshModel(
+        nodes=nodes,
+        edge_nodes=node_ids[first],
+        edge_index=np.asarray(edge_index, dtype=np.int64)[first],
+        element_edges=edge_ids.reshape(len(mu), EDGES_PER_ELEMENT),
+        mu=mu
+    )
+
+
+def parse_mesh_model(data: dict) -> tuple[MeshModel, SensorArray]:
+    """Преобразование документа mesh_data.json в колоночные массивы"""
+    elements = data.get('Elements') or []
+    if not elements:
+        raise ValueError("Файл не содержит элементов для визуализации")
+
+    edges = [edge for element in elements for edge in element['Edges']]
+    if len(edges) != len(elements) * EDGES_PER_ELEMENT:
+        raise ValueError(f"Каждый элемент должен содержать {EDGES_PER_ELEMENT} рёбер")
+
+    try:
+        edge_coords = np.array(
+            [[(node['Coordinate']['X'], node['Coordinate']['Y'], node['Coordinate']['Z'])
+              for node in edge['Nodes']]
+             for edge in edges],
+            dtype=np.float64
+        ).reshape(len(edges), 2, 3)
+    except ValueError:
+        raise ValueError("Каждое ребро должно содержать ровно 2 узла")
+
+    mesh = build_mesh_model(
+        edge_index=np.fromiter((edge['EdgeIndex'] for edge in edges), dtype=np.int64, count=len(edges)),
+        edge_coords=edge_coords,
+        mu=np.fromiter((element['Mu'] for element in elements), dtype=np.float64, count=len(elements))
+    )
+
+    sensors_data = data.get('sensors') or []
+    sensors = SensorArray(
+        positions=np.array(
+            [(s['Position']['X'], s['Position']['Y'], s['Position']['Z']) for s in sensors_data],
+            dtype=np.float64
+        ).reshape(-1, 3),
+        components=np.array([s['ComponentDirection'] for s in sensors_data], dtype=str)
+    )
+
+    return mesh, sensors
+
+
+def load_mesh_model(file_path: str) -> tuple[MeshModel, SensorArray]:
+    """Загрузка сетки и сенсоров из JSON файла, созданного в C#"""
+    try:
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"Файл {file_path} не найден")
+    except json.JSONDecodeError:
+        raise ValueError(f"Ошибка парсинга JSON в файле {file_path}")
+
+    return parse_mesh_model(data)
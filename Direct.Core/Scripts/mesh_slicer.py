@@ -0,0 +1,121 @@
+import numpy as np
+
+from box_index import BoxIndex
+from mesh_model import MeshModel
+
+# Критерии выбора видимого прямоугольника среди элементов с общей проекцией
+PROJECTION_MODES = ('max', 'min', 'front')
+
+# Минимальная площадь многоугольника сечения, меньшие считаются вырожденными
+MIN_POLYGON_AREA = 1e-12
+
+
+class MeshSlicer:
+    """Векторизованное сечение сетки КЭ плоскостью, перпендикулярной оси.
+
+    Координаты концов рёбер и индекс габаритов элементов строятся один раз при
+    создании, поэтому каждое сечение обрабатывает только элементы, задевающие
+    плоскость, без циклов по элементам и просмотра всей сетки.
+    """
+
+    def __init__(self, mesh: MeshModel):
+        self.mesh = mesh
+        self._start = mesh.nodes[mesh.edge_nodes[:, 0]]
+        self._end = mesh.nodes[mesh.edge_nodes[:, 1]]
+        self.index = BoxIndex(mesh.element_bounds[:, 0], mesh.element_bounds[:, 1])
+
+    def slice(self, axis_index: int, position: float) -> tuple[np.ndarray, np.ndarray]:
+        """Сечение плоскостью coord[axis_index] = position.
+
+        Возвращает (K, 12, 2) вершины многоугольников сечения в координатах
+        плоскости, упорядоченные по обходу и дополненные повтором последней
+        вершины, и (K,) индексы элементов, которым они принадлежат.
+        """
+        plane_axes = [i for i in range(3) if i != axis_index]
+
+        # Рёбра только тех элементов, габариты которых задевают плоскость
+        candidates = self.index.query_plane(axis_index, position)
+        element_edges = self.mesh.element_edges[candidates]
+        coord1 = self._start[element_edges, axis_index]
+        coord2 = self._end[element_edges, axis_index]
+
+        # Пересечение с плоскостью проверяется для рёбер элементов-кандидатов
+        crossing = (np.minimum(coord1, coord2) <= position) & (position <= np.maximum(coord1, coord2))
+        counts = crossing.sum(axis=1)
+        selected = np.flatnonzero(counts >= 3)
+        element_ids = candidates[selected]
+        if len(element_ids) == 0:
+            return np.empty((0, self.mesh.element_edges.shape[1], 2)), element_ids
+
+        crossing = crossing[selected]
+        counts = counts[selected]
+        coord1, coord2, element_edges = coord1[selected], coord2[selected], element_edges[selected]
+        t = (position - coord1) / (coord2 - coord1 + 1e-9)
+        start = self._start[element_edges][..., plane_axes]
+        points = start + t[..., None] * (self._end[element_edges][..., plane_axes] - start)
+
+        # Сечение выпуклого элемента выпукло, поэтому обход задаётся сортировкой по углу вокруг центра
+        center = (points * crossing[..., None]).sum(axis=1) / counts[:, None]
+        angles = np.arctan2(points[..., 1] - center[:, None, 1], points[..., 0] - center[:, None, 0])
+        angles[~crossing] = np.inf
+        order = np.argsort(angles, axis=1)
+        order = np.take_along_axis(order, np.minimum(np.arange(order.shape[1]), counts[:, None] - 1), axis=1)
+        polygons = np.take_along_axis(points, order[..., None], axis=1)
+
+        # Площадь по формуле Гаусса отсекает вырожденные сечения по ребру или узлу
+        x, y = polygons[..., 0], polygons[..., 1]
+        area = 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+        valid = area > MIN_POLYGON_AREA
+
+        return polygons[valid], element_ids[valid]
+
+
+def project_boxes(mesh: MeshModel, plane_axes: tuple[int, int], mode: str = 'max') -> tuple[np.ndarray, np.ndarray]:
+    """Проекция параллелепипедальных элементов на координатную плоскость.
+
+    Элементы с совпадающим прямоугольником проекции перекрывают друг друга,
+    поэтому из каждой такой группы остаётся один: с максимальным ('max') или
+    минимальным ('min') Mu либо ближайший к наблюдателю ('front', наибольшая
+    координата вдоль отброшенной оси).
+
+    Возвращает (K, 4, 2) вершины прямоугольников в порядке отрисовки и (K,)
+    индексы элементов. Элементы, не являющиеся параллелепипедами, пропускаются.
+    """
+    if mode not in PROJECTION_MODES:
+        raise ValueError(f"Неизвестный режим проекции: {mode}")
+
+    element_ids = np.flatnonzero(mesh.box_elements)
+    if len(element_ids) == 0:
+        return np.empty((0, 4, 2)), element_ids
+
+    bounds = mesh.element_bounds[element_ids]
+    axes = list(plane_axes)
+    depth_axis = next(i for i in range(3) if i not in plane_axes)
+
+    if mode == 'front':
+        key = bounds[:, 1, depth_axis]
+    elif mode == 'max':
+        key = mesh.mu[element_ids]
+    else:
+        key = -mesh.mu[element_ids]
+
+    # Группировка по прямоугольнику проекции и выбор последнего по ключу в группе
+    rects = bounds[:, :, axes].reshape(-1, 4)
+    _, footprint = np.unique(rects, axis=0, return_inverse=True)
+    footprint = footprint.reshape(-1)
+    order = np.lexsort((key, footprint))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = footprint[order][1:] != footprint[order][:-1]
+    chosen = order[last]
+
+    # Частично перекрывающиеся прямоугольники рисуются в порядке возрастания ключа
+    chosen = chosen[np.argsort(key[chosen], kind='stable')]
+    (x0, y0), (x1, y1) = bounds[chosen, 0][:, axes].T, bounds[chosen, 1][:, axes].T
+    rectangles = np.stack((
+        np.column_stack((x0, y0)),
+        np.column_stack((x1, y0)),
+        np.column_stack((x1, y1)),
+        np.column_stack((x0, y1))
+    ), axis=1)
+
+    return rectangles, element_ids[chosen]
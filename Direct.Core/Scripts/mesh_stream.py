@@ -0,0 +1,212 @@
+import argparse
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from mesh_model import EDGES_PER_ELEMENT, MeshModel, SensorArray, build_mesh_model
+from plot_profiler import peak_memory_usage
+
+# Размер блока чтения файла
+CHUNK_SIZE = 4 * 1024 * 1024
+
+# Примерный объём, занимаемый одним элементом в mesh_data.json с Formatting.Indented
+ESTIMATED_ELEMENT_BYTES = 6 * 1024
+
+# Число JSON принимается только вместе с завершающим символом, поэтому
+# оборванный на границе блока токен не совпадёт и будет разобран при следующем чтении
+_NUMBER = r'(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|NaN|-?Infinity)(?=[\s,}\]])'
+
+# Ключи документа, значения которых нужны для построения сетки
+_TOKEN_PATTERN = re.compile(
+    r'"(EdgeIndex|X|Y|Z|Mu|ComponentDirection|sensors)"\s*:\s*'
+    r'(?:"([^"]*)"|' + _NUMBER + r'|(?=\[))'
+)
+
+# Наибольшая длина незавершённого токена "ключ": число в конце блока
+_MAX_TOKEN_CHARS = 256
+
+
+@dataclass(frozen=True)
+class StreamStats:
+    """Сводка потокового чтения"""
+    bytes_read: int
+    elements: int
+    sensors: int
+    elapsed: float
+    peak_memory: Optional[int]
+
+    def __str__(self) -> str:
+        text = (f"Прочитано {self.bytes_read / 2 ** 20:.1f} МБ за {self.elapsed:.2f} с: "
+                f"{self.elements} элементов, {self.sensors} сенсоров")
+        if self.peak_memory is not None:
+            text += f", пиковая память {self.peak_memory / 2 ** 20:.1f} МБ"
+        return text
+
+
+class _GrowingArray:
+    """Предвыделенный массив, увеличивающий ёмкость вдвое при заполнении"""
+
+    def __init__(self, capacity: int, dtype):
+        self._data = np.empty(max(capacity, 16), dtype=dtype)
+        self._size = 0
+
+    def extend(self, values: list):
+        end = self._size + len(values)
+        if end > len(self._data):
+            self._data = np.resize(self._data, max(end, 2 * len(self._data)))
+        self._data[self._size:end] = values
+        self._size = end
+
+    def __len__(self) -> int:
+        return self._size
+
+    def to_array(self) -> np.ndarray:
+        return self._data[:self._size].copy()
+
+
+def _to_float(number: str, text: str) -> float:
+    return float(number if number is not None else text)
+
+
+def read_values_stream(file_path: str, key: str, chunk_size: int = CHUNK_SIZE) -> np.ndarray:
+    """Все числовые значения ключа key в порядке следования в документе.
+
+    Файл читается блоками тем же способом, что и в read_mesh_stream: дерево
+    документа не строится, а в памяти находятся лишь текущий блок и массив
+    значений.
+    """
+    pattern = re.compile(r'"' + re.escape(key) + r'"\s*:\s*' + _NUMBER)
+    values = _GrowingArray(1024, np.float64)
+    buffer = ''
+
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+
+            consumed = 0
+            numbers = []
+            for match in pattern.finditer(buffer):
+                numbers.append(float(match.group(1)))
+                consumed = match.end()
+            values.extend(numbers)
+
+            if not chunk:
+                break
+            # Хвост блока без совпадений может содержать только начало следующего токена
+            buffer = buffer[max(consumed, len(buffer) - _MAX_TOKEN_CHARS):]
+
+    return values.to_array()
+
+
+def read_mesh_stream(
+        file_path: str,
+        chunk_size: int = CHUNK_SIZE,
+        track_memory: bool = False
+) -> tuple[MeshModel, SensorArray, StreamStats]:
+    """Потоковое чтение mesh_data.json без построения дерева документа.
+
+    Файл читается блоками, из каждого блока извлекаются только значения
+    EdgeIndex, координат, Mu и компонент сенсоров, которые сразу переносятся
+    в предвыделенные массивы. В памяти одновременно находятся лишь текущий
+    блок и плоские массивы координат рёбер.
+
+    При track_memory в статистику добавляется пиковая память процесса.
+    """
+    if not os.path.exists(file_path):
+        raise ValueError(f"Файл {file_path} не найден")
+
+    started = time.perf_counter()
+
+    capacity = os.path.getsize(file_path) // ESTIMATED_ELEMENT_BYTES + 1
+    edge_index = _GrowingArray(capacity * EDGES_PER_ELEMENT, np.int64)
+    edge_coords = _GrowingArray(capacity * EDGES_PER_ELEMENT * 6, np.float64)
+    mu = _GrowingArray(capacity, np.float64)
+    sensor_coords = _GrowingArray(1024, np.float64)
+    components = []
+
+    in_sensors = False
+    element_edges = 0
+    bytes_read = 0
+    buffer = ''
+
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            bytes_read += len(chunk)
+            buffer += chunk
+            at_end = not chunk
+
+            chunk_edges, chunk_coords, chunk_mu, chunk_sensors = [], [], [], []
+            consumed = 0
+            for match in _TOKEN_PATTERN.finditer(buffer):
+                key, text, number = match.groups()
+                consumed = match.end()
+
+                if key == 'sensors':
+                    in_sensors = True
+                elif key in ('X', 'Y', 'Z'):
+                    (chunk_sensors if in_sensors else chunk_coords).append(_to_float(number, text))
+                elif key == 'EdgeIndex':
+                    chunk_edges.append(int(number))
+                    element_edges += 1
+                elif key == 'Mu' and not in_sensors:
+                    if element_edges != EDGES_PER_ELEMENT:
+                        raise ValueError(f"Каждый элемент должен содержать {EDGES_PER_ELEMENT} рёбер")
+                    chunk_mu.append(_to_float(number, text))
+                    element_edges = 0
+                elif key == 'ComponentDirection':
+                    components.append(text)
+
+            edge_index.extend(chunk_edges)
+            edge_coords.extend(chunk_coords)
+            mu.extend(chunk_mu)
+            sensor_coords.extend(chunk_sensors)
+            buffer = buffer[consumed:]
+
+            if at_end:
+                break
+
+    if len(edge_coords) != len(edge_index) * 6:
+        raise ValueError("Каждое ребро должно содержать ровно 2 узла")
+
+    mesh = build_mesh_model(
+        edge_index=edge_index.to_array(),
+        edge_coords=edge_coords.to_array().reshape(-1, 2, 3),
+        mu=mu.to_array()
+    )
+    sensors = SensorArray(
+        positions=sensor_coords.to_array().reshape(-1, 3),
+        components=np.array(components, dtype=str)
+    )
+
+    stats = StreamStats(
+        bytes_read=bytes_read,
+        elements=mesh.elements_count,
+        sensors=len(sensors),
+        elapsed=time.perf_counter() - started,
+        peak_memory=peak_memory_usage() if track_memory else None
+    )
+    return mesh, sensors, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Потоковое чтение mesh_data.json с отчётом о потреблении памяти',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('file', nargs='?', default='mesh_data.json', help='Путь к JSON файлу с данными')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Размер блока чтения в символах')
+    args = parser.parse_args()
+
+    try:
+        mesh, sensors, stats = read_mesh_stream(args.file, chunk_size=args.chunk_size, track_memory=True)
+        print(stats)
+        print(f"Уникальных узлов: {len(mesh.nodes)}, уникальных рёбер: {mesh.edges_count}")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -0,0 +1,41 @@
+import os
+
+import matplotlib
+
+import plot_profiler
+
+# Переменная окружения, включающая режим без окон для интерактивных скриптов
+HEADLESS_ENV = 'EM_PLOTS_HEADLESS'
+
+# Backend без GUI: не импортирует Tk/Qt и сразу пишет изображения в файл
+HEADLESS_BACKEND = 'Agg'
+
+
+def is_headless() -> bool:
+    """Включён ли режим без окон через переменную окружения"""
+    return os.environ.get(HEADLESS_ENV, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def configure_backend(interactive: bool = True) -> bool:
+    """Явный выбор backend matplotlib, вызывается до импорта pyplot.
+
+    Скрипты, которые только сохраняют изображения, передают interactive=False
+    и всегда работают на Agg. Интерактивные скрипты переходят на Agg только в
+    режиме без окон. Возвращает True, если выбран backend без GUI.
+    """
+    headless = not interactive or is_headless()
+    if headless:
+        matplotlib.use(HEADLESS_BACKEND)
+    return headless
+
+
+def show_or_save(fig, output_file: str, dpi: int = 300):
+    """Показ окна в интерактивном режиме или сохранение в файл в режиме без окон"""
+    import matplotlib.pyplot as plt
+
+    if matplotlib.get_backend().lower() == HEADLESS_BACKEND.lower():
+        with plot_profiler.stage('save'):
+            fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+        print(f"Сохранено изображение: {output_file}")
+    else:
+        plt.show()
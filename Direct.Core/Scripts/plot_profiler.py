@@ -0,0 +1,168 @@
+import gc
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+# Переменная окружения, включающая запись профиля для всех графиков
+PROFILE_ENV = 'EM_PLOTS_PROFILE'
+
+# Переменная окружения, включающая подсчёт объектов сборщика мусора по этапам. Подсчёт
+# обходит всю кучу и на больших сетках искажает замеры, поэтому по умолчанию выключен
+OBJECTS_ENV = 'EM_PLOTS_PROFILE_OBJECTS'
+
+# Суффикс файла профиля, который пишется рядом с изображением
+SIDECAR_SUFFIX = '.profile.json'
+
+
+@dataclass(frozen=True)
+class StageRecord:
+    """Замер одного этапа построения графика.
+
+    wall        -- астрономическое время этапа, с
+    cpu         -- процессорное время этапа, с
+    peak_memory -- пиковая резидентная память процесса после этапа, байт
+    objects     -- прирост числа объектов, отслеживаемых сборщиком мусора; None без подсчёта объектов
+    """
+    name: str
+    wall: float
+    cpu: float
+    peak_memory: Optional[int]
+    objects: Optional[int]
+
+
+def peak_memory_usage() -> Optional[int]:
+    """Пиковый объём резидентной памяти процесса в байтах, если ОС его сообщает"""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает значение в килобайтах, macOS -- в байтах
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def sidecar_path(output_file: str) -> str:
+    """Путь к файлу профиля рядом с изображением или каталогом изображений"""
+    return os.path.splitext(os.path.normpath(output_file))[0] + SIDECAR_SUFFIX
+
+
+class PlotProfiler:
+    """Профиль построения одного графика по этапам.
+
+    Этапы замеряются в порядке выполнения; повторяющиеся этапы (например,
+    три сечения) записываются отдельно. Счётчики дополняют замеры размерами
+    данных и числом созданных примитивов.
+    """
+
+    def __init__(self, count_objects: bool = False):
+        self.count_objects = count_objects
+        self.stages: list[StageRecord] = []
+        self.counts: dict[str, int] = {}
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str):
+        objects = len(gc.get_objects()) if self.count_objects else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.stages.append(StageRecord(
+                name=name,
+                wall=time.perf_counter() - wall,
+                cpu=time.process_time() - cpu,
+                peak_memory=peak_memory_usage(),
+                objects=len(gc.get_objects()) - objects if objects is not None else None
+            ))
+
+    def count(self, name: str, value: int):
+        self.counts[name] = int(value)
+
+    def to_dict(self) -> dict:
+        return {
+            'wall': time.perf_counter() - self._wall_started,
+            'cpu': time.process_time() - self._cpu_started,
+            'peak_memory': peak_memory_usage(),
+            'stages': [asdict(stage) for stage in self.stages],
+            'counts': self.counts
+        }
+
+    def write_sidecar(self, output_file: str) -> dict:
+        """Запись профиля рядом с результатом, возвращает профиль с путём к файлу"""
+        profile = self.to_dict()
+        profile['file'] = os.path.abspath(sidecar_path(output_file))
+        with open(profile['file'], 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+        return profile
+
+
+# Профиль текущего графика; None, если профилирование выключено
+_active: Optional[PlotProfiler] = None
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def is_enabled() -> bool:
+    """Включено ли профилирование через переменную окружения"""
+    return _env_flag(PROFILE_ENV)
+
+
+def start(enabled: Optional[bool] = None, count_objects: Optional[bool] = None) -> Optional[PlotProfiler]:
+    """Начало профиля графика; без явных enabled и count_objects решение берётся из переменных окружения"""
+    global _active
+    if not (is_enabled() if enabled is None else enabled):
+        _active = None
+        return None
+    _active = PlotProfiler(count_objects=_env_flag(OBJECTS_ENV) if count_objects is None else count_objects)
+    return _active
+
+
+def stage(name: str):
+    """Контекст замера этапа; без активного профиля ничего не делает"""
+    return _active.stage(name) if _active is not None else nullcontext()
+
+
+def count(name: str, value: int):
+    """Счётчик активного профиля, например число элементов или примитивов"""
+    if _active is not None:
+        _active.count(name, value)
+
+
+def finish(output_file: str) -> Optional[dict]:
+    """Завершение профиля: запись файла рядом с результатом и возврат профиля"""
+    global _active
+    profiler, _active = _active, None
+    if profiler is None:
+        return None
+    return profiler.write_sidecar(output_file)
+
+
+def discard():
+    """Сброс профиля без записи, например после ошибки построения"""
+    global _active
+    _active = None
@@ -0,0 +1,149 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional
+
+from render_server import JOBS, RenderServer
+
+# Сервер отрисовки рабочего процесса: библиотеки и кэш данных переиспользуются между файлами
+_server: Optional[RenderServer] = None
+
+
+def expand_inputs(patterns: list[str]) -> list[str]:
+    """Файлы по списку путей и glob-шаблонов без повторов, в порядке перечисления"""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            raise ValueError(f"Шаблон {pattern} не соответствует ни одному файлу")
+        files.extend(os.path.abspath(match) for match in matches)
+    return list(dict.fromkeys(files))
+
+
+def output_paths(job: str, input_files: list[str], output_dir: str) -> list[str]:
+    """Результаты повторяют структуру каталогов входных файлов относительно их общего каталога.
+
+    sweep/s1/mesh_data.json -> <output_dir>/s1/mesh_data.png; для mesh_views
+    результатом является каталог видов.
+    """
+    root = os.path.commonpath([os.path.dirname(path) for path in input_files])
+    suffix = '' if job == 'mesh_views' else os.path.splitext(JOBS[job][2])[1]
+    return [
+        os.path.join(output_dir, os.path.splitext(os.path.relpath(path, root))[0] + suffix)
+        for path in input_files
+    ]
+
+
+def _init_worker(verbose: bool):
+    global _server
+    _server = RenderServer(log=sys.stderr if verbose else open(os.devnull, 'w'))
+
+
+def _render(job: str, input_file: str, output_file: str, options: dict) -> dict:
+    """Отрисовка одного файла в рабочем процессе"""
+    parent = os.path.dirname(output_file)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    response = _server.handle({'job': job, 'input': input_file, 'output': output_file, 'options': options})
+    response['input'] = input_file
+    response.setdefault('output', output_file)
+    return response
+
+
+def render_batch(job: str, input_files: list[str], output_dir: str, options: Optional[dict] = None,
+                 workers: Optional[int] = None, verbose: bool = False, progress=print) -> list[dict]:
+    """Отрисовка файлов на пуле процессов, возвращает ответы по каждому файлу.
+
+    Каждый рабочий процесс держит свой RenderServer без окон, поэтому
+    библиотеки импортируются один раз на процесс, а не на файл. При одном
+    процессе файлы отрисовываются в текущем процессе.
+    """
+    if job not in JOBS:
+        raise ValueError(f"Неизвестный тип графика: {job}")
+    if not input_files:
+        raise ValueError("Не заданы входные файлы")
+
+    options = dict(options or {})
+    if job == 'mesh_views':
+        # Параллельность уже обеспечивается пулом по файлам
+        options.setdefault('workers', 1)
+
+    outputs = output_paths(job, input_files, output_dir)
+    workers = min(len(input_files), workers or os.cpu_count() or 1)
+    results = []
+
+    def report(response: dict):
+        results.append(response)
+        status = f"{response['elapsed']:.2f} с" if response['status'] == 'ok' else f"ошибка: {response['error']}"
+        progress(f"[{len(results)}/{len(input_files)}] {os.path.relpath(response['input'])}: {status}")
+
+    if workers <= 1:
+        _init_worker(verbose)
+        for input_file, output_file in zip(input_files, outputs):
+            report(_render(job, input_file, output_file, options))
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(verbose,)) as executor:
+        futures = {
+            executor.submit(_render, job, input_file, output_file, options): input_file
+            for input_file, output_file in zip(input_files, outputs)
+        }
+        for future in as_completed(futures):
+            try:
+                report(future.result())
+            except Exception as e:
+                # Рабочий процесс завершился аварийно, ответа от сервера нет
+                report({'input': futures[future], 'status': 'error', 'error': str(e), 'elapsed': 0.0})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Пакетная отрисовка графиков по множеству файлов результатов без окон',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('job', choices=list(JOBS), help='Тип графика')
+    parser.add_argument('inputs', nargs='+', help='Входные файлы или glob-шаблоны, например "sweep/**/mesh_data.json"')
+    parser.add_argument('-o', '--output-dir', default='BatchPlots', help='Каталог результатов')
+    parser.add_argument('-j', '--workers', type=int, help='Количество процессов; по умолчанию число ядер')
+    parser.add_argument('--dpi', type=int, default=300, help='Разрешение изображений')
+    parser.add_argument('-x', '--x-slice', type=float, help='Позиция сечения по оси X')
+    parser.add_argument('-y', '--y-slice', type=float, help='Позиция сечения по оси Y')
+    parser.add_argument('-z', '--z-slice', type=float, help='Позиция сечения по оси Z')
+    parser.add_argument('-r', '--resolution', type=int, help='Разрешение сетки интерполяции для contour')
+    parser.add_argument('--report', help='JSON файл с результатами по каждому файлу')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Выводить сообщения скриптов отрисовки')
+    args = parser.parse_args()
+
+    try:
+        files = expand_inputs(args.inputs)
+        options = {
+            name: value for name, value in (
+                ('dpi', args.dpi), ('x_slice', args.x_slice), ('y_slice', args.y_slice),
+                ('z_slice', args.z_slice), ('resolution', args.resolution)
+            ) if value is not None
+        }
+
+        started = time.perf_counter()
+        results = render_batch(args.job, files, args.output_dir, options, args.workers, args.verbose)
+        elapsed = time.perf_counter() - started
+
+        failures = [result for result in results if result['status'] != 'ok']
+        print(f"\nФайлов: {len(results)}, успешно: {len(results) - len(failures)}, с ошибками: {len(failures)}")
+        print(f"Время: {elapsed:.1f} с, производительность: {len(results) / elapsed * 60:.1f} файлов/мин")
+        for failure in failures:
+            print(f"  {failure['input']}: {failure['error']}")
+
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump({'elapsed': elapsed, 'results': results}, f, ensure_ascii=False, indent=2)
+
+        if failures:
+            exit(1)
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
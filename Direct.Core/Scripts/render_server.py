@@ -0,0 +1,253 @@
+import matplotlib
+
+# Сервер только сохраняет изображения, интерактивное окно ему не нужно
+matplotlib.use('Agg')
+
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from typing import Optional
+
+import matplotlib.pyplot as plt
+
+import anomaly_chart
+import contour_plot
+import draw_mesh_script
+import inverse_chart
+import plot_profiler
+import show_plots_script
+import visualize_sensors
+
+# Количество разобранных входных файлов, которые держатся в памяти между заданиями
+DATA_CACHE_SIZE = 8
+
+
+class DataCache:
+    """LRU-кэш разобранных входных файлов.
+
+    Запись считается актуальной, пока у файла не изменились время
+    модификации и размер, поэтому повторные задания по тем же данным
+    не разбирают файл заново.
+    """
+
+    def __init__(self, capacity: int = DATA_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def get(self, loader, file_path: str):
+        file_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            raise ValueError(f"Файл {file_path} не найден")
+
+        key = (loader.__module__, loader.__name__, file_path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        data = loader(file_path)
+        self._entries[key] = (version, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return data
+
+
+def render_mesh(cache: DataCache, input_file: str, output_file: str, options: dict):
+    with plot_profiler.stage('load'):
+        mesh, sensors = cache.get(show_plots_script.load_from_json, input_file)
+    show_plots_script.plot_finite_element_mesh(
+        mesh=mesh,
+        sensors=sensors,
+        x_slice=options.get('x_slice'),
+        y_slice=options.get('y_slice'),
+        z_slice=options.get('z_slice'),
+        projection_mode=options.get('projection_mode', 'max'),
+        output_file=output_file,
+        show=False,
+        show_sensors=options.get('show_sensors', False)
+    )
+
+
+def render_contour(cache: DataCache, input_file: str, output_file: str, options: dict):
+    with plot_profiler.stage('load'):
+        field = cache.get(contour_plot.load_field_data, input_file)
+    grid = contour_plot.interpolate_field(field, options.get('resolution', contour_plot.DEFAULT_RESOLUTION))
+    with plot_profiler.stage('render'):
+        fig = contour_plot.plot_field(field, grid)
+    with plot_profiler.stage('save'):
+        fig.savefig(output_file, dpi=options.get('dpi', 300), bbox_inches='tight')
+
+
+def render_sensors(cache: DataCache, input_file: str, output_file: str, options: dict):
+    with plot_profiler.stage('load'):
+        field = cache.get(visualize_sensors.load_bfield, input_file)
+    with plot_profiler.stage('render'):
+        fig = visualize_sensors.plot_bfield(field, options.get('bin_size'), options.get('decimate', True))
+    with plot_profiler.stage('save'):
+        fig.savefig(output_file, dpi=options.get('dpi', 300), bbox_inches='tight')
+
+
+def render_inverse(cache: DataCache, input_file: str, output_file: str, options: dict):
+    with plot_profiler.stage('load'):
+        cells = cache.get(inverse_chart.load_mesh, input_file)
+    if not cells:
+        raise ValueError(f"Файл {input_file} не содержит ячеек")
+
+    viewer = inverse_chart.InteractiveSliceViewer(cells, show=False)
+    for axis in ('x', 'y', 'z'):
+        if options.get(f'{axis}_slice') is not None:
+            viewer.current_slice[axis] = options[f'{axis}_slice']
+    with plot_profiler.stage('render'):
+        viewer.update_all_plots()
+    with plot_profiler.stage('save'):
+        viewer.fig.savefig(output_file, dpi=options.get('dpi', 300), bbox_inches='tight')
+
+
+def render_anomaly(cache: DataCache, input_file: str, output_file: str, options: dict):
+    with plot_profiler.stage('load'):
+        sensors = cache.get(anomaly_chart.load_sensors, input_file)
+    with plot_profiler.stage('render'):
+        anomaly_chart.plot_sensors(
+            sensors, output_file,
+            max_points=options.get('max_points', anomaly_chart.MAX_RAW_POINTS),
+            bin_pixels=options.get('bin_pixels', anomaly_chart.BIN_PIXELS),
+            dpi=options.get('dpi', 300)
+        )
+
+
+def render_mesh_views(cache: DataCache, input_file: str, output_file: str, options: dict):
+    with plot_profiler.stage('load'):
+        units = cache.get(draw_mesh_script.load_units, input_file)
+    # Виды строятся и сохраняются в рабочих процессах, поэтому этапы не разделяются
+    views = draw_mesh_script.VIEWS + tuple(map(tuple, options.get('views', ())))
+    with plot_profiler.stage('render'):
+        draw_mesh_script.render_views(units, output_file, views, options.get('workers'))
+
+
+# Тип задания -> (обработчик, входной файл по умолчанию, результат по умолчанию)
+JOBS = {
+    'mesh': (render_mesh, 'mesh_data.json', 'graph.png'),
+    'contour': (render_contour, 'field_data.json', 'contour_plot.png'),
+    'sensors': (render_sensors, 'bfield_3d.json', 'sensors_plot.png'),
+    'inverse': (render_inverse, 'inverse.json', 'inverse_chart.png'),
+    'anomaly': (render_anomaly, 'anomaly_data.json', 'anomaly_chart.png'),
+    'mesh_views': (render_mesh_views, 'output.txt', 'OutputPlots')
+}
+
+
+class RenderServer:
+    """Обработчик заданий отрисовки с прогретыми библиотеками и кэшем данных.
+
+    Задание -- JSON объект {"id", "job", "input", "output", "options"},
+    ответ -- JSON объект {"id", "status", "output", "elapsed"} или
+    {"id", "status": "error", "error"}. Задание "shutdown" завершает работу.
+
+    Если профилирование включено параметром задания "profile", флагом
+    --profile или переменной окружения, профиль этапов записывается рядом
+    с результатом и возвращается в поле "profile" ответа.
+    """
+
+    def __init__(self, log=sys.stderr, profile: Optional[bool] = None):
+        self.cache = DataCache()
+        self.log = log
+        self.profile = profile
+
+    def handle(self, request: dict) -> dict:
+        job = request.get('job')
+        response = {'id': request.get('id'), 'job': job}
+        started = time.perf_counter()
+
+        try:
+            if job == 'ping':
+                response['status'] = 'ok'
+                return response
+            if job not in JOBS:
+                raise ValueError(f"Неизвестный тип задания: {job}")
+
+            handler, default_input, default_output = JOBS[job]
+            input_file = request.get('input') or default_input
+            output_file = request.get('output') or default_output
+            options = request.get('options') or {}
+
+            # Сообщения скриптов уходят в журнал, чтобы не смешиваться с ответами протокола
+            plot_profiler.start(options.get('profile', self.profile))
+            with redirect_stdout(self.log):
+                handler(self.cache, input_file, output_file, options)
+
+            response['status'] = 'ok'
+            response['output'] = os.path.abspath(output_file)
+            profile = plot_profiler.finish(output_file)
+            if profile is not None:
+                response['profile'] = profile
+        except Exception as e:
+            plot_profiler.discard()
+            response['status'] = 'error'
+            response['error'] = str(e)
+            traceback.print_exc(file=self.log)
+        finally:
+            plt.close('all')
+            response['elapsed'] = time.perf_counter() - started
+
+        print(f"[render_server] {job}: {response['status']} за {response['elapsed']:.3f} с", file=self.log)
+        return response
+
+    def serve_stream(self, reader, writer):
+        """Обработка заданий построчно из потока до его закрытия или задания shutdown"""
+        for line in reader:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response, request = {'status': 'error', 'error': f"Ошибка парсинга задания: {e}"}, {}
+            else:
+                response = {'id': request.get('id'), 'job': 'shutdown', 'status': 'ok'} \
+                    if request.get('job') == 'shutdown' else self.handle(request)
+
+            writer.write(json.dumps(response, ensure_ascii=False) + '\n')
+            writer.flush()
+
+            if request.get('job') == 'shutdown':
+                return True
+        return False
+
+    def serve_socket(self, host: str, port: int):
+        """Обработка заданий через локальный TCP сокет, соединения обслуживаются по очереди"""
+        with socket.create_server((host, port)) as server:
+            print(f"[render_server] ожидание заданий на {host}:{server.getsockname()[1]}", file=self.log)
+            while True:
+                connection, _ = server.accept()
+                with connection, connection.makefile('r', encoding='utf-8') as reader, \
+                        connection.makefile('w', encoding='utf-8') as writer:
+                    if self.serve_stream(reader, writer):
+                        return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Сервер отрисовки графиков: принимает задания построчно в JSON',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--port', type=int, help='Порт локального сокета; без него задания читаются из stdin')
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес локального сокета')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'Записывать профиль этапов для всех заданий (также {plot_profiler.PROFILE_ENV}=1)')
+    args = parser.parse_args()
+
+    render_server = RenderServer(profile=args.profile or None)
+    if args.port is None:
+        sys.stdin.reconfigure(encoding='utf-8-sig')
+        sys.stdout.reconfigure(encoding='utf-8')
+        render_server.serve_stream(sys.stdin, sys.stdout)
+    else:
+        render_server.serve_socket(args.host, args.port)
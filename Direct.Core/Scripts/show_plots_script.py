@@ -1,106 +1,78 @@
 import argparse
-import json
-from dataclasses import dataclass
-from typing import List, Optional
+from contextlib import nullcontext
+from typing import Optional
+
+import plot_profiler
+from plot_backend import configure_backend, is_headless
+
+configure_backend()
 
 import matplotlib.colors as mcolors
 import matplotlib.pyplot as plt
 import numpy as np
 from matplotlib.cm import ScalarMappable
+from matplotlib.collections import PolyCollection
 from matplotlib.patches import Polygon
-from scipy.spatial import ConvexHull
-
-
-@dataclass(frozen=True)
-class Point3D:
-    X: float
-    Y: float
-    Z: float
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 
+from mesh_model import AXIS_INDEX, PLANE_AXES, MeshModel, SensorArray
+from mesh_slicer import PROJECTION_MODES, MeshSlicer, project_boxes
+from mesh_stream import read_mesh_stream
 
-@dataclass(frozen=True)
-class Sensor:
-    Position: Point3D
-    ComponentDirection: str
 
+# Позиции сечений командной строки по умолчанию; при заданном режиме проекции
+# незаданные оси выводятся проекциями
+SLICE_DEFAULTS = {'x': 0.0, 'y': 0.0, 'z': -9.0}
 
-@dataclass(frozen=True)
-class Node:
-    NodeIndex: int
-    Coordinate: Point3D
 
+def slice_position(text: str) -> Optional[float]:
+    """Позиция сечения из командной строки: число или none для проекции"""
+    return None if text.strip().lower() == 'none' else float(text)
 
-@dataclass
-class Edge:
-    EdgeIndex: int
-    Nodes: List[Node]
 
-
-@dataclass
-class FiniteElement:
-    Edges: List[Edge]
-    Mu: float
-
-
-def load_from_json(file_path: str) -> tuple[List[FiniteElement], List[Sensor]]:
+def load_from_json(file_path: str) -> tuple[MeshModel, SensorArray]:
     """Загрузка данных из JSON файла, созданного в C#"""
-    try:
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        raise ValueError(f"Файл {file_path} не найден")
-    except json.JSONDecodeError:
-        raise ValueError(f"Ошибка парсинга JSON в файле {file_path}")
-
-    elements = []
-    for element in data['Elements']:
-        edges = []
-        for edge_data in element['Edges']:
-            nodes = []
-            for node_data in edge_data['Nodes']:
-                coord_data = node_data['Coordinate']
-                node = Node(
-                    NodeIndex=node_data['NodeIndex'],
-                    Coordinate=Point3D(
-                        X=coord_data['X'],
-                        Y=coord_data['Y'],
-                        Z=coord_data['Z']
-                    )
-                )
-                nodes.append(node)
-            edges.append(Edge(
-                EdgeIndex=edge_data['EdgeIndex'],
-                Nodes=nodes
-            ))
-        elements.append(FiniteElement(Edges=edges, Mu=element['Mu']))
-
-    sensors = []
-    for sensor_data in data['sensors']:
-        pos_data = sensor_data['Position']
-        sensors.append(Sensor(
-            Position=Point3D(
-                X=pos_data['X'],
-                Y=pos_data['Y'],
-                Z=pos_data['Z']
-            ),
-            ComponentDirection=sensor_data['ComponentDirection']
-        ))
-
-    if not elements:
-        raise ValueError("Файл не содержит элементов для визуализации")
-
-    return elements, sensors
+    mesh, sensors, stats = read_mesh_stream(file_path)
+    plot_profiler.count('elements', mesh.elements_count)
+    plot_profiler.count('sensors', len(sensors))
+    plot_profiler.count('bytes_read', stats.bytes_read)
+    return mesh, sensors
+
+
+def draw_wireframe(ax3d, mesh: MeshModel, cmap, norm) -> int:
+    """Отрисовка каркаса сетки одной коллекцией линий.
+
+    Каждое общее ребро рисуется один раз, цвет берётся по максимальному Mu
+    среди соседних элементов. Возвращает количество нарисованных примитивов.
+    """
+    segments = mesh.nodes[mesh.edge_nodes]
+    collection = Line3DCollection(
+        segments,
+        colors=cmap(norm(mesh.edge_values(mesh.mu))),
+        alpha=0.7,
+        linewidths=1.5
+    )
+    ax3d.add_collection3d(collection)
+    return len(segments)
 
 
 def plot_finite_element_mesh(
-        elements: List[FiniteElement],
-        sensors: List[Sensor],
+        mesh: MeshModel,
+        sensors: SensorArray,
         x_slice: Optional[float] = None,
         y_slice: Optional[float] = None,
-        z_slice: Optional[float] = None
+        z_slice: Optional[float] = None,
+        projection_mode: str = 'max',
+        output_file: Optional[str] = "graph.png",
+        show: bool = True,
+        show_sensors: bool = False
 ):
-    """Основная функция визуализации с поддержкой сечений и 2D проекций"""
-    if not elements:
+    """Основная функция визуализации с поддержкой сечений и 2D проекций.
+
+    При output_file=None изображение не сохраняется, фигура только возвращается.
+    При show_sensors сенсоры выводятся на 3D виде, сенсоры вне сетки отмечаются отдельно.
+    """
+    if mesh.elements_count == 0:
         raise ValueError("Нет элементов для визуализации")
 
     fig = plt.figure(figsize=(18, 12))
@@ -115,19 +87,12 @@ def plot_finite_element_mesh(
     ax_bottom_right = fig.add_subplot(gs[1, 1])
 
     # Настройка цветовой карты
-    mues = [el.Mu for el in elements]
-    norm = plt.Normalize(min(mues), max(mues))
+    norm = plt.Normalize(mesh.mu.min(), mesh.mu.max())
     cmap = plt.get_cmap('RdYlGn_r')
     mappable = ScalarMappable(norm=norm, cmap=cmap)
 
     # Расчет границ с автоматическим padding
-    all_coords = np.array([(node.Coordinate.X, node.Coordinate.Y, node.Coordinate.Z)
-                           for element in elements
-                           for edge in element.Edges
-                           for node in edge.Nodes])
-
-    min_vals = all_coords.min(axis=0)
-    max_vals = all_coords.max(axis=0)
+    min_vals, max_vals = mesh.bounds()
     ranges = max_vals - min_vals
     max_range = np.max(ranges)
     padding = 0.1 * max_range  # 10% от максимального размера
@@ -143,27 +108,30 @@ def plot_finite_element_mesh(
     ax3d.set_ylim(min_vals[1] - padding, max_vals[1] + padding)
     ax3d.set_zlim(min_vals[2] - padding, max_vals[2] + padding)
 
+    # Индекс габаритов элементов общий для сечений и поиска элементов сенсоров
+    slicer = MeshSlicer(mesh)
+
     # 3D визуализация
-    # if sensors:
-    #     sensor_coords = np.array([[s.Position.X, s.Position.Y, s.Position.Z] for s in sensors])
-    #     ax3d.scatter(
-    #         sensor_coords[:, 0], sensor_coords[:, 1], sensor_coords[:, 2],
-    #         c='red', marker='o', s=50, edgecolors='black',
-    #         linewidths=0.3, label='Sensors', alpha=0.3
-    #     )
-
-    for element in elements:
-        color = cmap(norm(element.Mu))
-        for edge in element.Edges:
-            if len(edge.Nodes) != 2:
-                continue
-            n1, n2 = edge.Nodes
-            ax3d.plot(
-                [n1.Coordinate.X, n2.Coordinate.X],
-                [n1.Coordinate.Y, n2.Coordinate.Y],
-                [n1.Coordinate.Z, n2.Coordinate.Z],
-                color=color, alpha=0.7, linewidth=1.5
-            )
+    if show_sensors and len(sensors):
+        sensor_coords = sensors.positions
+        # В точках вне сетки SensorEvaluator возвращает нулевое поле
+        with plot_profiler.stage('sensors'):
+            outside = slicer.index.locate(sensor_coords) < 0
+        outside_count = int(np.count_nonzero(outside))
+        plot_profiler.count('sensors_outside', outside_count)
+        for mask, color, marker, label in ((~outside, 'red', 'o', 'Sensors'),
+                                           (outside, 'gray', 's', f'Sensors outside mesh ({outside_count})')):
+            if mask.any():
+                ax3d.scatter(
+                    sensor_coords[mask, 0], sensor_coords[mask, 1], sensor_coords[mask, 2],
+                    c=color, marker=marker, s=50, edgecolors='black',
+                    linewidths=0.3, label=label, alpha=0.3
+                )
+        ax3d.legend(loc='upper left')
+
+    with plot_profiler.stage('wireframe'):
+        primitives = draw_wireframe(ax3d, mesh, cmap, norm)
+    plot_profiler.count('wireframe_segments', primitives)
 
     # Оформление 3D
     ax3d.xaxis.set_pane_color((0.95, 0.95, 0.95, 0.1))
@@ -187,58 +155,50 @@ def plot_finite_element_mesh(
                'y': (min_vals[2] - padding, max_vals[2] + padding)}
     }
 
-    def get_element_nodes(element: FiniteElement) -> List[Node]:
-        nodes = []
-        for edge in element.Edges:
-            for node in edge.Nodes:
-                if node not in nodes:
-                    nodes.append(node)
-        return nodes
-
     def draw_projection(ax, plane: str):
         ax.cla()
         ax.set_title(f"{plane.upper()} Projection")
         ax.grid(True, linestyle='--', alpha=0.3)
 
-        for element in elements:
-            color = cmap(norm(element.Mu))
-            nodes = get_element_nodes(element)
-            coords = []
-            for node in nodes:
-                if plane == 'xy':
-                    x, y = node.Coordinate.X, node.Coordinate.Y
-                elif plane == 'xz':
-                    x, y = node.Coordinate.X, node.Coordinate.Z
-                else:
-                    x, y = node.Coordinate.Y, node.Coordinate.Z
-                coords.append((x, y))
-
-            if len(coords) >= 3:
-                try:
-                    hull = ConvexHull(coords)
-                    poly = Polygon(
-                        np.array(coords)[hull.vertices],
-                        closed=True,
-                        facecolor=color,
-                        edgecolor='k',
-                        alpha=1
-                    )
-                    ax.add_patch(poly)
-                except:
-                    for edge in element.Edges:
-                        if len(edge.Nodes) != 2:
-                            continue
-                        n1, n2 = edge.Nodes
-                        if plane == 'xy':
-                            x1, y1 = n1.Coordinate.X, n1.Coordinate.Y
-                            x2, y2 = n2.Coordinate.X, n2.Coordinate.Y
-                        elif plane == 'xz':
-                            x1, y1 = n1.Coordinate.X, n1.Coordinate.Z
-                            x2, y2 = n2.Coordinate.X, n2.Coordinate.Z
-                        else:
-                            x1, y1 = n1.Coordinate.Y, n1.Coordinate.Z
-                            x2, y2 = n2.Coordinate.Y, n2.Coordinate.Z
-                        ax.plot([x1, x2], [y1, y2], color=color, linewidth=1)
+        # Быстрый путь для параллелепипедов: один прямоугольник на проекцию, одна коллекция
+        with plot_profiler.stage(f'projection_{plane}'):
+            rectangles, element_ids = project_boxes(mesh, PLANE_AXES[plane], projection_mode)
+        plot_profiler.count(f'projection_{plane}_rectangles', len(rectangles))
+        ax.add_collection(PolyCollection(
+            rectangles,
+            facecolors=cmap(norm(mesh.mu[element_ids])),
+            edgecolors='k',
+            alpha=1
+        ))
+
+        # Элементы произвольной формы проецируются через выпуклую оболочку,
+        # scipy импортируется только если такие элементы есть
+        irregular = np.flatnonzero(~mesh.box_elements)
+        if len(irregular):
+            from scipy.spatial import ConvexHull, QhullError
+
+        plane_axes = list(PLANE_AXES[plane])
+        with plot_profiler.stage(f'hulls_{plane}') if len(irregular) else nullcontext():
+            for element_index in irregular:
+                color = cmap(norm(mesh.mu[element_index]))
+                coords = mesh.nodes[mesh.element_nodes[element_index]][:, plane_axes]
+
+                if len(coords) >= 3:
+                    try:
+                        hull = ConvexHull(coords)
+                        poly = Polygon(
+                            coords[hull.vertices],
+                            closed=True,
+                            facecolor=color,
+                            edgecolor='k',
+                            alpha=1
+                        )
+                        ax.add_patch(poly)
+                    except (QhullError, ValueError):
+                        # Вырожденная проекция (точки на одной прямой) выводится рёбрами
+                        edge_nodes = mesh.edge_nodes[mesh.element_edges[element_index]]
+                        for (x1, y1), (x2, y2) in mesh.nodes[:, plane_axes][edge_nodes]:
+                            ax.plot([x1, x2], [y1, y2], color=color, linewidth=1)
 
         ax.set_xlim(bounds[plane]['x'])
         ax.set_ylim(bounds[plane]['y'])
@@ -253,42 +213,15 @@ def plot_finite_element_mesh(
         ax.set_title(f"Сечение по {axis}={position:.2f}")
         ax.grid(True, linestyle='dotted', alpha=0.5)
 
-        for element in elements:
-            color = cmap(norm(element.Mu))
-            points = []
-            for edge in element.Edges:
-                if len(edge.Nodes) != 2:
-                    continue
-                n1, n2 = edge.Nodes
-                coord1 = getattr(n1.Coordinate, axis)
-                coord2 = getattr(n2.Coordinate, axis)
-
-                if (coord1 <= position <= coord2) or (coord2 <= position <= coord1):
-                    t = (position - coord1) / (coord2 - coord1 + 1e-9)
-                    x = n1.Coordinate.X + t * (n2.Coordinate.X - n1.Coordinate.X)
-                    y = n1.Coordinate.Y + t * (n2.Coordinate.Y - n1.Coordinate.Y)
-                    z = n1.Coordinate.Z + t * (n2.Coordinate.Z - n1.Coordinate.Z)
-
-                    if axis == 'X':
-                        points.append((y, z))
-                    elif axis == 'Y':
-                        points.append((x, z))
-                    else:
-                        points.append((x, y))
-
-            if len(points) >= 3:
-                try:
-                    hull = ConvexHull(points)
-                    poly = Polygon(
-                        np.array(points)[hull.vertices],
-                        closed=True,
-                        facecolor=color,
-                        edgecolor='k',
-                        alpha=1
-                    )
-                    ax.add_patch(poly)
-                except:
-                    continue
+        with plot_profiler.stage(f'slice_{axis.lower()}'):
+            polygons, element_ids = slicer.slice(AXIS_INDEX[axis], position)
+        plot_profiler.count(f'slice_{axis.lower()}_polygons', len(polygons))
+        ax.add_collection(PolyCollection(
+            polygons,
+            facecolors=cmap(norm(mesh.mu[element_ids])),
+            edgecolors='k',
+            alpha=1
+        ))
 
         ax.autoscale_view()
         ax.set_aspect('equal')
@@ -316,8 +249,12 @@ def plot_finite_element_mesh(
     cbar_ax = fig.add_axes([0.90, 0.15, 0.02, 0.7])
     fig.colorbar(mappable, cax=cbar_ax, label='Mu')
 
-    plt.savefig("graph.png", dpi=300, bbox_inches='tight')
-    plt.show()
+    if output_file is not None:
+        with plot_profiler.stage('save'):
+            plt.savefig(output_file, dpi=300, bbox_inches='tight')
+    if show and not is_headless():
+        plt.show()
+    return fig
 
 
 if __name__ == "__main__":
@@ -332,31 +269,64 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         '-x', '--x-slice',
-        type=float,
-        help='Позиция сечения по оси X'
+        type=slice_position,
+        default=argparse.SUPPRESS,
+        help='Позиция сечения по оси X или none для проекции YZ; '
+             'по умолчанию 0, а при заданном -p -- проекция'
     )
     parser.add_argument(
         '-y', '--y-slice',
-        type=float,
-        help='Позиция сечения по оси Y'
+        type=slice_position,
+        default=argparse.SUPPRESS,
+        help='Позиция сечения по оси Y или none для проекции XZ; '
+             'по умолчанию 0, а при заданном -p -- проекция'
     )
     parser.add_argument(
         '-z', '--z-slice',
-        type=float,
-        help='Позиция сечения по оси Z'
+        type=slice_position,
+        default=argparse.SUPPRESS,
+        help='Позиция сечения по оси Z или none для проекции XY; '
+             'по умолчанию -9, а при заданном -p -- проекция'
+    )
+    parser.add_argument(
+        '-p', '--projection-mode',
+        choices=PROJECTION_MODES,
+        default=argparse.SUPPRESS,
+        help='Какой элемент показывать в проекции: с max/min Mu или ближайший (front); по умолчанию max. '
+             'Оси без заданного сечения выводятся проекциями'
+    )
+    parser.add_argument(
+        '-s', '--sensors',
+        action='store_true',
+        help='Показать сенсоры на 3D виде, отметив сенсоры вне сетки'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help=f'Записать профиль этапов рядом с изображением (также включается {plot_profiler.PROFILE_ENV}=1)'
     )
 
     args = parser.parse_args()
+    projection_mode = getattr(args, 'projection_mode', None)
+    slices = {
+        axis: getattr(args, f'{axis}_slice', None if projection_mode else default)
+        for axis, default in SLICE_DEFAULTS.items()
+    }
 
     try:
-        elements, sensors = load_from_json("mesh_data.json")
+        plot_profiler.start(args.profile or None)
+        with plot_profiler.stage('load'):
+            mesh, sensors = load_from_json(args.file)
         plot_finite_element_mesh(
-            elements=elements,
+            mesh=mesh,
             sensors=sensors,
-            x_slice=0,
-            y_slice=0,
-            z_slice=-9
+            x_slice=slices['x'],
+            y_slice=slices['y'],
+            z_slice=slices['z'],
+            projection_mode=projection_mode or 'max',
+            show_sensors=args.sensors
         )
+        plot_profiler.finish("graph.png")
     except Exception as e:
         print(f"\nОшибка: {str(e)}")
         exit(1)
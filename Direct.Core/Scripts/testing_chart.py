@@ -1,8 +1,15 @@
 import json
 
+from plot_backend import configure_backend
+
+configure_backend(interactive=False)
+
 import matplotlib.pyplot as plt
+import numpy as np
 from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 
+from voxel_grid import box_faces, boundary_faces, build_voxel_grid, cell_arrays
+
 
 # 📂 Загрузка Mesh из файла
 def load_mesh(filepath):
@@ -10,60 +17,37 @@ def load_mesh(filepath):
         data = json.load(f)
     return data['Cells']
 
-# 🎨 Получение цвета по плотности
-def density_to_color(density, min_d, max_d):
-    norm = (density - min_d) / (max_d - min_d + 1e-9)
-    return (0, 0, 0, norm)  # Черный цвет с разной прозрачностью
-
-# 🔳 Генерация границ ячейки по центру и размерам
-def get_box(center, bounds):
-    cx, cy, cz = center
-    dx, dy, dz = bounds
-
-    # Вершины куба
-    x = [cx - dx, cx + dx]
-    y = [cy - dy, cy + dy]
-    z = [cz - dz, cz + dz]
-
-    # Грани
-    return [
-        [(x[0], y[0], z[0]), (x[1], y[0], z[0]), (x[1], y[1], z[0]), (x[0], y[1], z[0])],  # Нижняя
-        [(x[0], y[0], z[1]), (x[1], y[0], z[1]), (x[1], y[1], z[1]), (x[0], y[1], z[1])],  # Верхняя
-        [(x[0], y[0], z[0]), (x[0], y[1], z[0]), (x[0], y[1], z[1]), (x[0], y[0], z[1])],  # Левая
-        [(x[1], y[0], z[0]), (x[1], y[1], z[0]), (x[1], y[1], z[1]), (x[1], y[0], z[1])],  # Правая
-        [(x[0], y[0], z[0]), (x[1], y[0], z[0]), (x[1], y[0], z[1]), (x[0], y[0], z[1])],  # Передняя
-        [(x[0], y[1], z[0]), (x[1], y[1], z[0]), (x[1], y[1], z[1]), (x[0], y[1], z[1])],  # Задняя
-    ]
+# 🎨 Прозрачность граней по плотности: черный цвет, непрозрачнее при большей плотности
+def density_to_alpha(densities, min_d, max_d):
+    return np.clip((densities - min_d) / (max_d - min_d + 1e-9), 0.0, 1.0)
 
 # 📊 Основная функция визуализации
-def plot_mesh(cells):
+def plot_mesh(cells, max_faces=None):
     fig = plt.figure()
     ax = fig.add_subplot(111, projection='3d')
 
-    densities = [cell["Density"] for cell in cells]
-    min_d = min(densities)
-    max_d = max(densities)
+    low, high, densities = cell_arrays(cells)
+    min_d = densities.min()
+    max_d = densities.max()
 
-    for cell in cells:
-        center = (cell["CenterX"], cell["CenterY"], cell["CenterZ"])
-        bounds = (cell["BoundX"], cell["BoundY"], cell["BoundZ"])
-        color = density_to_color(cell["Density"], min_d, max_d)
+    # Одна коллекция граней: для сетки ячеек только внешние грани и границы классов плотности,
+    # max_faces ограничивает число граней укрупнением сетки
+    grid = build_voxel_grid(low, high, densities)
+    faces = boundary_faces(grid, max_faces=max_faces) if grid is not None else box_faces(low, high, densities)
+    colors = np.zeros((len(faces), 4))
+    colors[:, 3] = density_to_alpha(faces.values, min_d, max_d)
 
-        box = get_box(center, bounds)
-        cube = Poly3DCollection(box, facecolors=color, edgecolors='gray', linewidths=0.1)
-        ax.add_collection3d(cube)
+    cube = Poly3DCollection(faces.vertices, facecolors=colors, edgecolors='gray', linewidths=0.1)
+    ax.add_collection3d(cube)
 
     ax.set_xlabel('X')
     ax.set_ylabel('Y')
     ax.set_zlabel('Z')
 
     ax.auto_scale_xyz(
-        [min(cell["CenterX"] - cell["BoundX"] for cell in cells),
-         max(cell["CenterX"] + cell["BoundX"] for cell in cells)],
-        [min(cell["CenterY"] - cell["BoundY"] for cell in cells),
-         max(cell["CenterY"] + cell["BoundY"] for cell in cells)],
-        [min(cell["CenterZ"] - cell["BoundZ"] for cell in cells),
-         max(cell["CenterZ"] + cell["BoundZ"] for cell in cells)]
+        [low[:, 0].min(), high[:, 0].max()],
+        [low[:, 1].min(), high[:, 1].max()],
+        [low[:, 2].min(), high[:, 2].max()]
     )
 
     plt.savefig('mesh_chart.png', dpi=300, bbox_inches='tight')
@@ -1,4 +1,9 @@
 import json
+
+from plot_backend import configure_backend, show_or_save
+
+configure_backend()
+
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Button
 import numpy as np
@@ -11,28 +16,42 @@ with open("solution.json", "r") as f:
     data = json.load(f)
 
 # === Преобразование в массивы ===
-points = np.array([[d["x"], d["y"], d["z"]] for d in data])
-directions = np.array([[d["dx"], d["dy"], d["dz"]] for d in data])
+points = np.array([[d["x"], d["y"], d["z"]] for d in data]).reshape(-1, 3)
+directions = np.array([[d["dx"], d["dy"], d["dz"]] for d in data]).reshape(-1, 3)
 values = np.array([d["value"] for d in data])
 
-z_levels = sorted(np.unique(points[:, 2]))
+# === Индекс z-уровней ===
+# Рёбра один раз сортируются по z, и данные каждого уровня -- непрерывный срез
+order = np.argsort(points[:, 2], kind='stable')
+points, directions, values = points[order], directions[order], values[order]
+arrows = np.column_stack((directions[:, 0] * values, directions[:, 1] * values))
+
+# Уровень начинается там, где z отличается от предыдущего больше допуска
+starts = np.flatnonzero(np.diff(points[:, 2], prepend=-np.inf) >= Z_TOLERANCE)
+level_offsets = np.append(starts, len(points))
+z_levels = points[starts, 2]
 z_index = 0  # индекс текущего z-уровня
 
-# === Функция для фильтрации и отображения ===
+# Стрелки всех уровней выводятся одним quiver размером с наибольший уровень,
+# лишние стрелки скрываются маской
+max_level_size = int(np.diff(level_offsets).max()) if len(z_levels) else 0
+
+# === Функция для отображения уровня ===
 def plot_z_level(index):
-    global quiver
-    z = z_levels[index]
-    mask = np.abs(points[:, 2] - z) < Z_TOLERANCE
-    x = points[mask, 0]
-    y = points[mask, 1]
-    u = directions[mask, 0] * values[mask]
-    v = directions[mask, 1] * values[mask]
-
-    ax.clear()
-    ax.set_title(f"Срез по Z = {z:.2f}")
-    ax.set_xlabel("X")
-    ax.set_ylabel("Y")
-    ax.quiver(x, y, u, v, values[mask], cmap="grey", scale=1, scale_units='xy')
+    level = slice(level_offsets[index], level_offsets[index + 1])
+    count = level.stop - level.start
+
+    offsets = np.empty((max_level_size, 2))
+    offsets[:count] = points[level, :2]
+    offsets[count:] = points[level.start, :2]
+    u, v, c = (np.ma.masked_all(max_level_size) for _ in range(3))
+    u[:count], v[:count] = arrows[level, 0], arrows[level, 1]
+    c[:count] = values[level]
+
+    quiver.set_offsets(offsets)
+    quiver.set_UVC(u, v, c)
+    quiver.autoscale()
+    ax.set_title(f"Срез по Z = {z_levels[index]:.2f}")
     fig.canvas.draw_idle()
 
 # === Обработчики кнопок ===
@@ -51,6 +70,15 @@ def prev_z(event):
 # === Построение интерфейса ===
 fig, ax = plt.subplots()
 plt.subplots_adjust(bottom=0.2)
+ax.set_xlabel("X")
+ax.set_ylabel("Y")
+
+# Оси охватывают все уровни, чтобы масштаб не менялся при переключении
+quiver = ax.quiver(np.zeros(max_level_size), np.zeros(max_level_size),
+                   np.zeros(max_level_size), np.zeros(max_level_size), np.zeros(max_level_size),
+                   cmap="grey", scale=1, scale_units='xy')
+ax.update_datalim(points[:, :2])
+ax.autoscale_view()
 
 # Кнопка вверх
 ax_next = plt.axes([0.8, 0.05, 0.1, 0.075])
@@ -63,4 +91,4 @@ btn_prev = Button(ax_prev, '↓ Z')
 btn_prev.on_clicked(prev_z)
 
 plot_z_level(z_index)  # начальный срез
-plt.show()
+show_or_save(fig, "potential_2d.png")
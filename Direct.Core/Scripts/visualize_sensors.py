@@ -1,29 +1,115 @@
-﻿import json
+﻿import argparse
+import json
+
+import numpy as np
+
+import plot_profiler
+from plot_backend import configure_backend, show_or_save
+
+configure_backend()
+
 import matplotlib.pyplot as plt
 
+# Компоненты записи bfield_3d.json, которые используются при построении
+FIELD_KEYS = ('x', 'y', 'bx', 'by', 'bz')
+
+# Расстояние между стрелками после прореживания в пунктах (1/72 дюйма), как и размеры маркеров,
+# поэтому плотность стрелок на изображении не зависит от dpi
+ARROW_SPACING = 12
+
+
 # Загрузка данных
-with open("bfield_3d.json") as f:
-    data = json.load(f)
+def load_bfield(file_path):
+    with open(file_path) as f:
+        data = json.load(f)
+
+    # Извлечение данных одним проходом в массив (N, 5)
+    values = np.array([[d[key] for key in FIELD_KEYS] for d in data], dtype=float).reshape(-1, len(FIELD_KEYS))
+    return {key: values[:, i] for i, key in enumerate(FIELD_KEYS)}
+
+
+# Прореживание: одна усреднённая стрелка на пространственную ячейку
+def decimate_field(field, bin_size):
+    """Среднее (bx, by, bz) сенсоров каждой квадратной ячейки со стороной bin_size.
+
+    Стрелка ячейки ставится в центр масс её сенсоров, поэтому ячейка из
+    одного сенсора воспроизводит его без изменений. Сенсоры с наибольшим и
+    наименьшим модулем поля добавляются без усреднения, чтобы прореживание
+    не срезало экстремумы.
+    """
+    if bin_size <= 0:
+        raise ValueError("Размер ячейки прореживания должен быть положительным")
+
+    x, y = field['x'], field['y']
+    columns = ((x - x.min()) // bin_size).astype(np.int64)
+    rows = ((y - y.min()) // bin_size).astype(np.int64)
+    _, cells = np.unique(rows * (columns.max() + 1) + columns, return_inverse=True)
+    cells = cells.ravel()
+
+    counts = np.bincount(cells)
+    decimated = {key: np.bincount(cells, weights=field[key]) / counts for key in FIELD_KEYS}
+
+    magnitude = np.sqrt(field['bx'] ** 2 + field['by'] ** 2 + field['bz'] ** 2)
+    extremes = np.unique([np.argmax(magnitude), np.argmin(magnitude)])
+    return {key: np.concatenate((decimated[key], field[key][extremes])) for key in FIELD_KEYS}
+
+
+def _bin_size(fig, ax, field):
+    """Сторона ячейки прореживания по размеру области осей в пунктах"""
+    width, height = ax.get_position().size * fig.get_size_inches() * 72
+    span = max(np.ptp(field['x']) / max(width, 1), np.ptp(field['y']) / max(height, 1))
+    return span * ARROW_SPACING
 
-# Извлечение данных
-x = [d["x"] for d in data]
-y = [d["y"] for d in data]
-bx = [d["bx"] for d in data]
-by = [d["by"] for d in data]
-bz = [d["bz"] for d in data]
 
 # Визуализация: цвет — Bz, стрелки — (bx, by)
-plt.figure(figsize=(10, 8))
-sc = plt.scatter(x, y, c=bz, cmap='seismic', s=80)
-plt.colorbar(sc, label="B_z (T)")
-
-# Стрелки
-plt.quiver(x, y, bx, by, color='black', scale=5)
-
-plt.title("Сенсоры: цвет = Bz, стрелки = (Bx, By)")
-plt.xlabel("X")
-plt.ylabel("Y")
-plt.axis("equal")
-plt.grid(True)
-plt.tight_layout()
-plt.show()
+def plot_bfield(field, bin_size=None, decimate=True):
+    fig = plt.figure(figsize=(10, 8))
+    ax = plt.gca()
+
+    shown = field
+    if decimate and len(field['x']) > 1:
+        bin_size = bin_size or _bin_size(fig, ax, field)
+        if bin_size > 0:
+            shown = decimate_field(field, bin_size)
+
+    # Шкала цвета по исходным значениям, чтобы усреднение не сужало диапазон
+    sc = plt.scatter(shown['x'], shown['y'], c=shown['bz'], cmap='seismic', s=80,
+                     vmin=field['bz'].min(), vmax=field['bz'].max())
+    plt.colorbar(sc, label="B_z (T)")
+
+    # Стрелки
+    plt.quiver(shown['x'], shown['y'], shown['bx'], shown['by'], color='black', scale=5)
+
+    plt.title("Сенсоры: цвет = Bz, стрелки = (Bx, By)")
+    plt.xlabel("X")
+    plt.ylabel("Y")
+    plt.axis("equal")
+    plt.grid(True)
+    plt.tight_layout()
+    return fig
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Сенсоры магнитного поля по bfield_3d.json',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--file', default='bfield_3d.json', help='Путь к JSON файлу поля')
+    parser.add_argument('-b', '--bin-size', type=float,
+                        help=f'Сторона ячейки прореживания; по умолчанию {ARROW_SPACING} пунктов изображения')
+    parser.add_argument('--no-decimate', action='store_true', help='Рисовать стрелку каждого сенсора')
+    args = parser.parse_args()
+
+    try:
+        plot_profiler.start()
+        with plot_profiler.stage('load'):
+            field = load_bfield(args.file)
+        if not len(field['x']):
+            raise ValueError(f"Файл {args.file} не содержит сенсоров")
+        with plot_profiler.stage('render'):
+            fig = plot_bfield(field, args.bin_size, not args.no_decimate)
+        show_or_save(fig, "sensors_plot.png")
+        plot_profiler.finish("sensors_plot.png")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -0,0 +1,260 @@
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# Оси ячеек inverse.json и соответствующие индексы осей массива плотности
+AXES = ('X', 'Y', 'Z')
+AXIS_INDEX = {axis: index for index, axis in enumerate(AXES)}
+
+# Относительный допуск, с которым границы ячеек считаются совпадающими
+EDGE_TOLERANCE = 1e-9
+
+# Предельное отношение числа вокселей к числу ячеек; при большем ячейки не образуют сетку
+MAX_VOXELS_PER_CELL = 8
+
+# Число классов плотности, границы между которыми выводятся в 3D виде
+DENSITY_CLASSES = 10
+
+
+@dataclass(frozen=True)
+class VoxelGrid:
+    """Плотность ячеек inverse.json на прямоугольной (rectilinear) сетке вокселей.
+
+    Границы вокселей -- объединение границ всех ячеек по каждой оси, поэтому
+    на регулярной сетке каждая ячейка занимает ровно один воксель, а крупные
+    ячейки кусочно-регулярной сетки -- блок вокселей.
+
+    edges   -- границы вокселей по осям X, Y, Z
+    density -- (nx, ny, nz) плотность, NaN там, где ячеек нет
+    exact   -- каждая ячейка занимает ровно один воксель
+    cells   -- (nx, ny, nz) номер ячейки каждого вокселя, -1 там, где ячеек нет;
+               None для укрупнённой сетки
+    """
+    edges: tuple[np.ndarray, np.ndarray, np.ndarray]
+    density: np.ndarray
+    exact: bool
+    cells: Optional[np.ndarray] = None
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        return self.density.shape
+
+    def layer(self, axis: str, value: float) -> Optional[int]:
+        """Номер слоя вокселей, содержащего value, или None вне сетки"""
+        edges = self.edges[AXIS_INDEX[axis]]
+        if value < edges[0] or value > edges[-1]:
+            return None
+        return min(int(np.searchsorted(edges, value, side='right')) - 1, len(edges) - 2)
+
+    def slice(self, axis: str, value: float) -> Optional[np.ndarray]:
+        """Сечение плотности плоскостью axis = value.
+
+        Возвращает двумерный массив по двум оставшимся осям в порядке X, Y, Z
+        или None, если плоскость не пересекает сетку.
+        """
+        layer = self.layer(axis, value)
+        if layer is None:
+            return None
+        return self.density.take(layer, axis=AXIS_INDEX[axis])
+
+    def cell_slice(self, axis: str, value: float) -> Optional[np.ndarray]:
+        """Номера ячеек в сечении axis = value, -1 для пустых вокселей"""
+        layer = self.layer(axis, value)
+        if layer is None or self.cells is None:
+            return None
+        return self.cells.take(layer, axis=AXIS_INDEX[axis])
+
+
+def cell_arrays(cells: list) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(M, 3) нижние и верхние углы ячеек и (M,) их плотность"""
+    centers = np.array([[cell[f"Center{axis}"] for axis in AXES] for cell in cells], dtype=float).reshape(-1, 3)
+    half_sizes = np.array([[cell[f"Bound{axis}"] for axis in AXES] for cell in cells], dtype=float).reshape(-1, 3)
+    densities = np.array([cell["Density"] for cell in cells], dtype=float)
+    return centers - half_sizes, centers + half_sizes, densities
+
+
+def _merge_edges(values: np.ndarray, tolerance: float) -> np.ndarray:
+    """Отсортированные границы без значений, отличающихся меньше допуска"""
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = np.diff(values) > tolerance
+    return values[keep]
+
+
+def build_voxel_grid(low: np.ndarray, high: np.ndarray, densities: np.ndarray) -> Optional[VoxelGrid]:
+    """Сетка вокселей по углам ячеек.
+
+    Возвращает None, если ячейки перекрываются или их границы не образуют
+    сетку разумного размера; в этом случае ячейки рисуются по отдельности.
+    """
+    if not len(densities):
+        return None
+
+    tolerance = EDGE_TOLERANCE * max(float(np.max(high) - np.min(low)), 1.0)
+    edges, first, last = [], [], []
+    for axis in range(3):
+        axis_edges = _merge_edges(np.concatenate((low[:, axis], high[:, axis])), tolerance)
+        edges.append(axis_edges)
+        first.append(np.searchsorted(axis_edges, low[:, axis] + tolerance, side='right') - 1)
+        last.append(np.searchsorted(axis_edges, high[:, axis] + tolerance, side='right') - 1)
+
+    shape = tuple(len(axis_edges) - 1 for axis_edges in edges)
+    if min(shape) < 1 or np.prod(shape, dtype=np.float64) > MAX_VOXELS_PER_CELL * len(densities):
+        return None
+
+    first, last = np.column_stack(first), np.column_stack(last)
+    spans = last - first
+    if np.any(spans < 1):
+        return None
+
+    cells = np.full(shape, -1, dtype=np.int64)
+    coverage = np.zeros(shape, dtype=np.int32)
+
+    # Ячейки размером в один воксель записываются одной операцией, блоки -- по отдельности
+    single = (spans == 1).all(axis=1)
+    np.add.at(coverage, tuple(first[single].T), 1)
+    cells[tuple(first[single].T)] = np.flatnonzero(single)
+    for cell in np.flatnonzero(~single):
+        block = tuple(slice(start, stop) for start, stop in zip(first[cell], last[cell]))
+        coverage[block] += 1
+        cells[block] = cell
+
+    if coverage.max() > 1:
+        return None
+
+    density = np.full(shape, np.nan)
+    filled = cells >= 0
+    density[filled] = densities[cells[filled]]
+    return VoxelGrid(edges=tuple(edges), density=density, exact=bool(single.all()), cells=cells)
+
+
+def load_voxel_grid(filepath: str) -> Optional[VoxelGrid]:
+    """Сетка вокселей плотности из inverse.json"""
+    with open(filepath, 'r') as f:
+        cells = json.load(f).get('Elements', [])
+    return build_voxel_grid(*cell_arrays(cells))
+
+
+@dataclass(frozen=True)
+class BoundaryFaces:
+    """Видимые грани сетки вокселей.
+
+    vertices -- (F, 4, 3) вершины четырёхугольных граней
+    values   -- (F,) плотность вокселя, которому принадлежит грань
+    normals  -- (F, 3) внешние нормали граней
+    """
+    vertices: np.ndarray
+    values: np.ndarray
+    normals: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def density_classes(density: np.ndarray, levels: int = DENSITY_CLASSES) -> np.ndarray:
+    """Номер класса плотности каждого вокселя, -1 для пустых вокселей"""
+    filled = ~np.isnan(density)
+    classes = np.full(density.shape, -1, dtype=np.int32)
+    if not filled.any():
+        return classes
+    values = density[filled]
+    low, high = values.min(), values.max()
+    scale = levels / (high - low) if high > low else 0.0
+    classes[filled] = np.minimum(((values - low) * scale).astype(np.int32), levels - 1)
+    return classes
+
+
+def coarsen(grid: VoxelGrid, factor: int) -> VoxelGrid:
+    """Укрупнение сетки: блоки factor^3 вокселей заменяются средней плотностью"""
+    shape = tuple(-(-size // factor) for size in grid.shape)
+    padded = np.full(tuple(size * factor for size in shape), np.nan)
+    padded[tuple(slice(0, size) for size in grid.shape)] = grid.density
+
+    filled = ~np.isnan(padded)
+    blocks = (shape[0], factor, shape[1], factor, shape[2], factor)
+    sums = np.where(filled, padded, 0.0).reshape(blocks).sum(axis=(1, 3, 5))
+    counts = filled.reshape(blocks).sum(axis=(1, 3, 5))
+    density = np.full(shape, np.nan)
+    np.divide(sums, counts, out=density, where=counts > 0)
+
+    edges = tuple(
+        axis_edges[np.minimum(np.arange(size + 1) * factor, len(axis_edges) - 1)]
+        for axis_edges, size in zip(grid.edges, shape)
+    )
+    return VoxelGrid(edges=edges, density=density, exact=False)
+
+
+def _grid_faces(grid: VoxelGrid, levels: int) -> BoundaryFaces:
+    classes = density_classes(grid.density, levels)
+    vertices, values, normals = [], [], []
+
+    for axis in range(3):
+        u, v = (other for other in range(3) if other != axis)
+        pad = [(0, 0)] * 3
+        pad[axis] = (1, 1)
+        neighbours = np.pad(classes, pad, constant_values=-1)
+
+        # Грань вокселя видна, если соседа нет или он относится к другому классу плотности
+        for side in (0, 1):
+            neighbour = neighbours.take(np.arange(side * 2, side * 2 + classes.shape[axis]), axis=axis)
+            index = np.nonzero((classes >= 0) & (neighbour != classes))
+            count = len(index[0])
+
+            quads = np.empty((count, 4, 3))
+            quads[:, :, axis] = grid.edges[axis][index[axis] + side][:, None]
+            u0, u1 = grid.edges[u][index[u]], grid.edges[u][index[u] + 1]
+            v0, v1 = grid.edges[v][index[v]], grid.edges[v][index[v] + 1]
+            quads[:, :, u] = np.column_stack((u0, u1, u1, u0))
+            quads[:, :, v] = np.column_stack((v0, v0, v1, v1))
+
+            normal = np.zeros((count, 3))
+            normal[:, axis] = 1.0 if side else -1.0
+
+            vertices.append(quads)
+            values.append(grid.density[index])
+            normals.append(normal)
+
+    return BoundaryFaces(np.concatenate(vertices), np.concatenate(values), np.concatenate(normals))
+
+
+def boundary_faces(grid: VoxelGrid, levels: int = DENSITY_CLASSES,
+                   max_faces: Optional[int] = None) -> BoundaryFaces:
+    """Внешние грани сетки и грани между областями разных классов плотности.
+
+    Внутренние грани между вокселями одного класса скрыты и не выводятся.
+    Если граней больше max_faces, сетка укрупняется в 2, 4, ... раза, пока
+    их число не станет допустимым (уровень детализации).
+    """
+    faces = _grid_faces(grid, levels)
+    factor = 2
+    while max_faces is not None and len(faces) > max_faces and factor < max(grid.shape):
+        faces = _grid_faces(coarsen(grid, factor), levels)
+        factor *= 2
+    return faces
+
+
+def face_shading(normals: np.ndarray) -> np.ndarray:
+    """(F,) множители яркости граней при освещении, как у bar3d в matplotlib"""
+    azimuth, altitude = np.radians(90 - 225), np.radians(19.4712)
+    light = np.array([np.cos(azimuth) * np.cos(altitude), np.sin(azimuth) * np.cos(altitude), np.sin(altitude)])
+    return 0.3 + 0.7 * (normals @ light + 1) / 2
+
+
+def box_faces(low: np.ndarray, high: np.ndarray, values: np.ndarray) -> BoundaryFaces:
+    """Все шесть граней каждого параллелепипеда, когда ячейки не образуют сетку"""
+    corners = np.stack((low, high), axis=1)
+    vertices, normals = [], []
+    for axis in range(3):
+        u, v = (other for other in range(3) if other != axis)
+        for side in (0, 1):
+            quads = np.empty((len(low), 4, 3))
+            quads[:, :, axis] = corners[:, side, axis][:, None]
+            quads[:, :, u] = corners[:, [0, 1, 1, 0], u]
+            quads[:, :, v] = corners[:, [0, 0, 1, 1], v]
+            normal = np.zeros((len(low), 3))
+            normal[:, axis] = 1.0 if side else -1.0
+            vertices.append(quads)
+            normals.append(normal)
+    return BoundaryFaces(np.concatenate(vertices), np.tile(values, 6), np.concatenate(normals))
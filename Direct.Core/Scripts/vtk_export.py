@@ -0,0 +1,307 @@
+import argparse
+import json
+import mmap
+import os
+import xml.etree.ElementTree as ET
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from voxel_grid import build_voxel_grid, cell_arrays
+
+# Типы ячеек VTK
+VTK_VERTEX = 1
+VTK_HEXAHEDRON = 12
+
+# Типы массивов VTK для типов NumPy; данные всегда записываются в порядке little-endian
+VTK_TYPES = {
+    np.dtype('<f4'): 'Float32', np.dtype('<f8'): 'Float64',
+    np.dtype('<i4'): 'Int32', np.dtype('<i8'): 'Int64', np.dtype('u1'): 'UInt8'
+}
+NUMPY_TYPES = {name: dtype for dtype, name in VTK_TYPES.items()}
+
+# Заголовок блоков добавленных данных: UInt64 (header_type="UInt64")
+HEADER_DTYPE = np.dtype('<u8')
+
+# Размер несжатого блока при сжатии zlib, как у vtkZLibDataCompressor
+COMPRESSION_BLOCK = 1 << 15
+
+# Порядок вершин гексаэдра VTK по номеру октанта (бит 0 -- x, бит 1 -- y, бит 2 -- z)
+HEXAHEDRON_ORDER = np.array([0, 1, 3, 2, 4, 5, 7, 6])
+
+
+def _encode(array: np.ndarray, compress: bool) -> bytes:
+    """Блок добавленных данных: заголовок с размерами и сырые или сжатые байты"""
+    raw = np.ascontiguousarray(array).tobytes()
+    if not compress:
+        return np.array([len(raw)], dtype=HEADER_DTYPE).tobytes() + raw
+
+    chunks = [zlib.compress(raw[start:start + COMPRESSION_BLOCK])
+              for start in range(0, len(raw), COMPRESSION_BLOCK)]
+    last = len(raw) - (len(chunks) - 1) * COMPRESSION_BLOCK if chunks else 0
+    header = np.array([len(chunks), COMPRESSION_BLOCK, last, *map(len, chunks)], dtype=HEADER_DTYPE)
+    return header.tobytes() + b''.join(chunks)
+
+
+class _AppendedWriter:
+    """Описания массивов для XML заголовка и общий блок добавленных данных"""
+
+    def __init__(self, compress: bool):
+        self.compress = compress
+        self.blocks = []
+        self.offset = 0
+
+    def array(self, parent: ET.Element, name: Optional[str], values: np.ndarray):
+        values = np.asarray(values)
+        dtype = values.dtype.newbyteorder('<') if values.dtype.itemsize > 1 else values.dtype
+        if dtype not in VTK_TYPES:
+            raise ValueError(f"Тип массива {values.dtype} не поддерживается VTK")
+
+        attributes = {'type': VTK_TYPES[dtype], 'format': 'appended', 'offset': str(self.offset)}
+        if name is not None:
+            attributes['Name'] = name
+        if values.ndim > 1:
+            attributes['NumberOfComponents'] = str(values.shape[1])
+        ET.SubElement(parent, 'DataArray', attributes)
+
+        block = _encode(values.astype(dtype, copy=False), self.compress)
+        self.blocks.append(block)
+        self.offset += len(block)
+
+    def write(self, file_path: str, root: ET.Element):
+        if self.compress:
+            root.set('compressor', 'vtkZLibDataCompressor')
+        header = ET.tostring(root, encoding='unicode')
+        # Добавленные данные идут после XML заголовка и перед закрывающим тегом VTKFile
+        head, tail = header.rsplit('</VTKFile>', 1)
+        partial = file_path + '.partial'
+        with open(partial, 'wb') as f:
+            f.write(b'<?xml version="1.0"?>\n')
+            f.write(head.encode())
+            f.write(b'<AppendedData encoding="raw">_')
+            for block in self.blocks:
+                f.write(block)
+            f.write(b'</AppendedData></VTKFile>' + tail.encode())
+        os.replace(partial, file_path)
+
+
+def _vtk_root(grid_type: str) -> ET.Element:
+    return ET.Element('VTKFile', {
+        'type': grid_type, 'version': '1.0', 'byte_order': 'LittleEndian', 'header_type': 'UInt64'
+    })
+
+
+def _data_section(writer: _AppendedWriter, piece: ET.Element, tag: str, data: Optional[dict]):
+    section = ET.SubElement(piece, tag)
+    for name, values in (data or {}).items():
+        writer.array(section, name, values)
+
+
+def write_vtu(file_path: str, points: np.ndarray, connectivity: Optional[np.ndarray] = None,
+              cell_type: int = VTK_HEXAHEDRON, point_data: Optional[dict] = None,
+              cell_data: Optional[dict] = None, compress: bool = False):
+    """UnstructuredGrid с двоичными добавленными данными.
+
+    connectivity -- (C, K) индексы точек ячеек одного типа cell_type; без него
+    каждая точка становится ячейкой VTK_VERTEX.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if connectivity is None:
+        connectivity, cell_type = np.arange(len(points)).reshape(-1, 1), VTK_VERTEX
+    connectivity = np.asarray(connectivity, dtype=np.int64)
+    cells_count, corners = connectivity.shape
+
+    writer = _AppendedWriter(compress)
+    root = _vtk_root('UnstructuredGrid')
+    piece = ET.SubElement(ET.SubElement(root, 'UnstructuredGrid'), 'Piece', {
+        'NumberOfPoints': str(len(points)), 'NumberOfCells': str(cells_count)
+    })
+    _data_section(writer, piece, 'PointData', point_data)
+    _data_section(writer, piece, 'CellData', cell_data)
+    writer.array(ET.SubElement(piece, 'Points'), None, points)
+    cells = ET.SubElement(piece, 'Cells')
+    writer.array(cells, 'connectivity', connectivity.ravel())
+    writer.array(cells, 'offsets', np.arange(1, cells_count + 1, dtype=np.int64) * corners)
+    writer.array(cells, 'types', np.full(cells_count, cell_type, dtype=np.uint8))
+    writer.write(file_path, root)
+
+
+def write_vtr(file_path: str, edges: tuple, cell_data: Optional[dict] = None,
+              point_data: Optional[dict] = None, compress: bool = False):
+    """RectilinearGrid по границам ячеек вдоль X, Y, Z.
+
+    Массивы ячеек имеют форму (nx, ny, nz) и записываются с быстрым индексом X.
+    """
+    extent = ' '.join(f'0 {len(axis_edges) - 1}' for axis_edges in edges)
+    writer = _AppendedWriter(compress)
+    root = _vtk_root('RectilinearGrid')
+    piece = ET.SubElement(ET.SubElement(root, 'RectilinearGrid', {'WholeExtent': extent}), 'Piece', {'Extent': extent})
+
+    flatten = lambda data: {name: np.asarray(values).ravel(order='F') for name, values in (data or {}).items()}
+    _data_section(writer, piece, 'PointData', flatten(point_data))
+    _data_section(writer, piece, 'CellData', flatten(cell_data))
+    coordinates = ET.SubElement(piece, 'Coordinates')
+    for axis_edges in edges:
+        writer.array(coordinates, None, np.asarray(axis_edges, dtype=np.float64))
+    writer.write(file_path, root)
+
+
+def _decode(buffer, offset: int, dtype: np.dtype, compressed: bool) -> np.ndarray:
+    """Массив блока добавленных данных; без сжатия -- представление буфера без копирования"""
+    if not compressed:
+        size = int(np.frombuffer(buffer, HEADER_DTYPE, 1, offset)[0])
+        return np.frombuffer(buffer, dtype, size // dtype.itemsize, offset + HEADER_DTYPE.itemsize)
+
+    blocks = int(np.frombuffer(buffer, HEADER_DTYPE, 1, offset)[0])
+    header = np.frombuffer(buffer, HEADER_DTYPE, 3 + blocks, offset)
+    position = offset + header.nbytes
+    chunks = []
+    for size in header[3:]:
+        chunks.append(zlib.decompress(buffer[position:position + int(size)]))
+        position += int(size)
+    return np.frombuffer(b''.join(chunks), dtype)
+
+
+def read_vtk(file_path: str) -> dict:
+    """Чтение файла .vtu или .vtr с добавленными данными в массивы NumPy.
+
+    Файл отображается в память, и несжатые массивы возвращаются как
+    представления отображения без копирования и разбора; сжатые массивы
+    распаковываются. Результат: {'type', 'point_data', 'cell_data'} и
+    'points', 'connectivity', 'offsets', 'types' для UnstructuredGrid или
+    'coordinates' и 'shape' для RectilinearGrid (массивы ячеек формы (nx, ny, nz)).
+    """
+    with open(file_path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    start = buffer.find(b'<AppendedData')
+    if start < 0:
+        raise ValueError(f"Файл {file_path} не содержит добавленных двоичных данных")
+    data_start = buffer.find(b'_', start) + 1
+    root = ET.fromstring(buffer[:start].decode() + '</VTKFile>')
+    if root.get('header_type', 'UInt32') != 'UInt64' or root.get('byte_order') != 'LittleEndian':
+        raise ValueError(f"Файл {file_path}: поддерживаются только UInt64 заголовки и порядок LittleEndian")
+    compressed = root.get('compressor') is not None
+
+    def read(element: ET.Element) -> np.ndarray:
+        values = _decode(buffer, data_start + int(element.get('offset')), NUMPY_TYPES[element.get('type')], compressed)
+        components = int(element.get('NumberOfComponents', 1))
+        return values.reshape(-1, components) if components > 1 else values
+
+    grid_type = root.get('type')
+    piece = root.find(f'{grid_type}/Piece')
+    if piece is None:
+        raise ValueError(f"Файл {file_path} не содержит сетку {grid_type}")
+    result = {'type': grid_type}
+    for tag, key in (('PointData', 'point_data'), ('CellData', 'cell_data')):
+        section = piece.find(tag)
+        result[key] = {array.get('Name'): read(array) for array in (section if section is not None else [])}
+
+    if grid_type == 'UnstructuredGrid':
+        result['points'] = read(piece.find('Points/DataArray'))
+        for array in piece.find('Cells'):
+            result[array.get('Name')] = read(array)
+    elif grid_type == 'RectilinearGrid':
+        result['coordinates'] = tuple(read(array) for array in piece.find('Coordinates'))
+        shape = tuple(len(axis) - 1 for axis in result['coordinates'])
+        result['shape'] = shape
+        result['cell_data'] = {name: values.reshape(shape, order='F') for name, values in result['cell_data'].items()}
+    else:
+        raise ValueError(f"Тип сетки {grid_type} не поддерживается")
+    return result
+
+
+def hexahedra(low: np.ndarray, high: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(8M, 3) вершины и (M, 8) связность параллелепипедов по углам в порядке VTK"""
+    corners = np.stack((low, high), axis=1)
+    octant = np.arange(8)[HEXAHEDRON_ORDER]
+    points = np.stack([corners[:, (octant >> axis) & 1, axis] for axis in range(3)], axis=-1)
+    return points.reshape(-1, 3), np.arange(len(low) * 8).reshape(-1, 8)
+
+
+def mesh_hexahedra(mesh) -> np.ndarray:
+    """(M, 8) связность элементов MeshModel в порядке вершин гексаэдра VTK"""
+    nodes = mesh.element_nodes
+    if nodes.shape[1] != 8:
+        raise ValueError("Элементы сетки не являются гексаэдрами")
+    coords = mesh.nodes[nodes]
+    center = coords.mean(axis=1, keepdims=True)
+    octant = ((coords > center) * np.array([1, 2, 4])).sum(axis=2)
+    # Перестановка узлов каждого элемента по номерам октантов вершин
+    order = np.argsort(octant, axis=1)[:, HEXAHEDRON_ORDER]
+    return np.take_along_axis(nodes, order, axis=1)
+
+
+def detect_format(file_path: str) -> str:
+    """'mesh', 'inverse' или 'bfield' по началу JSON файла"""
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        head = f.read(64 * 1024)
+    for marker, kind in (('"Edges"', 'mesh'), ('"Density"', 'inverse'), ('"bx"', 'bfield')):
+        if marker in head:
+            return kind
+    raise ValueError(f"Не удалось определить формат файла {file_path}")
+
+
+def convert(input_file: str, output_file: Optional[str] = None, kind: Optional[str] = None,
+            compress: bool = False) -> str:
+    """Преобразование mesh_data.json, inverse.json или bfield_3d.json в VTU/VTR.
+
+    inverse.json, ячейки которого образуют сетку, записывается как
+    RectilinearGrid (.vtr), остальные данные -- как UnstructuredGrid (.vtu).
+    Возвращает путь записанного файла.
+    """
+    kind = kind or detect_format(input_file)
+    base = os.path.splitext(output_file or input_file)[0]
+
+    if kind == 'mesh':
+        from mesh_stream import read_mesh_stream
+
+        mesh, _, _ = read_mesh_stream(input_file)
+        output_file = base + '.vtu'
+        write_vtu(output_file, mesh.nodes, mesh_hexahedra(mesh), cell_data={'Mu': mesh.mu}, compress=compress)
+    elif kind == 'inverse':
+        with open(input_file, 'r') as f:
+            low, high, density = cell_arrays(json.load(f).get('Elements', []))
+        grid = build_voxel_grid(low, high, density)
+        if grid is not None:
+            output_file = base + '.vtr'
+            write_vtr(output_file, grid.edges, cell_data={'Density': grid.density}, compress=compress)
+        else:
+            output_file = base + '.vtu'
+            points, connectivity = hexahedra(low, high)
+            write_vtu(output_file, points, connectivity, cell_data={'Density': density}, compress=compress)
+    elif kind == 'bfield':
+        with open(input_file, 'r') as f:
+            data = json.load(f)
+        values = np.array([[d[key] for key in ('x', 'y', 'z', 'bx', 'by', 'bz')] for d in data], dtype=float)
+        values = values.reshape(-1, 6)
+        output_file = base + '.vtu'
+        write_vtu(output_file, values[:, :3], point_data={
+            'B': values[:, 3:], '|B|': np.linalg.norm(values[:, 3:], axis=1)
+        }, compress=compress)
+    else:
+        raise ValueError(f"Неизвестный формат: {kind}")
+    return output_file
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Преобразование mesh_data.json, inverse.json и bfield_3d.json в двоичные VTU/VTR для ParaView',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('inputs', nargs='+', help='JSON файлы')
+    parser.add_argument('-o', '--output', help='Имя результата для одного входного файла; расширение выбирается по типу сетки')
+    parser.add_argument('-k', '--kind', choices=('mesh', 'inverse', 'bfield'), help='Формат входа; по умолчанию по содержимому')
+    parser.add_argument('-c', '--compress', action='store_true', help='Сжимать массивы zlib')
+    args = parser.parse_args()
+
+    try:
+        if args.output and len(args.inputs) > 1:
+            raise ValueError("Имя результата можно задать только для одного входного файла")
+        for input_file in args.inputs:
+            output_file = convert(input_file, args.output, args.kind, args.compress)
+            print(f"{input_file} -> {output_file} ({os.path.getsize(output_file) / 2 ** 20:.2f} МБ)")
+    except Exception as e:
+        print(f"\nОшибка: {str(e)}")
+        exit(1)
@@ -1,10 +1,10 @@
-﻿using System.Diagnostics;
+﻿using Direct.Core.Services.RenderServerService;
 using Electromagnetic.Common.Data.Domain;
 using Newtonsoft.Json;
 
 namespace Direct.Core.Services.PlotService;
 
-public class PlotService : IPlotService
+public class PlotService(IRenderServerService renderServerService) : IPlotService
 {
     private Task CreateDataFiles(Mesh mesh, IReadOnlyList<Sensor> sensors)
     {
@@ -46,13 +46,17 @@ public class PlotService : IPlotService
         await CreateDataFiles(mesh, sensors);
 
         Console.WriteLine("Start drowning mesh plot");
-        using Process myProcess = new();
-        myProcess.StartInfo.FileName = "python";
-        myProcess.StartInfo.Arguments = @"Scripts/show_plots_script.py";
-        myProcess.StartInfo.UseShellExecute = false;
-        myProcess.StartInfo.RedirectStandardInput = true;
-        myProcess.StartInfo.RedirectStandardOutput = false;
-        myProcess.Start();
+        await renderServerService.RenderAsync(
+            "mesh",
+            "mesh_data.json",
+            "graph.png",
+            new
+            {
+                x_slice = 0,
+                y_slice = 0,
+                z_slice = -9
+            }
+        );
         Console.WriteLine("End drowning mesh plot");
     }
 }
\ No newline at end of file
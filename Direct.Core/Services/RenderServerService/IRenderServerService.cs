@@ -0,0 +1,17 @@
+﻿namespace Direct.Core.Services.RenderServerService;
+
+/// <summary>
+/// Клиент долгоживущего процесса отрисовки Scripts/render_server.py
+/// </summary>
+public interface IRenderServerService : IDisposable
+{
+    /// <summary>
+    /// Отправляет задание отрисовки и ожидает, пока изображение будет записано
+    /// </summary>
+    /// <param name="job">Тип задания: mesh, contour, sensors, inverse, mesh_views</param>
+    /// <param name="input">Путь к входному файлу, по умолчанию используется файл задания</param>
+    /// <param name="output">Путь к результату, по умолчанию используется файл задания</param>
+    /// <param name="options">Дополнительные параметры задания</param>
+    /// <returns>Результат выполнения задания с временем отрисовки</returns>
+    Task<RenderJobResult> RenderAsync(string job, string? input = null, string? output = null, object? options = null);
+}
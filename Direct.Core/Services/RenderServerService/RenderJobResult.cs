@@ -0,0 +1,36 @@
+﻿namespace Direct.Core.Services.RenderServerService;
+
+/// <summary>
+/// Ответ сервера отрисовки на задание
+/// </summary>
+public record RenderJobResult
+{
+    public int? Id { get; init; }
+
+    public string? Job { get; init; }
+
+    public string Status { get; init; } = string.Empty;
+
+    /// <summary>
+    /// Полный путь к записанному изображению
+    /// </summary>
+    public string? Output { get; init; }
+
+    /// <summary>
+    /// Текст ошибки, если задание не выполнено
+    /// </summary>
+    public string? Error { get; init; }
+
+    /// <summary>
+    /// Время выполнения задания на стороне сервера, с
+    /// </summary>
+    public double Elapsed { get; init; }
+
+    /// <summary>
+    /// Профиль этапов построения, если профилирование включено переменной EM_PLOTS_PROFILE
+    /// или параметром задания profile
+    /// </summary>
+    public RenderProfile? Profile { get; init; }
+
+    public bool IsSuccess => Status == "ok";
+}
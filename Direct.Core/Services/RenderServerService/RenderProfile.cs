@@ -0,0 +1,40 @@
+﻿using System.Text.Json.Serialization;
+
+namespace Direct.Core.Services.RenderServerService;
+
+/// <summary>
+/// Профиль построения графика по этапам, записываемый сервером отрисовки рядом с изображением
+/// </summary>
+public record RenderProfile
+{
+    /// <summary>
+    /// Полный путь к файлу профиля
+    /// </summary>
+    public string? File { get; init; }
+
+    /// <summary>
+    /// Астрономическое время построения, с
+    /// </summary>
+    public double Wall { get; init; }
+
+    /// <summary>
+    /// Процессорное время построения, с
+    /// </summary>
+    public double Cpu { get; init; }
+
+    /// <summary>
+    /// Пиковая резидентная память процесса отрисовки, байт
+    /// </summary>
+    [JsonPropertyName("peak_memory")]
+    public long? PeakMemory { get; init; }
+
+    /// <summary>
+    /// Замеры этапов в порядке выполнения
+    /// </summary>
+    public IReadOnlyList<RenderStageProfile> Stages { get; init; } = [];
+
+    /// <summary>
+    /// Размеры данных и количество созданных примитивов
+    /// </summary>
+    public IReadOnlyDictionary<string, long> Counts { get; init; } = new Dictionary<string, long>();
+}
@@ -0,0 +1,137 @@
+﻿using System.Diagnostics;
+using System.Text;
+using System.Text.Json;
+
+namespace Direct.Core.Services.RenderServerService;
+
+/// <inheritdoc cref="IRenderServerService"/>
+public class RenderServerService : IRenderServerService
+{
+    private static readonly JsonSerializerOptions JsonOptions = new() { PropertyNameCaseInsensitive = true };
+
+    private readonly string        _scriptPath = Path.Combine(Directory.GetCurrentDirectory(), "Scripts", "render_server.py");
+    private readonly SemaphoreSlim _lock       = new(1, 1);
+    private          Process?      _process;
+    private          int           _jobId;
+
+    public async Task<RenderJobResult> RenderAsync(
+        string job,
+        string? input = null,
+        string? output = null,
+        object? options = null
+    )
+    {
+        await _lock.WaitAsync();
+        try
+        {
+            var process = EnsureStarted();
+            var id = ++_jobId;
+
+            await process.StandardInput.WriteLineAsync(
+                JsonSerializer.Serialize(
+                    new
+                    {
+                        id,
+                        job,
+                        input,
+                        output,
+                        options
+                    }
+                )
+            );
+            await process.StandardInput.FlushAsync();
+
+            var response = await process.StandardOutput.ReadLineAsync();
+            if (response is null)
+            {
+                _process = null;
+                throw new InvalidOperationException("Render server has exited unexpectedly");
+            }
+
+            var result = JsonSerializer.Deserialize<RenderJobResult>(response, JsonOptions)
+                         ?? throw new InvalidOperationException("Render server returned an empty response");
+
+            Console.WriteLine(
+                result.IsSuccess
+                    ? $"Render job '{job}' finished in {result.Elapsed:F3} s: {result.Output}"
+                    : $"Render job '{job}' failed in {result.Elapsed:F3} s: {result.Error}"
+            );
+
+            if (result.Profile is not null)
+                LogProfile(result.Profile);
+
+            return result;
+        }
+        finally
+        {
+            _lock.Release();
+        }
+    }
+
+    private static void LogProfile(RenderProfile profile)
+    {
+        foreach (var stage in profile.Stages)
+        {
+            Console.WriteLine(
+                $"  {stage.Name,-16} wall {stage.Wall:F3} s, cpu {stage.Cpu:F3} s, "
+                + $"objects {FormatObjects(stage.Objects)}, peak memory {FormatMemory(stage.PeakMemory)}"
+            );
+        }
+
+        Console.WriteLine($"  Profile is saved to {profile.File}");
+    }
+
+    private static string FormatMemory(long? bytes) =>
+        bytes is { } value ? $"{value / (1024.0 * 1024.0):F1} MB" : "n/a";
+
+    private static string FormatObjects(long? objects) =>
+        objects is { } value ? $"{value:+#;-#;0}" : "n/a";
+
+    private Process EnsureStarted()
+    {
+        if (_process is { HasExited: false })
+            return _process;
+
+        if (!File.Exists(_scriptPath))
+            throw new FileNotFoundException($"Script file was not found from path {_scriptPath}");
+
+        var encoding = new UTF8Encoding(false);
+        _process = Process.Start(
+                       new ProcessStartInfo
+                       {
+                           FileName = "python",
+                           Arguments = $"\"{_scriptPath}\"",
+                           UseShellExecute = false,
+                           RedirectStandardInput = true,
+                           RedirectStandardOutput = true,
+                           StandardInputEncoding = encoding,
+                           StandardOutputEncoding = encoding,
+                           CreateNoWindow = true
+                       }
+                   )
+                   ?? throw new InvalidOperationException("Render server process was not started");
+
+        return _process;
+    }
+
+    public void Dispose()
+    {
+        if (_process is { HasExited: false })
+        {
+            try
+            {
+                _process.StandardInput.WriteLine(JsonSerializer.Serialize(new { job = "shutdown" }));
+                _process.StandardInput.Flush();
+                if (!_process.WaitForExit(5000))
+                    _process.Kill();
+            } catch (IOException)
+            {
+                _process.Kill();
+            }
+        }
+
+        _process?.Dispose();
+        _lock.Dispose();
+        GC.SuppressFinalize(this);
+    }
+}
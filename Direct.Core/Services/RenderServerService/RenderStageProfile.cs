@@ -0,0 +1,32 @@
+﻿using System.Text.Json.Serialization;
+
+namespace Direct.Core.Services.RenderServerService;
+
+/// <summary>
+/// Замер одного этапа построения графика
+/// </summary>
+public record RenderStageProfile
+{
+    public string Name { get; init; } = string.Empty;
+
+    /// <summary>
+    /// Астрономическое время этапа, с
+    /// </summary>
+    public double Wall { get; init; }
+
+    /// <summary>
+    /// Процессорное время этапа, с
+    /// </summary>
+    public double Cpu { get; init; }
+
+    /// <summary>
+    /// Пиковая резидентная память процесса после этапа, байт
+    /// </summary>
+    [JsonPropertyName("peak_memory")]
+    public long? PeakMemory { get; init; }
+
+    /// <summary>
+    /// Прирост числа объектов Python за этап, если подсчёт объектов включён
+    /// </summary>
+    public long? Objects { get; init; }
+}
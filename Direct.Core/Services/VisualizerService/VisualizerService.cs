@@ -1,9 +1,9 @@
-﻿using System.Diagnostics;
+﻿using Direct.Core.Services.RenderServerService;
 using Electromagnetic.Common.Data.Domain;
 
 namespace Direct.Core.Services.VisualizerService;
 
-public class VisualizerService : IVisualizerService
+public class VisualizerService(IRenderServerService renderServerService) : IVisualizerService
 {
     private readonly string _rootPath = Directory.GetCurrentDirectory();
     private readonly string _dataFileName = Path.Combine(Directory.GetCurrentDirectory(), "output.txt");
@@ -26,17 +26,9 @@ public class VisualizerService : IVisualizerService
         await StartDrawingAsync();
     }
 
-    private Task StartDrawingAsync()
+    private async Task StartDrawingAsync()
     {
-        using Process myProcess = new();
-        myProcess.StartInfo.FileName = "python";
-        myProcess.StartInfo.Arguments = _scriptPath;
-        myProcess.StartInfo.UseShellExecute = false;
-        myProcess.StartInfo.RedirectStandardInput = true;
-        myProcess.StartInfo.RedirectStandardOutput = false;
-        myProcess.Start();
-
-        return Task.CompletedTask;
+        await renderServerService.RenderAsync("mesh_views", _dataFileName, Path.Combine(_rootPath, "OutputPlots"));
     }
 
     private async Task ResolveDataToDrawAsync(Mesh mesh)
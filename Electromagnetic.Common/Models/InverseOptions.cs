@@ -119,4 +119,10 @@ public record InverseOptions
     /// Допустимый рост функционала прежде чем считать это отклонением.
     /// </summary>
     public double FunctionalGrowthTolerance { get; init; }
+
+    /// <summary>
+    /// Каталог снимков плотности в формате inverse.json, записываемых после каждой итерации.
+    /// Если не задан — снимки не сохраняются.
+    /// </summary>
+    public string? SnapshotDirectory { get; init; }
 }
\ No newline at end of file
@@ -2,6 +2,7 @@
 using System.Diagnostics;
 using System.Text.Json;
 using Direct.Core.Services.PlotService;
+using Direct.Core.Services.RenderServerService;
 using Electromagnetic.Common.Data.Domain;
 using Electromagnetic.Common.Models;
 using Inverse.BornApproximation.Services.JacobianService;
@@ -16,7 +17,8 @@ public class BornInversionService(
     IInversionService inversionService,
     IBornJacobianService bornJacobianService,
     IDirectTaskService directTaskService,
-    IPlotService plotService
+    IPlotService plotService,
+    IRenderServerService renderServerService
 ) : IBornInversionService
 {
     private readonly Stopwatch                         _timer = new();
@@ -213,18 +215,6 @@ public class BornInversionService(
         var json = JsonSerializer.Serialize(values, new JsonSerializerOptions { WriteIndented = true });
         await File.WriteAllTextAsync("field_data.json", json);
 
-        var scriptPath = Path.Combine(Directory.GetCurrentDirectory(), "Scripts\\contour_plot.py");
-        var psi = new ProcessStartInfo
-        {
-            FileName = "python",
-            Arguments = scriptPath,
-            RedirectStandardInput = true,
-            RedirectStandardOutput = false,
-            UseShellExecute = false,
-            CreateNoWindow = true
-        };
-
-        var process = Process.Start(psi);
-        await process?.WaitForExitAsync()!;
+        await renderServerService.RenderAsync("contour", "field_data.json", "contour_plot.png");
     }
 }
\ No newline at end of file
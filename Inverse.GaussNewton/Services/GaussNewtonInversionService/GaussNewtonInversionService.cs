@@ -1,7 +1,7 @@
-﻿using System.Collections.Concurrent;
-using System.Diagnostics;
+﻿using System.Diagnostics;
 using System.Text.Json;
 using Direct.Core.Services.PlotService;
+using Direct.Core.Services.RenderServerService;
 using Electromagnetic.Common.Data.Domain;
 using Electromagnetic.Common.Models;
 using Inverse.GaussNewton.Services.JacobianService;
@@ -16,12 +16,13 @@ public class GaussNewtonInversionService(
     IInversionService inversionService,
     IGaussNewtonJacobianService gaussNewtonJacobianService,
     IDirectTaskService directTaskService,
-    IPlotService plotService
+    IPlotService plotService,
+    IRenderServerService renderServerService
 ) : IGaussNewtonInversionService
 {
-    private readonly Stopwatch                         _timer = new();
-    private          double                            _initialFunctional;
-    private          ConcurrentDictionary<int, double> _functionalList = [];
+    private readonly Stopwatch _timer = new();
+    private          double    _initialFunctional;
+    private          string    _functionalLogPath = string.Empty;
 
     /// <inheritdoc />
     public async Task AdaptiveInvertAsync(
@@ -38,6 +39,10 @@ public class GaussNewtonInversionService(
         // Запуск расчёта времени
         _timer.Start();
 
+        // Журнал функционала пополняется на каждой итерации, чтобы за сходимостью можно было следить во время расчёта
+        _functionalLogPath = $"GaussNewton_test_3_{DateTime.Now.ToShortDateString()}.txt";
+        await File.WriteAllTextAsync(_functionalLogPath, "Functional list:\n");
+
         // Истинные значения
         var currentMesh = initialMesh;
 
@@ -74,7 +79,7 @@ public class GaussNewtonInversionService(
                 _initialFunctional = currentFunctional;
                 Console.WriteLine($"Initial functional was set to: {_initialFunctional:E8}");
 
-                _functionalList.TryAdd(-1, _initialFunctional);
+                await AppendFunctionalAsync(-1, _initialFunctional);
             }
 
             // Проверка на нулевой функционал
@@ -185,7 +190,11 @@ public class GaussNewtonInversionService(
             for (int j = 0; j < currentMesh.Elements.Count; j++)
                 currentMesh.Elements[j].Mu = updatedMu[j];
 
-            _functionalList.TryAdd(iteration, currentFunctional);
+            await AppendFunctionalAsync(iteration, currentFunctional);
+
+            if (inversionOptions.SnapshotDirectory is not null)
+                await WriteSnapshotAsync(currentMesh, inversionOptions.SnapshotDirectory, iteration);
+
             Console.WriteLine($"Elements: {currentMesh.Elements.Count}");
         }
 
@@ -203,18 +212,55 @@ public class GaussNewtonInversionService(
         await ShowValuesAsync(values);
     }
 
+    /// <summary>
+    /// Дописывает строку функционала в журнал; functional_monitor.py читает только дописанные байты.
+    /// </summary>
+    private async Task AppendFunctionalAsync(int iteration, double functional)
+    {
+        await File.AppendAllTextAsync(_functionalLogPath, $"{iteration}: {functional:E8}\n");
+    }
+
     private async Task WriteFunctionalToFile(double lastFunctional)
     {
-        await using var writer = new StreamWriter($"GaussNewton_test_3_{DateTime.Now.ToShortDateString()}.txt", false);
+        await using var writer = new StreamWriter(_functionalLogPath, true);
 
-        await writer.WriteLineAsync($"Elapsed time: {_timer.Elapsed}");
+        await writer.WriteLineAsync($"\nElapsed time: {_timer.Elapsed}");
         await writer.WriteLineAsync(
             $"Initial functional: {_initialFunctional:E8}\t|\tLast functional: {lastFunctional:E8}"
         );
+    }
+
+    /// <summary>
+    /// Снимок плотности ячеек после итерации в формате inverse.json для inversion_animation.py.
+    /// Файл записывается во временный и переименовывается, чтобы наблюдающий скрипт не прочитал его частично.
+    /// </summary>
+    private static async Task WriteSnapshotAsync(Mesh mesh, string directory, int iteration)
+    {
+        Directory.CreateDirectory(directory);
 
-        await writer.WriteLineAsync("\nFunctional list:");
-        foreach (var functional in _functionalList)
-            await writer.WriteLineAsync($"{functional.Key}: {functional.Value:E8}");
+        var elements = mesh.Elements.Select(element =>
+            {
+                var (minX, maxX, minY, maxY, minZ, maxZ) = element.GetBounds();
+                return new
+                {
+                    CenterX = (minX + maxX) / 2.0,
+                    CenterY = (minY + maxY) / 2.0,
+                    CenterZ = (minZ + maxZ) / 2.0,
+                    BoundX = (maxX - minX) / 2.0,
+                    BoundY = (maxY - minY) / 2.0,
+                    BoundZ = (maxZ - minZ) / 2.0,
+                    Density = element.Mu
+                };
+            }
+        );
+
+        var path = Path.Combine(directory, $"iteration_{iteration:D4}.json");
+        var partial = path + ".tmp";
+
+        await using (var stream = File.Create(partial))
+            await JsonSerializer.SerializeAsync(stream, new { Elements = elements });
+
+        File.Move(partial, path, true);
     }
 
     private async Task ShowPlotAsync(Mesh mesh, IReadOnlyList<Sensor> sensors)
@@ -227,18 +273,6 @@ public class GaussNewtonInversionService(
         var json = JsonSerializer.Serialize(values, new JsonSerializerOptions { WriteIndented = true });
         await File.WriteAllTextAsync("field_data.json", json);
 
-        var scriptPath = Path.Combine(Directory.GetCurrentDirectory(), "Scripts\\contour_plot.py");
-        var psi = new ProcessStartInfo
-        {
-            FileName = "python",
-            Arguments = scriptPath,
-            RedirectStandardInput = true,
-            RedirectStandardOutput = false,
-            UseShellExecute = false,
-            CreateNoWindow = true
-        };
-
-        var process = Process.Start(psi);
-        await process?.WaitForExitAsync()!;
+        await renderServerService.RenderAsync("contour", "field_data.json", "contour_plot.png");
     }
 }
\ No newline at end of file